@@ -0,0 +1,251 @@
+# batch_video.py
+# 녹화된 영상 → 프레임별 gaze (+ 캘리브레이션이 있으면 화면 좌표) CSV / Parquet, 창 없이 오프라인 처리
+import os
+import csv
+import time
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import cv2
+import numpy as np
+from calibration import load_calibration, apply_calibration, head_features
+from gaze_engine import GazeEngine, EYES, preprocess_eye
+from landmarker import create_landmarker
+from startup import create_face_mesh
+
+EYE_NAMES = [eye_name for eye_name, _ in EYES]
+HEAD_COLUMNS = ('head_x', 'head_y', 'head_eye_dist')  # calibration.head_features 순서
+
+
+def _init_worker():
+    """영상 프로세스끼리 코어를 나눠 쓰도록 OpenCV 내부 스레드 끔"""
+    cv2.setNumThreads(1)
+
+
+class _EyeBatcher:
+    """여러 프레임의 눈 crop을 (batch_size, 1, 36, 60) 버퍼에 모았다가 한 번에 forward"""
+
+    def __init__(self, engine, batch_size, gazes):
+        self.engine = engine
+        self.batch = np.empty((batch_size, 1, 36, 60), dtype=np.float32)
+        self.slots = []      # 버퍼 순서대로 (프레임 번호, 눈 번호)
+        self.gazes = gazes   # 프레임 번호 → (2, 3) 눈별 gaze (없는 눈은 NaN)
+
+    def add(self, frame_idx, eye_idx, eye_img):
+        self.batch[len(self.slots), 0] = preprocess_eye(eye_img)
+        self.slots.append((frame_idx, eye_idx))
+        if len(self.slots) == len(self.batch):
+            self.flush()
+
+    def flush(self):
+        if not self.slots:
+            return
+        outputs = self.engine.backend(self.batch[:len(self.slots)])
+        for (frame_idx, eye_idx), gaze in zip(self.slots, outputs):
+            self.gazes[frame_idx][eye_idx] = gaze
+        self.slots = []
+
+
+def process_video(video_path, model_path='best_model.pth', backend=None, num_threads=1,
+                  batch_size=256, detect_every=1, landmark_width=None, flip=True, max_frames=None):
+    """
+    영상 하나 → 프레임별 결과 dict (열 이름 → 배열)
+    - 랜드마크는 프레임 순서대로 (FaceMesh 추적 모드), 눈 crop은 batch_size개씩 모아서 추론
+    - flip: 실시간 트래커처럼 좌우 반전 후 처리 (트래커에서 만든 캘리브레이션과 맞추려면 True)
+    """
+    engine = GazeEngine(model_path, backend=backend, num_threads=num_threads)
+    landmarker = create_landmarker(create_face_mesh(), detect_every, landmark_width=landmark_width)
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"영상을 열 수 없음: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+
+    times, faces, heads = [], [], []
+    gazes = {}
+    batcher = _EyeBatcher(engine, batch_size, gazes)
+
+    frame_idx = 0
+    while max_frames is None or frame_idx < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if flip:
+            frame = cv2.flip(frame, 1)
+
+        times.append(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0)
+        gazes[frame_idx] = np.full((len(EYE_NAMES), 3), np.nan)
+        landmarks = landmarker.process(frame)
+        faces.append(landmarks is not None)
+        heads.append(np.full(len(HEAD_COLUMNS), np.nan) if landmarks is None else head_features(landmarks, frame.shape))
+        if landmarks is not None:
+            for eye_name, _, eye_img in engine.crop_eyes(frame, landmarks):
+                batcher.add(frame_idx, EYE_NAMES.index(eye_name), eye_img)
+        frame_idx += 1
+
+    batcher.flush()
+    cap.release()
+
+    eye_gazes = np.array([gazes[i] for i in range(frame_idx)]).reshape(frame_idx, len(EYE_NAMES), 3)
+    # 검출된 눈 평균 (눈이 하나도 없으면 0/0 = NaN)
+    valid = ~np.isnan(eye_gazes[:, :, 0])
+    with np.errstate(invalid='ignore'):
+        mean_gaze = np.where(valid[:, :, None], eye_gazes, 0.0).sum(axis=1) / valid.sum(axis=1)[:, None]
+
+    columns = {
+        'frame': np.arange(frame_idx),
+        'time_s': np.array(times),
+        'face': np.array(faces, dtype=np.int8),
+    }
+    for eye_idx, eye_name in enumerate(EYE_NAMES):
+        for axis_idx, axis in enumerate('xyz'):
+            columns[f'{eye_name.lower()}_{axis}'] = eye_gazes[:, eye_idx, axis_idx]
+    for axis_idx, axis in enumerate('xyz'):
+        columns[f'gaze_{axis}'] = mean_gaze[:, axis_idx]
+    head_values = np.array(heads).reshape(frame_idx, len(HEAD_COLUMNS))
+    for i, name in enumerate(HEAD_COLUMNS):
+        columns[name] = head_values[:, i]
+    return columns, fps
+
+
+def add_screen_points(columns, calib):
+    """gaze 열 (+ --head-features 캘리브레이션이면 head 열) → screen_x, screen_y"""
+    gaze = np.stack([columns['gaze_x'], columns['gaze_y'], columns['gaze_z']], axis=1)
+    heads = np.stack([columns[name] for name in HEAD_COLUMNS], axis=1)  # head를 안 쓰는 모델은 무시
+    points = apply_calibration(calib, gaze, heads)
+    columns['screen_x'] = points[:, 0]
+    columns['screen_y'] = points[:, 1]
+
+
+def check_format(fmt):
+    """출력 형식에 필요한 패키지 확인 (영상 처리 전에 호출, 없으면 ImportError)"""
+    if fmt != 'parquet':
+        return
+    try:
+        import pandas  # noqa: F401
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError(f"Parquet 출력에는 pandas + pyarrow가 필요합니다 (또는 --format csv): {e}") from e
+
+
+def write_table(path, columns):
+    """확장자 .parquet이면 Parquet (pandas + pyarrow 필요), 아니면 CSV"""
+    if path.endswith('.parquet'):
+        check_format('parquet')
+        import pandas as pd
+        pd.DataFrame(columns).to_parquet(path, index=False)
+        return
+
+    names = list(columns)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        for row in zip(*(columns[name].tolist() for name in names)):
+            writer.writerow(['' if value != value else value for value in row])  # NaN → 빈 칸
+
+
+def process_file(video_path, out_path, calibration_path=None, **kwargs):
+    """워커 프로세스에서 실행: 영상 하나 처리 → 저장 → 요약"""
+    start = time.perf_counter()
+    columns, fps = process_video(video_path, **kwargs)
+    if calibration_path:
+        add_screen_points(columns, load_calibration(calibration_path))
+    write_table(out_path, columns)
+
+    seconds = time.perf_counter() - start
+    n_frames = len(columns['frame'])
+    return {
+        'video': video_path,
+        'out': out_path,
+        'frames': n_frames,
+        'face_rate': float(columns['face'].mean()) if n_frames else 0.0,
+        'video_fps': fps,
+        'seconds': seconds,
+        'process_fps': n_frames / seconds if seconds > 0 else 0.0,
+    }
+
+
+def output_paths(videos, out_dir, fmt):
+    """
+    영상별 출력 경로 out_dir/<이름>_gaze.<fmt> (워커끼리 같은 파일에 덮어쓰지 않게 모두 다르게)
+    - 파일 이름이 겹치면 상위 폴더 이름을 앞에 붙이고 (a/session.mp4 → a_session), 그래도 겹치면 번호
+    """
+    stems = [os.path.splitext(os.path.basename(video_path))[0] for video_path in videos]
+    stem_counts = Counter(stems)
+    names = []
+    for video_path, stem in zip(videos, stems):
+        if stem_counts[stem] > 1:
+            stem = f'{os.path.basename(os.path.dirname(os.path.abspath(video_path)))}_{stem}'
+        names.append(stem)
+
+    name_counts, seen = Counter(names), Counter()
+    paths = []
+    for name in names:
+        if name_counts[name] > 1:
+            seen[name] += 1
+            name = f'{name}_{seen[name]}'
+        paths.append(os.path.join(out_dir, f'{name}_gaze.{fmt}'))
+    return paths
+
+
+def run_batch(videos, out_dir, fmt='csv', jobs=None, calibration_path=None, **kwargs):
+    """
+    영상 여러 개를 jobs개 프로세스로 동시에 처리
+    - 프로세스마다 GazeEngine / FaceMesh를 따로 만들고, 추론 스레드 = CPU 수 // jobs
+    """
+    check_format(fmt)  # 영상을 다 처리한 뒤 저장 단계에서 실패하지 않게 먼저 확인
+    os.makedirs(out_dir, exist_ok=True)
+    if jobs is None:
+        jobs = min(len(videos), os.cpu_count() or 1)
+    kwargs.setdefault('num_threads', max(1, (os.cpu_count() or 1) // jobs))
+    print(f"영상 {len(videos)}개, 동시 {jobs}개, 프로세스당 추론 스레드 {kwargs['num_threads']}")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+        futures = {}
+        for video_path, out_path in zip(videos, output_paths(videos, out_dir, fmt)):
+            futures[pool.submit(process_file, video_path, out_path, calibration_path, **kwargs)] = video_path
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"  {os.path.basename(result['video'])}: {result['frames']} frames, "
+                  f"얼굴 {result['face_rate'] * 100:.0f}%, {result['process_fps']:.0f} fps "
+                  f"→ {result['out']} ({len(results)}/{len(futures)})")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='녹화 영상 → 프레임별 gaze (창 없이 일괄 처리)')
+    parser.add_argument('videos', nargs='+')
+    parser.add_argument('--out-dir', default='gaze_out')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--model', default='best_model.pth',
+                        help='.pth, 동결/int8 등 .pt (freeze_model.py, quantize.py), .onnx (export_onnx.py)')
+    parser.add_argument('--backend', choices=['torch', 'onnx'], default=None)
+    parser.add_argument('--calibration', default=None,
+                        help='screen_gaze_calibrated.py --calibration 으로 저장한 JSON (screen_x/y 열 추가)')
+    parser.add_argument('--jobs', type=int, default=None, help='동시에 처리할 영상 수')
+    parser.add_argument('--threads', type=int, default=None, help='프로세스당 추론 스레드 수')
+    parser.add_argument('--batch-size', type=int, default=256, help='한 번에 forward할 눈 crop 수')
+    parser.add_argument('--detect-every', type=int, default=1)
+    parser.add_argument('--landmark-width', type=int, default=None)
+    parser.add_argument('--no-flip', action='store_true', help='좌우 반전 없이 처리')
+    parser.add_argument('--max-frames', type=int, default=None)
+    args = parser.parse_args()
+    try:
+        check_format(args.format)
+    except ImportError as e:
+        parser.error(str(e))
+
+    options = dict(model_path=args.model, backend=args.backend, batch_size=args.batch_size,
+                   detect_every=args.detect_every, landmark_width=args.landmark_width,
+                   flip=not args.no_flip, max_frames=args.max_frames)
+    if args.threads is not None:
+        options['num_threads'] = args.threads
+
+    start = time.perf_counter()
+    results = run_batch(args.videos, args.out_dir, fmt=args.format, jobs=args.jobs,
+                        calibration_path=args.calibration, **options)
+    total_frames = sum(r['frames'] for r in results)
+    elapsed = time.perf_counter() - start
+    print(f"완료: {total_frames} frames, {elapsed:.1f}s ({total_frames / max(elapsed, 1e-9):.0f} fps 전체)")
@@ -0,0 +1,131 @@
+# bench_infer.py
+# GazeNet 추론 지연시간 벤치마크 (p50/p95/p99 + 처리량)
+import os
+import json
+import time
+import argparse
+import numpy as np
+import torch
+from model import load_model
+
+
+def latency_stats(times):
+    """초 단위 측정값 → ms 단위 통계"""
+    ms = np.asarray(times) * 1000.0
+    return {
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'mean_ms': float(ms.mean()),
+    }
+
+
+def measure(fn, iters, warmup):
+    """fn 호출 한 번씩의 지연시간 목록"""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(iters):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _grad_context(mode):
+    return torch.inference_mode() if mode == 'inference_mode' else torch.no_grad()
+
+
+def bench_forward(model, batch_sizes, thread_counts, modes, iters, warmup):
+    """batch size × 스레드 수 × (no_grad / inference_mode) 조합별 forward 지연시간"""
+    results = []
+    for num_threads in thread_counts:
+        torch.set_num_threads(num_threads)
+        for batch_size in batch_sizes:
+            x = torch.rand(batch_size, 1, 36, 60)
+            for mode in modes:
+                with _grad_context(mode):
+                    times = measure(lambda: model(x), iters, warmup)
+                stats = latency_stats(times)
+                stats.update({
+                    'threads': num_threads,
+                    'batch': batch_size,
+                    'mode': mode,
+                    'samples_per_s': batch_size / float(np.mean(times)),
+                })
+                results.append(stats)
+                print(f"threads={num_threads:2d} batch={batch_size:3d} {mode:14s} "
+                      f"p50={stats['p50_ms']:.3f}ms p95={stats['p95_ms']:.3f}ms "
+                      f"p99={stats['p99_ms']:.3f}ms {stats['samples_per_s']:.0f} samples/s")
+    return results
+
+
+def bench_tracker_path(model_path, thread_counts, iters, warmup, crop_size=(40, 70), backend=None):
+    """
+    트래커와 같은 경로: 눈 2개 preprocess → forward → 평균 (FaceMesh는 제외)
+    - sequential: 눈마다 batch 1 forward (GazeEngine 도입 전 방식)
+    - batched: GazeEngine.predict_crops로 (2, 1, 36, 60) 한 번에 forward
+    backend: 'torch' / 'onnx' (None이면 확장자로 결정)
+    """
+    from gaze_engine import GazeEngine, preprocess_eye
+
+    engine = GazeEngine(model_path, backend=backend)
+
+    rng = np.random.default_rng(0)
+    h, w = crop_size
+    eye_imgs = [rng.integers(0, 256, size=(h, w, 3), dtype=np.uint8) for _ in range(2)]
+
+    def sequential():
+        gazes = [engine.backend(preprocess_eye(eye_img)[None, None])[0] for eye_img in eye_imgs]
+        return np.mean(gazes, axis=0)
+
+    def batched():
+        return engine.predict_crops(eye_imgs).mean(axis=0)
+
+    results = []
+    for num_threads in thread_counts:
+        torch.set_num_threads(num_threads)
+        if engine.backend_name == 'onnx':
+            engine = GazeEngine(model_path, backend='onnx', num_threads=num_threads)
+        for name, fn in [('sequential', sequential), ('batched', batched)]:
+            stats = latency_stats(measure(fn, iters, warmup))
+            stats.update({'threads': num_threads, 'path': name, 'backend': engine.backend_name,
+                          'crop': list(crop_size)})
+            results.append(stats)
+            print(f"threads={num_threads:2d} [{engine.backend_name}] preprocess+forward (2 eyes, {name:10s}) "
+                  f"p50={stats['p50_ms']:.3f}ms p95={stats['p95_ms']:.3f}ms p99={stats['p99_ms']:.3f}ms")
+    return results
+
+
+if __name__ == "__main__":
+    cpu_count = os.cpu_count() or 1
+    default_threads = sorted({1, 2, 4, cpu_count} & set(range(1, cpu_count + 1)))
+
+    parser = argparse.ArgumentParser(description='GazeNet 추론 지연시간 벤치마크')
+    parser.add_argument('--model', default='best_model.pth', help='.pth 또는 int8 등 .pt 아티팩트')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 2, 8, 64])
+    parser.add_argument('--threads', type=int, nargs='+', default=default_threads)
+    parser.add_argument('--iters', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--skip-tracker', action='store_true', help='preprocess+forward 경로 측정 생략')
+    parser.add_argument('--onnx', default=None, help='export_onnx.py로 만든 .onnx (트래커 경로를 ONNX Runtime으로도 측정)')
+    parser.add_argument('--out', default='bench_infer.json')
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    report = {
+        'torch': torch.__version__,
+        'cpu_count': cpu_count,
+        'config': vars(args),
+        'forward': bench_forward(model, args.batch_sizes, args.threads,
+                                 ['no_grad', 'inference_mode'], args.iters, args.warmup),
+    }
+    if not args.skip_tracker:
+        report['tracker_path'] = bench_tracker_path(args.model, args.threads, args.iters, args.warmup)
+        if args.onnx:
+            report['tracker_path'] += bench_tracker_path(args.onnx, args.threads, args.iters, args.warmup,
+                                                         backend='onnx')
+
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"저장: {args.out}")
@@ -0,0 +1,193 @@
+# bench_train.py
+# 합성 데이터로 학습 파이프라인 성능 측정 (MPIIGaze 원본 없이 실행 가능)
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import numpy as np
+import scipy.io as sio
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader
+from dataset import MPIIGazeDataset, batch_loader
+from model import GazeNet
+
+
+def make_synthetic_mpiigaze(root, num_subjects=15, days=3, samples_per_day=500, seed=0):
+    """
+    MPIIGaze Data/Normalized와 같은 구조의 합성 .mat 생성
+    root/pXX/dayYY.mat → data.right/left.image (N, 36, 60) uint8, .gaze (N, 3) float64
+    """
+    rng = np.random.default_rng(seed)
+    for s in range(num_subjects):
+        subject_path = os.path.join(root, f'p{s:02d}')
+        os.makedirs(subject_path, exist_ok=True)
+        for d in range(days):
+            eyes = {}
+            for eye_side in ['right', 'left']:
+                gaze = rng.normal(size=(samples_per_day, 3))
+                gaze /= np.linalg.norm(gaze, axis=1, keepdims=True)
+                eyes[eye_side] = {
+                    'image': rng.integers(0, 256, size=(samples_per_day, 36, 60), dtype=np.uint8),
+                    'gaze': gaze,
+                }
+            sio.savemat(os.path.join(subject_path, f'day{d+1:02d}.mat'), {'data': eyes})
+
+
+def _timeit(fn, repeat=1):
+    """fn을 repeat번 실행해서 가장 빠른 시간(초)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_dataset_build(data_root, cache_dir, ingest_workers):
+    """데이터셋 생성 시간: .mat 순차/병렬, 캐시 생성, 캐시 열기"""
+    results = {}
+    n = len(MPIIGazeDataset(data_root))
+    results['samples'] = n
+    results['mat_serial_s'] = _timeit(lambda: MPIIGazeDataset(data_root))
+    if ingest_workers > 1:
+        results['mat_parallel_s'] = _timeit(
+            lambda: MPIIGazeDataset(data_root, ingest_workers=ingest_workers))
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    results['cache_build_s'] = _timeit(
+        lambda: MPIIGazeDataset(data_root, cache_dir=cache_dir, ingest_workers=ingest_workers))
+    results['cache_open_s'] = _timeit(
+        lambda: MPIIGazeDataset(data_root, cache_dir=cache_dir), repeat=3)
+    return results
+
+
+def _loader_throughput(loader, max_batches):
+    """배치 max_batches개 읽는 동안의 samples/s"""
+    n = 0
+    start = time.perf_counter()
+    for i, (images, _) in enumerate(loader):
+        n += images.size(0)
+        if i + 1 >= max_batches:
+            break
+    return n / (time.perf_counter() - start)
+
+
+def bench_loader(data_root, cache_dir, batch_size, max_batches):
+    """DataLoader 처리량: 샘플 단위(__getitem__ + collate) vs 배치 단위(get_batch)"""
+    results = {}
+    in_memory = MPIIGazeDataset(data_root)
+    cached = MPIIGazeDataset(data_root, cache_dir=cache_dir)
+
+    results['per_sample_samples_per_s'] = _loader_throughput(
+        DataLoader(in_memory, batch_size=batch_size, shuffle=True), max_batches)
+    results['batched_samples_per_s'] = _loader_throughput(
+        batch_loader(in_memory, batch_size, shuffle=True), max_batches)
+    results['batched_mmap_samples_per_s'] = _loader_throughput(
+        batch_loader(cached, batch_size, shuffle=True), max_batches)
+    return results
+
+
+def bench_model(batch_size, steps):
+    """GazeNet forward+backward 처리량 (fp32 / channels_last / bf16 autocast)"""
+    results = {}
+    criterion = nn.MSELoss()
+
+    for name, channels_last, bf16 in [('fp32', False, False),
+                                      ('channels_last', True, False),
+                                      ('bf16', False, True)]:
+        torch.manual_seed(0)
+        model = GazeNet()
+        memory_format = torch.channels_last if channels_last else torch.contiguous_format
+        model = model.to(memory_format=memory_format)
+        optimizer = torch.optim.Adam(model.parameters())
+        images = torch.rand(batch_size, 1, 36, 60).to(memory_format=memory_format)
+        gazes = torch.randn(batch_size, 3)
+
+        def step():
+            with torch.autocast('cpu', dtype=torch.bfloat16, enabled=bf16):
+                outputs = model(images)
+            loss = criterion(outputs.float(), gazes)
+            optimizer.zero_grad(set_to_none=True)
+            loss.backward()
+            optimizer.step()
+
+        for _ in range(3):  # warmup
+            step()
+        elapsed = _timeit(lambda: [step() for _ in range(steps)])
+        results[f'train_{name}_samples_per_s'] = batch_size * steps / elapsed
+
+        model.eval()
+        with torch.no_grad():
+            elapsed = _timeit(lambda: [model(images) for _ in range(steps)])
+        results[f'forward_{name}_samples_per_s'] = batch_size * steps / elapsed
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='합성 MPIIGaze로 학습 파이프라인 벤치마크')
+    parser.add_argument('--root', default=None, help='합성 데이터 폴더 (기본: 임시 폴더)')
+    parser.add_argument('--subjects', type=int, default=15)
+    parser.add_argument('--days', type=int, default=3)
+    parser.add_argument('--samples-per-day', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--loader-batches', type=int, default=200)
+    parser.add_argument('--model-steps', type=int, default=50)
+    parser.add_argument('--ingest-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--out', default='bench_train.json')
+    args = parser.parse_args()
+
+    tmp_root = None
+    root = args.root
+    if root is None:
+        tmp_root = tempfile.mkdtemp(prefix='bench_mpiigaze_')
+        root = tmp_root
+    data_root = os.path.join(root, 'Normalized')
+    cache_dir = os.path.join(root, 'cache')
+
+    try:
+        print("합성 데이터 생성 중...")
+        make_synthetic_mpiigaze(data_root, args.subjects, args.days, args.samples_per_day)
+
+        report = {
+            'commit': _git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'torch': torch.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'torch_threads': torch.get_num_threads(),
+            'config': vars(args),
+        }
+
+        print("데이터셋 생성 시간 측정...")
+        report['dataset'] = bench_dataset_build(data_root, cache_dir, args.ingest_workers)
+        print("로더 처리량 측정...")
+        report['loader'] = bench_loader(data_root, cache_dir, args.batch_size, args.loader_batches)
+        print("모델 처리량 측정...")
+        report['model'] = bench_model(args.batch_size, args.model_steps)
+    finally:
+        if tmp_root is not None:
+            shutil.rmtree(tmp_root, ignore_errors=True)
+
+    print(json.dumps({k: report[k] for k in ['dataset', 'loader', 'model']}, indent=2))
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"저장: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+# calibration.py
+# gaze → 화면 좌표 캘리브레이션: 저장 / 불러오기 / 적용, 온라인 RLS 모델, 논블로킹 수집, 프로필
+import os
+import re
+import json
+import time
+from collections import deque
+import numpy as np
+from gaze_engine import EYES, eye_points
+
+CALIBRATION_VERSION = 1
+
+
+def save_calibration(path, model, screen_size, n_points=None, **extra):
+    """
+    RLSCalibration → JSON (임시 파일에 쓰고 교체 → 중간에 죽어도 기존 파일 유지)
+    transform_x / transform_y: 선형 부분 ([gx, gy, gz, 1] 계수), model: 전체 RLS 상태
+    """
+    data = {
+        'version': CALIBRATION_VERSION,
+        'transform_x': [float(v) for v in model.transform_x],
+        'transform_y': [float(v) for v in model.transform_y],
+        'screen_size': list(screen_size),  # (w, h)
+        'n_points': n_points,
+        'model': model.state_dict(),
+    }
+    data.update(extra)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_calibration(path):
+    """→ {'transform_x': (4,), 'transform_y': (4,), 'screen_size': (w, h), ...}"""
+    with open(path) as f:
+        calib = json.load(f)
+    if calib.get('version') != CALIBRATION_VERSION:
+        raise ValueError(f"지원하지 않는 캘리브레이션 버전: {calib.get('version')} ({path})")
+    calib['transform_x'] = np.asarray(calib['transform_x'], dtype=np.float64)
+    calib['transform_y'] = np.asarray(calib['transform_y'], dtype=np.float64)
+    calib['screen_size'] = tuple(calib['screen_size'])
+    return calib
+
+
+def apply_calibration(calib, gazes, heads=None):
+    """
+    (N, 3) gaze → (N, 2) 화면 좌표 (화면 범위로 자름, gaze가 NaN인 행은 NaN)
+    heads: (N, 3) head_features (머리 위치 특징을 쓰는 모델이면 필수, 얼굴이 없는 행은 NaN)
+    """
+    model = RLSCalibration.from_calibration(calib)
+    points = model.predict_many(gazes, heads)
+    screen_w, screen_h = calib['screen_size']
+    points[:, 0] = np.clip(points[:, 0], 0, screen_w)
+    points[:, 1] = np.clip(points[:, 1], 0, screen_h)
+    return points
+
+
+def calibration_error(model, gazes, points, heads=None):
+    """명시적 캘리브레이션 점에서의 평균 오차 (px)"""
+    if len(points) == 0:
+        return float('nan')
+    predicted = model.predict_many(gazes, heads)
+    return float(np.linalg.norm(predicted - np.asarray(points, dtype=np.float64), axis=1).mean())
+
+
+def head_features(landmarks, frame_shape):
+    """랜드마크 → 머리 위치 특징 (양쪽 눈 중심 x, y (프레임 중앙 기준, 정규화), 눈 간격 / 프레임 너비)"""
+    h, w = frame_shape[:2]
+    centers = [eye_points(landmarks, eye_indices, frame_shape).mean(axis=0) for _, eye_indices in EYES]
+    center = (centers[0] + centers[1]) / 2
+    return np.array([center[0] / w - 0.5, center[1] / h - 0.5, np.linalg.norm(centers[0] - centers[1]) / w])
+
+
+class RLSCalibration:
+    """
+    gaze (+ 머리 위치) → 화면 좌표, 재귀 최소자승(RLS)
+    - 샘플 하나마다 O(F²) 갱신 (F = 특징 수, 지금까지 모인 샘플 수와 무관), 전체 재계산 없음
+    - 특징: [gx, gy, gz, 1] (+ poly: gx², gy², gx·gy) (+ head: head_features 3개)
+    - update(..., forgetting<1): 오래된 샘플 영향을 줄여 사용 중 드리프트를 따라감
+      잊은 만큼은 anchor (명시적 캘리브레이션) 쪽으로 당겨짐 → 샘플이 없는 방향은 anchor 그대로,
+      P가 anchor의 공분산보다 커지지 않음 (한두 곳에 몰린 샘플로 windup 되지 않음)
+    - 처음 4개 계수 = 기존 transform_x / transform_y 형식
+    """
+
+    def __init__(self, poly=False, head=False, prior=1e6):
+        self.poly = poly
+        self.head = head
+        n_features = 4 + (3 if poly else 0) + (3 if head else 0)
+        self.theta = np.zeros((n_features, 2))
+        self.P = np.eye(n_features) * prior  # 계수 공분산 (정보 행렬의 역, prior가 클수록 약한 사전분포)
+        self.n_samples = 0
+        self.anchor_theta = None  # 명시적 캘리브레이션 계수
+        self.anchor_info = None   # 명시적 캘리브레이션 정보 행렬 (P⁻¹)
+
+    @property
+    def transform_x(self):
+        return self.theta[:4, 0].copy()
+
+    @property
+    def transform_y(self):
+        return self.theta[:4, 1].copy()
+
+    def features(self, gaze, head=None):
+        gx, gy, gz = gaze
+        values = [gx, gy, gz, 1.0]
+        if self.poly:
+            values += [gx * gx, gy * gy, gx * gy]
+        if self.head:
+            if head is None:
+                raise ValueError("머리 위치 특징을 쓰는 캘리브레이션에는 head_features가 필요합니다")
+            values += list(head)
+        return np.array(values, dtype=np.float64)
+
+    def predict(self, gaze, head=None):
+        """gaze (3,) → 화면 좌표 (2,)"""
+        return self.features(gaze, head) @ self.theta
+
+    def predict_many(self, gazes, heads=None):
+        gazes = np.asarray(gazes, dtype=np.float64)
+        if heads is None:
+            heads = [None] * len(gazes)
+        if len(gazes) == 0:
+            return np.zeros((0, 2))
+        return np.stack([self.features(gaze, head) for gaze, head in zip(gazes, heads)]) @ self.theta
+
+    def anchor(self):
+        """지금 모델을 명시적 캘리브레이션 기준으로 고정 (forgetting<1 갱신이 이쪽으로 당겨짐)"""
+        self.anchor_theta = self.theta.copy()
+        self.anchor_info = np.linalg.inv(self.P)
+
+    def update(self, gaze, point, head=None, forgetting=1.0):
+        """샘플 하나 반영 → 반영 전 예측 오차 (2,)"""
+        phi = self.features(gaze, head)
+        if forgetting < 1.0:
+            return self._update_anchored(phi, np.asarray(point, dtype=np.float64), forgetting)
+        P_phi = self.P @ phi
+        gain = P_phi / (forgetting + phi @ P_phi)
+        error = np.asarray(point, dtype=np.float64) - phi @ self.theta
+        self.theta += np.outer(gain, error)
+        self.P = (self.P - np.outer(gain, P_phi)) / forgetting
+        self.P = (self.P + self.P.T) / 2  # 수치 오차로 대칭이 깨지지 않게
+        self.n_samples += 1
+        return error
+
+    def _update_anchored(self, phi, point, forgetting):
+        """
+        정보 행렬 형태의 forgetting 갱신 (F가 10 이하라 역행렬도 가벼움)
+        info ← λ·info + (1-λ)·info_anchor + φφᵀ,  b ← λ·info·θ + (1-λ)·info_anchor·θ_anchor + φ·yᵀ
+        → info ≥ info_anchor 가 항상 유지됨
+        """
+        if self.anchor_theta is None:
+            self.anchor()
+        error = point - phi @ self.theta
+        info = np.linalg.inv(self.P)
+        new_info = forgetting * info + (1 - forgetting) * self.anchor_info + np.outer(phi, phi)
+        b = (forgetting * info @ self.theta + (1 - forgetting) * self.anchor_info @ self.anchor_theta
+             + np.outer(phi, point))
+        self.theta = np.linalg.solve(new_info, b)
+        self.P = np.linalg.inv(new_info)
+        self.P = (self.P + self.P.T) / 2
+        self.n_samples += 1
+        return error
+
+    def anchor_model(self):
+        """anchor (명시적 캘리브레이션) 만으로 된 모델"""
+        model = RLSCalibration(poly=self.poly, head=self.head)
+        model.theta = self.anchor_theta.copy()
+        model.P = np.linalg.inv(self.anchor_info)
+        model.anchor()
+        return model
+
+    def correct(self, gazes, points, heads=None):
+        """
+        빠른 보정 (3점 이상): 지금 모델의 예측 → 실제 점 으로 가는 화면 공간 affine을 최소자승으로 구해
+        theta에 합침 (특징 구성과 상관없이 bias 항으로 이동)
+        """
+        predicted = self.predict_many(gazes, heads)  # (N, 2)
+        P = np.asarray(points, dtype=np.float64)
+        A = np.hstack([predicted, np.ones((len(P), 1))])  # (N, 3)
+        coef_x, _, _, _ = np.linalg.lstsq(A, P[:, 0], rcond=None)
+        coef_y, _, _, _ = np.linalg.lstsq(A, P[:, 1], rcond=None)
+
+        bias = np.zeros(len(self.theta))
+        bias[3] = 1.0
+        self.theta = np.stack([
+            coef_x[0] * self.theta[:, 0] + coef_x[1] * self.theta[:, 1] + coef_x[2] * bias,
+            coef_y[0] * self.theta[:, 0] + coef_y[1] * self.theta[:, 1] + coef_y[2] * bias,
+        ], axis=1)
+        self.anchor()  # 빠른 보정도 명시적 캘리브레이션
+
+    def state_dict(self):
+        state = {
+            'poly': self.poly,
+            'head': self.head,
+            'theta': self.theta.tolist(),
+            'P': self.P.tolist(),
+            'n_samples': self.n_samples,
+        }
+        if self.anchor_theta is not None:
+            state['anchor_theta'] = self.anchor_theta.tolist()
+            state['anchor_info'] = self.anchor_info.tolist()
+        return state
+
+    @classmethod
+    def from_calibration(cls, calib, prior=1.0):
+        """load_calibration 결과 → 모델 (RLS 상태가 없는 선형 파일은 transform_x/y + prior 공분산)"""
+        state = calib.get('model')
+        if state is None:
+            model = cls(prior=prior)
+            model.theta = np.stack([calib['transform_x'], calib['transform_y']], axis=1).astype(np.float64)
+            model.anchor()
+            return model
+        model = cls(poly=state['poly'], head=state['head'])
+        model.theta = np.asarray(state['theta'], dtype=np.float64)
+        model.P = np.asarray(state['P'], dtype=np.float64)
+        model.n_samples = state.get('n_samples', 0)
+        if 'anchor_theta' in state:
+            model.anchor_theta = np.asarray(state['anchor_theta'], dtype=np.float64)
+            model.anchor_info = np.asarray(state['anchor_info'], dtype=np.float64)
+        else:
+            model.anchor()
+        return model
+
+
+def calibration_grid(screen_w, screen_h, rows=5, cols=5, margin=80):
+    """화면 위 rows x cols 캘리브레이션 점 (행 순서)"""
+    points = []
+    for r in range(rows):
+        for c in range(cols):
+            px = margin + c * (screen_w - 2 * margin) // (cols - 1)
+            py = margin + r * (screen_h - 2 * margin) // (rows - 1)
+            points.append((px, py))
+    return points
+
+
+def trimmed_mean(samples, lower=10, upper=90):
+    """
+    (N, 3) 샘플 → 축별 상하위 이상치를 뺀 평균 (3,), 표준오차 (3,)
+    (남는 값이 없으면 그 축은 전체 평균)
+    """
+    samples = np.asarray(samples)
+    mean, stderr = np.empty(samples.shape[1]), np.empty(samples.shape[1])
+    for axis in range(samples.shape[1]):
+        values = samples[:, axis]
+        lo, hi = np.percentile(values, [lower, upper])
+        filtered = values[(values >= lo) & (values <= hi)]
+        if len(filtered) == 0:
+            filtered = values
+        mean[axis] = filtered.mean()
+        stderr[axis] = filtered.std() / np.sqrt(len(filtered))
+    return mean, stderr
+
+
+class CalibrationSession:
+    """
+    트래킹 루프 안에서 도는 캘리브레이션 상태 기계 (프레임마다 update 호출, 블로킹 없음)
+    - 점마다 settle(settle_s 동안 시선 이동 대기) → collect(샘플 수집)
+    - collect: min_samples 이상 모이고 trimmed mean 표준오차가 모든 축에서 tol 이하면 바로 다음 점
+      (머리 위치 특징도 gaze와 같은 프레임에서 모아 같은 방식으로 평균)
+      max_samples개 또는 timeout_s가 지나면 그때까지의 값으로 확정 (min_samples 미만이면 실패)
+    """
+
+    def __init__(self, points, settle_s=0.5, min_samples=10, max_samples=30, tol=0.004,
+                 timeout_s=3.0, now=0.0):
+        self.points = list(points)
+        self.settle_s = settle_s
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.tol = tol
+        self.timeout_s = timeout_s
+
+        self.index = 0
+        self.calib_gazes = []
+        self.calib_points = []
+        self.calib_heads = []  # 점별 머리 위치 특징 (calib_gazes와 같은 길이, 없으면 None)
+        self.failed = []
+        self._begin_point(now)
+
+    @property
+    def done(self):
+        return self.index >= len(self.points)
+
+    @property
+    def current_point(self):
+        return None if self.done else self.points[self.index]
+
+    @property
+    def collecting(self):
+        return self.state == 'collect'
+
+    def _begin_point(self, now):
+        self.state = 'settle' if not self.done else 'done'
+        self._state_start = now
+        self._samples = []
+        self._heads = []
+
+    def _finish_point(self, now):
+        point = self.points[self.index]
+        if len(self._samples) >= self.min_samples:
+            gaze, _ = trimmed_mean(self._samples)
+            self.calib_gazes.append(gaze)
+            self.calib_points.append(list(point))
+            self.calib_heads.append(trimmed_mean(self._heads)[0] if self._heads else None)
+        else:
+            self.failed.append(point)
+        self.index += 1
+        self._begin_point(now)
+
+    def update(self, gaze, now, head=None):
+        """프레임 하나 (gaze가 None이면 얼굴/눈 없음, head: 같은 프레임의 head_features) → 상태 진행"""
+        if self.done:
+            return
+        elapsed = now - self._state_start
+
+        if self.state == 'settle':
+            if elapsed >= self.settle_s:
+                self.state = 'collect'
+                self._state_start = now
+            return
+
+        if gaze is not None:
+            self._samples.append(gaze)
+            if head is not None:
+                self._heads.append(head)
+        n = len(self._samples)
+        if n >= self.min_samples:
+            _, stderr = trimmed_mean(self._samples)
+            if stderr.max() <= self.tol:
+                self._finish_point(now)
+                return
+        if n >= self.max_samples or elapsed >= self.timeout_s:
+            self._finish_point(now)
+
+    def progress(self):
+        """현재 점 수집 진행률 0~1 (표시용)"""
+        return min(1.0, len(self._samples) / self.max_samples) if self.collecting else 0.0
+
+
+def quick_points(screen_w, screen_h, n=5):
+    """빠른 보정용 점: 가운데 + 네 모서리 쪽 (n=3이면 가운데 + 위 양쪽)"""
+    points = [(0.5, 0.5), (0.2, 0.2), (0.8, 0.2), (0.2, 0.8), (0.8, 0.8)][:n]
+    return [(int(screen_w * fx), int(screen_h * fy)) for fx, fy in points]
+
+
+class ProfileStore:
+    """
+    사용자 / 카메라 / 화면 해상도별 캘리브레이션 프로필 (root/<user>__cam<camera>__<w>x<h>.json)
+    - 같은 사람이라도 카메라 위치나 화면이 바뀌면 변환이 달라지므로 셋을 모두 키로 씀
+    """
+
+    def __init__(self, root='calibration_profiles'):
+        self.root = root
+
+    def path(self, user_id, camera, screen_size):
+        safe_user = re.sub(r'[^A-Za-z0-9_.-]', '_', str(user_id))
+        safe_camera = re.sub(r'[^A-Za-z0-9_.-]', '_', str(camera))
+        w, h = screen_size
+        return os.path.join(self.root, f'{safe_user}__cam{safe_camera}__{w}x{h}.json')
+
+    def load(self, user_id, camera, screen_size):
+        """프로필 (없으면 None)"""
+        path = self.path(user_id, camera, screen_size)
+        if not os.path.exists(path):
+            return None
+        return load_calibration(path)
+
+    def save(self, user_id, camera, screen_size, model, n_points=None, method='full', **extra):
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(user_id, camera, screen_size)
+        save_calibration(path, model, screen_size, n_points=n_points,
+                         user=str(user_id), camera=str(camera), method=method, updated=time.time(), **extra)
+        return path
+
+
+class FixationDetector:
+    """
+    화면 좌표 흐름에서 고정 시선 검출 (I-DT)
+    - 최근 min_duration 초 동안 점들의 흩어짐(가로 폭 + 세로 폭)이 max_dispersion px 이하면 고정
+    - 고정 한 번에 한 번만 (화면 중심, gaze 평균, 머리 특징 평균) 을 돌려줌
+    """
+
+    def __init__(self, max_dispersion=80.0, min_duration=0.3):
+        self.max_dispersion = max_dispersion
+        self.min_duration = min_duration
+        self._window = deque()  # (t, point, gaze, head)
+        self._emitted = False
+
+    def _dispersion(self):
+        points = np.array([point for _, point, _, _ in self._window])
+        return float(np.ptp(points[:, 0]) + np.ptp(points[:, 1]))
+
+    def update(self, t, point, gaze, head=None):
+        self._window.append((t, point, gaze, head))
+        if self._dispersion() > self.max_dispersion:
+            # 고정이 깨짐 → 흩어짐이 다시 작아질 때까지 오래된 점 제거
+            self._emitted = False
+            while len(self._window) > 1 and self._dispersion() > self.max_dispersion:
+                self._window.popleft()
+
+        if self._emitted or t - self._window[0][0] < self.min_duration:
+            return None
+        self._emitted = True
+        center = np.mean([point for _, point, _, _ in self._window], axis=0)
+        gaze_mean = np.mean([g for _, _, g, _ in self._window], axis=0)
+        heads = [h for _, _, _, h in self._window if h is not None]
+        head_mean = np.mean(heads, axis=0) if heads else None
+        return center, gaze_mean, head_mean
@@ -0,0 +1,148 @@
+# checkpoint.py
+# 학습 재개용 전체 체크포인트 (백그라운드 스레드 저장)
+import os
+import random
+import threading
+import numpy as np
+import torch
+
+
+def cpu_copy(obj):
+    """state_dict 안의 텐서를 CPU로 복사 (학습이 계속 돌아도 스냅샷이 안 바뀌게)"""
+    if torch.is_tensor(obj):
+        return obj.detach().to('cpu', copy=True)
+    if isinstance(obj, dict):
+        return {k: cpu_copy(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [cpu_copy(v) for v in obj]
+    if isinstance(obj, tuple):
+        return tuple(cpu_copy(v) for v in obj)
+    return obj
+
+
+def get_rng_states():
+    states = {
+        'torch': torch.get_rng_state(),
+        'numpy': np.random.get_state(),
+        'python': random.getstate(),
+    }
+    if torch.cuda.is_available():
+        states['cuda'] = torch.cuda.get_rng_state_all()
+    return states
+
+
+def set_rng_states(states):
+    torch.set_rng_state(states['torch'])
+    np.random.set_state(states['numpy'])
+    random.setstate(states['python'])
+    if 'cuda' in states and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(states['cuda'])
+
+
+def capture_state(model, optimizer, scheduler, **extra):
+    """
+    현재 학습 상태 스냅샷 (호출한 스레드에서 CPU로 복사까지 끝냄)
+    extra: epoch, step, history, rng 등 같이 저장할 값
+    """
+    state = {
+        'model': cpu_copy(model.state_dict()),
+        'optimizer': cpu_copy(optimizer.state_dict()),
+        'scheduler': cpu_copy(scheduler.state_dict()),
+    }
+    state.update(cpu_copy(extra))
+    return state
+
+
+def load_checkpoint(path, device='cpu'):
+    """체크포인트 파일 로드 (RNG 상태 등 numpy 객체가 있어서 weights_only=False)"""
+    return torch.load(path, map_location=device, weights_only=False)
+
+
+def restore_state(state, model, optimizer, scheduler):
+    """load_checkpoint 결과로 model/optimizer/scheduler 복원"""
+    model.load_state_dict(state['model'])
+    optimizer.load_state_dict(state['optimizer'])
+    scheduler.load_state_dict(state['scheduler'])
+
+
+class AsyncCheckpointer:
+    """
+    체크포인트를 백그라운드 스레드에서 저장
+    - 임시 파일에 쓰고 os.replace로 교체 (저장 중에 죽어도 이전 체크포인트 유지)
+    - 저장이 밀리면 가장 최신 스냅샷만 남김 (학습 루프는 기다리지 않음)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._pending = None
+        self._closed = False
+        self._error = None
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def save(self, state):
+        """capture_state 결과를 저장 대기열에 넣음 (즉시 반환)"""
+        with self._cond:
+            if self._error is not None:
+                raise self._error
+            self._pending = state
+            self._cond.notify()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                state, self._pending = self._pending, None
+
+            try:
+                self._write(state)
+            except Exception as e:  # 다음 save/close에서 학습 스레드로 전달
+                with self._cond:
+                    self._error = e
+
+    def _write(self, state):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            torch.save(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        """남은 스냅샷까지 저장하고 스레드 종료"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+
+class EarlyStopping:
+    """val 지표가 patience epoch 동안 좋아지지 않으면 중단"""
+
+    def __init__(self, patience=5, min_delta=0.0):
+        self.patience = patience
+        self.min_delta = min_delta
+        self.best = float('inf')
+        self.bad_epochs = 0
+
+    def step(self, value):
+        """True면 학습 중단"""
+        if value < self.best - self.min_delta:
+            self.best = value
+            self.bad_epochs = 0
+        else:
+            self.bad_epochs += 1
+        return self.patience > 0 and self.bad_epochs >= self.patience
+
+    def state_dict(self):
+        return {'best': self.best, 'bad_epochs': self.bad_epochs}
+
+    def load_state_dict(self, state):
+        self.best = state['best']
+        self.bad_epochs = state['bad_epochs']
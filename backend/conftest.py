@@ -0,0 +1,36 @@
+# conftest.py
+# 테스트 공용 fixture: 작은 가짜 MPIIGaze (Data/Normalized/pXX/dayNN.mat)
+import os
+import numpy as np
+import pytest
+import scipy.io as sio
+
+# test_ 이름이지만 실제 데이터 / 모델 파일을 읽는 확인용 스크립트 (pytest 수집 제외)
+collect_ignore = ['test_collectmodel.py', 'test_pickdata.py']
+
+
+def write_mat(path, n, seed=0):
+    """dayNN.mat 하나: 눈마다 image (n, 36, 60) uint8, gaze (n, 3) (오른쪽 눈 gaze는 +, 왼쪽은 -)"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for sign, eye_side in [(1, 'right'), (-1, 'left')]:
+        gazes = rng.normal(0, 0.2, (n, 3))
+        gazes[:, 2] = sign * (1 + np.arange(n))  # 샘플 순서를 gaze z로 확인할 수 있게
+        data[eye_side] = {'image': rng.integers(0, 256, (n, 36, 60), dtype=np.uint8), 'gaze': gazes}
+    sio.savemat(path, {'data': data})
+
+
+@pytest.fixture
+def mpiigaze_root(tmp_path):
+    """{피험자: [day별 샘플 수]} → 가짜 Data/Normalized 폴더 경로"""
+
+    def make(subjects=None):
+        subjects = subjects or {'p00': [8, 5], 'p01': [6]}
+        root = tmp_path / 'Normalized'
+        for s_idx, (subject_id, counts) in enumerate(subjects.items()):
+            os.makedirs(root / subject_id, exist_ok=True)
+            for day, n in enumerate(counts):
+                write_mat(str(root / subject_id / f'day{day + 1:02d}.mat'), n, seed=s_idx * 100 + day)
+        return str(root)
+
+    return make
@@ -1,82 +1,330 @@
-
 # dataset.py
 import os
+import json
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
 import scipy.io as sio
 import torch
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import Dataset, IterableDataset, DataLoader, Sampler, Subset, get_worker_info
+
+# 캐시 포맷 버전 (레이아웃이 바뀌면 올려서 기존 캐시 무효화)
+CACHE_VERSION = 1
+
+
+def _eyes_to_load(eye):
+    """eye 옵션 → 읽을 눈 목록 (right → left 순서)"""
+    eyes = []
+    if eye in ['right', 'both']:
+        eyes.append('right')
+    if eye in ['left', 'both']:
+        eyes.append('left')
+    return eyes
+
+
+def _mat_files(subject_path):
+    """피험자 폴더의 day .mat 파일 목록 (정렬해서 순서 고정)"""
+    return sorted(f for f in os.listdir(subject_path) if f.endswith('.mat'))
+
+
+def _file_signature(path):
+    """캐시 무효화 판단용 (mtime, size)"""
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _read_mat(mat_path, eye):
+    """단일 .mat 파일 → [(images, gazes), ...] (눈 별로)"""
+    mat_data = sio.loadmat(mat_path)
+    data = mat_data['data']
+
+    parts = []
+    for eye_side in _eyes_to_load(eye):
+        eye_data = data[eye_side][0, 0]
+        images = eye_data['image'][0, 0]  # (N, 36, 60)
+        gazes = eye_data['gaze'][0, 0]    # (N, 3)
+        parts.append((images, gazes))
+    return parts
+
+
+def _parse_mat_to_npy(mat_path, eye, out_prefix):
+    """(worker 프로세스) .mat 파싱 → out_prefix_images/gazes.npy 저장, 샘플 수 반환"""
+    parts = _read_mat(mat_path, eye)
+    images = np.concatenate([img for img, _ in parts], axis=0).astype(np.uint8, copy=False)
+    gazes = np.concatenate([gz for _, gz in parts], axis=0).astype(np.float32, copy=False)
+    np.save(out_prefix + '_images.npy', images)
+    np.save(out_prefix + '_gazes.npy', gazes)
+    return len(images)
+
+
+def _ingest_serial(mat_paths, eye):
+    """파일 순서대로 한 코어에서 로드"""
+    images, gazes, counts = [], [], []
+    for mat_path in mat_paths:
+        count = 0
+        for img, gz in _read_mat(mat_path, eye):
+            images.append(img)
+            gazes.append(gz)
+            count += len(img)
+        counts.append(count)
+
+    images = np.concatenate(images, axis=0).astype(np.uint8, copy=False)
+    gazes = np.concatenate(gazes, axis=0).astype(np.float32, copy=False)
+    return images, gazes, counts
+
+
+def _ingest_parallel(mat_paths, eye, num_workers):
+    """
+    프로세스 풀로 .mat 병렬 파싱
+    - worker는 파일별 결과를 임시 .npy로 저장하고 샘플 수만 반환
+    - 전체 크기로 최종 배열을 미리 할당한 뒤 파일 순서대로 채움
+      (파일별 배열 + 합친 배열을 동시에 들고 있지 않음)
+    """
+    with tempfile.TemporaryDirectory(prefix='mpiigaze_') as tmp_dir:
+        prefixes = [os.path.join(tmp_dir, f'{i:05d}') for i in range(len(mat_paths))]
+
+        with ProcessPoolExecutor(max_workers=num_workers) as pool:
+            futures = [pool.submit(_parse_mat_to_npy, mat_path, eye, prefix)
+                       for mat_path, prefix in zip(mat_paths, prefixes)]
+            for done, _ in enumerate(as_completed(futures), 1):
+                print(f"\r.mat 로딩: {done}/{len(futures)}", end='', flush=True)
+            print()
+            # 제출 순서대로 결과 수집 → 샘플 순서는 항상 동일
+            counts = [future.result() for future in futures]
+
+        image_shape = np.load(prefixes[0] + '_images.npy', mmap_mode='r').shape[1:]
+        images = np.empty((sum(counts),) + image_shape, dtype=np.uint8)
+        gazes = np.empty((sum(counts), 3), dtype=np.float32)
+
+        offset = 0
+        for prefix, count in zip(prefixes, counts):
+            images[offset:offset + count] = np.load(prefix + '_images.npy', mmap_mode='r')
+            gazes[offset:offset + count] = np.load(prefix + '_gazes.npy', mmap_mode='r')
+            os.remove(prefix + '_images.npy')
+            os.remove(prefix + '_gazes.npy')
+            offset += count
+
+    return images, gazes, counts
+
+
+def _ingest(mat_paths, eye, num_workers=0):
+    """
+    .mat 파일 목록 → (images uint8, gazes float32, 파일별 샘플 수)
+    num_workers > 1이면 프로세스 풀 사용
+    """
+    if num_workers > 1 and len(mat_paths) > 1:
+        return _ingest_parallel(mat_paths, eye, num_workers)
+    return _ingest_serial(mat_paths, eye)
+
+
+def _to_batch_tensors(images, gazes):
+    """uint8 (B, 36, 60) + (B, 3) → float32 (B, 1, 36, 60) 0~1 텐서 + float32 (B, 3) 텐서"""
+    image_batch = torch.from_numpy(np.ascontiguousarray(images)).unsqueeze(1).float().div_(255.0)
+    gaze_batch = torch.from_numpy(np.asarray(gazes, dtype=np.float32))
+    return image_batch, gaze_batch
+
+
+def _save_npy_atomic(path, array):
+    """임시 파일에 쓰고 rename (중간에 죽어도 깨진 캐시가 남지 않게)"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _load_index(index_path):
+    if not os.path.exists(index_path):
+        return {'version': CACHE_VERSION, 'subjects': {}}
+    with open(index_path, 'r') as f:
+        index = json.load(f)
+    if index.get('version') != CACHE_VERSION:
+        return {'version': CACHE_VERSION, 'subjects': {}}
+    return index
+
+
+def build_cache(data_root, cache_dir, subject_ids=None, eye='both', num_workers=0):
+    """
+    .mat → 메모리 맵용 .npy 캐시 변환 (피험자 단위 shard)
+    - cache_dir/<eye>/pXX_images.npy (uint8, (N, 36, 60))
+    - cache_dir/<eye>/pXX_gazes.npy  (float32, (N, 3))
+    - cache_dir/<eye>/index.json     (피험자별 샘플 수 + 원본 파일 mtime/size)
+    원본 .mat의 mtime이나 size가 바뀐 피험자만 다시 변환한다.
+    num_workers > 1이면 변환할 파일들을 프로세스 풀로 병렬 파싱한다.
+
+    Returns:
+        index dict (index['subjects'][subject_id] = {'files': ..., 'count': N})
+    """
+    if subject_ids is None:
+        subject_ids = [f'p{i:02d}' for i in range(15)]  # p00 ~ p14
+
+    eye_dir = os.path.join(cache_dir, eye)
+    os.makedirs(eye_dir, exist_ok=True)
+    index_path = os.path.join(eye_dir, 'index.json')
+    index = _load_index(index_path)
+
+    # 다시 변환해야 하는 피험자 찾기
+    stale = {}
+    for subject_id in subject_ids:
+        subject_path = os.path.join(data_root, subject_id)
+        cached = index['subjects'].get(subject_id)
+
+        if not os.path.exists(subject_path):
+            # 원본이 없으면 (캐시만 복사해 온 경우) 있는 캐시를 그대로 사용
+            continue
+
+        files = {f: _file_signature(os.path.join(subject_path, f))
+                 for f in _mat_files(subject_path)}
+        if cached is not None and cached['files'] == files:
+            continue
+        stale[subject_id] = files
+
+    if not stale:
+        return index
+
+    print(f"캐시 생성 중: {', '.join(stale)}")
+    mat_paths = [os.path.join(data_root, subject_id, mat_file)
+                 for subject_id, files in stale.items() for mat_file in files]
+    file_counts = []
+    if mat_paths:
+        images, gazes, file_counts = _ingest(mat_paths, eye, num_workers)
+
+    # 파일별 샘플 수로 피험자 단위 shard 잘라서 저장
+    offset = 0
+    file_pos = 0
+    for subject_id, files in stale.items():
+        count = sum(file_counts[file_pos:file_pos + len(files)])
+        file_pos += len(files)
+        if count > 0:
+            _save_npy_atomic(os.path.join(eye_dir, f'{subject_id}_images.npy'),
+                             images[offset:offset + count])
+            _save_npy_atomic(os.path.join(eye_dir, f'{subject_id}_gazes.npy'),
+                             gazes[offset:offset + count])
+        offset += count
+        index['subjects'][subject_id] = {'files': files, 'count': count}
+
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp_path, index_path)
+
+    return index
+
 
 class MPIIGazeDataset(Dataset):
     """
     MPIIGaze 데이터셋 로더
     - 여러 피험자(p00~p14)의 여러 day 파일을 합쳐서 로드
     - 왼쪽/오른쪽 눈 데이터 모두 사용
+    - cache_dir 지정 시 .npy 캐시를 메모리 맵으로 열어서 사용 (RAM에 올리지 않음)
     """
     
-    def __init__(self, data_root, subject_ids=None, eye='both', transform=None):
+    def __init__(self, data_root, subject_ids=None, eye='both', transform=None,
+                 cache_dir=None, ingest_workers=0):
         """
         Args:
             data_root: Data/Normalized 폴더 경로
             subject_ids: 사용할 피험자 리스트 (예: ['p00', 'p01']). None이면 전체
             eye: 'left', 'right', 'both' 중 선택
             transform: 이미지 전처리 함수
+            cache_dir: .npy 캐시 폴더. None이면 매번 .mat에서 RAM으로 로드
+            ingest_workers: .mat 병렬 파싱 프로세스 수 (0/1이면 순차 로드)
         """
         self.data_root = data_root
         self.transform = transform
         self.eye = eye
-        
-        # 데이터 저장할 리스트
-        self.images = []
-        self.gazes = []
+        self.cache_dir = cache_dir
+        self.ingest_workers = ingest_workers
         
         # 피험자 폴더 탐색
         if subject_ids is None:
             subject_ids = [f'p{i:02d}' for i in range(15)]  # p00 ~ p14
         
+        if cache_dir is not None:
+            self._init_from_cache(subject_ids)
+        else:
+            self._init_from_mat(subject_ids)
+
+        print(f"총 샘플 수: {len(self)}")
+
+    def _init_from_mat(self, subject_ids):
+        # 각 피험자의 day .mat 파일 목록
+        mat_paths = []
         for subject_id in subject_ids:
-            subject_path = os.path.join(data_root, subject_id)
+            subject_path = os.path.join(self.data_root, subject_id)
             if not os.path.exists(subject_path):
                 continue
+            for mat_file in _mat_files(subject_path):
+                mat_paths.append(os.path.join(subject_path, mat_file))
                 
-            # 각 day .mat 파일 로드
-            for mat_file in os.listdir(subject_path):
-                if not mat_file.endswith('.mat'):
-                    continue
+        # numpy 배열로 로드 (이미지는 uint8 그대로 보관: float32 대비 RAM 1/4)
+        self.images, self.gazes, _ = _ingest(mat_paths, self.eye, self.ingest_workers)
                     
-                mat_path = os.path.join(subject_path, mat_file)
-                self._load_mat_file(mat_path)
+        self.subject_ids = list(subject_ids)
+        self._shard_paths = None
+        self._shards = [(self.images, self.gazes)]
+        self._offsets = np.array([0, len(self.images)])
         
-        # numpy 배열로 변환
-        self.images = np.concatenate(self.images, axis=0)
-        self.gazes = np.concatenate(self.gazes, axis=0)
+    def _init_from_cache(self, subject_ids):
+        index = build_cache(self.data_root, self.cache_dir, subject_ids, self.eye,
+                            num_workers=self.ingest_workers)
+        eye_dir = os.path.join(self.cache_dir, self.eye)
         
-        print(f"총 샘플 수: {len(self.images)}")
+        # 샘플이 있는 피험자만 shard로 등록 (파일은 아직 열지 않음)
+        self.subject_ids = []
+        self._shard_paths = []
+        counts = []
+        for subject_id in subject_ids:
+            entry = index['subjects'].get(subject_id)
+            if entry is None or entry['count'] == 0:
+                continue
+            self.subject_ids.append(subject_id)
+            self._shard_paths.append((
+                os.path.join(eye_dir, f'{subject_id}_images.npy'),
+                os.path.join(eye_dir, f'{subject_id}_gazes.npy'),
+            ))
+            counts.append(entry['count'])
     
-    def _load_mat_file(self, mat_path):
-        """단일 .mat 파일에서 데이터 추출"""
-        mat_data = sio.loadmat(mat_path)
-        data = mat_data['data']
+        self._shards = None
+        self._offsets = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)])
         
-        eyes_to_load = []
-        if self.eye in ['right', 'both']:
-            eyes_to_load.append('right')
-        if self.eye in ['left', 'both']:
-            eyes_to_load.append('left')
+    def _open_shards(self):
+        """캐시 shard를 메모리 맵으로 연다 (프로세스마다 처음 접근할 때 한 번)"""
+        if self._shards is None:
+            self._shards = [(np.load(img_path, mmap_mode='r'), np.load(gaze_path, mmap_mode='r'))
+                            for img_path, gaze_path in self._shard_paths]
+        return self._shards
         
-        for eye_side in eyes_to_load:
-            eye_data = data[eye_side][0, 0]
-            images = eye_data['image'][0, 0]  # (N, 36, 60)
-            gazes = eye_data['gaze'][0, 0]    # (N, 3)
+    def __getstate__(self):
+        # DataLoader worker로 넘길 때 memmap 내용이 통째로 pickle되지 않게 경로만 넘김
+        state = self.__dict__.copy()
+        if self._shard_paths is not None:
+            state['_shards'] = None
+        return state
             
-            self.images.append(images)
-            self.gazes.append(gazes)
+    def subject_range(self, subject_id):
+        """피험자의 (start, end) 인덱스 범위"""
+        if self._shard_paths is None:
+            raise ValueError("subject_range는 cache_dir 모드에서만 사용 가능")
+        i = self.subject_ids.index(subject_id)
+        return int(self._offsets[i]), int(self._offsets[i + 1])
     
     def __len__(self):
-        return len(self.images)
+        return int(self._offsets[-1])
     
     def __getitem__(self, idx):
-        image = self.images[idx].astype(np.float32)
-        gaze = self.gazes[idx].astype(np.float32)
+        # 음수 인덱스 / 범위 검사 (searchsorted는 음수를 첫 shard 앞으로 보냄)
+        n = len(self)
+        if not -n <= idx < n:
+            raise IndexError(f"인덱스 범위 초과: {idx} (len={n})")
+        if idx < 0:
+            idx += n
+        shards = self._open_shards()
+        shard = int(np.searchsorted(self._offsets, idx, side='right')) - 1
+        images, gazes = shards[shard]
+        local_idx = idx - self._offsets[shard]
+
+        image = images[local_idx].astype(np.float32)
+        gaze = gazes[local_idx].astype(np.float32)
         
         # 정규화: 0~255 → 0~1
         image = image / 255.0
@@ -89,6 +337,221 @@ class MPIIGazeDataset(Dataset):
         
         return torch.from_numpy(image), torch.from_numpy(gaze)
 
+    def get_batch(self, indices):
+        """
+        인덱스 배치를 한 번에 가져와서 벡터 연산으로 정규화
+        Returns:
+            images: (B, 1, 36, 60) float32 텐서 (0~1)
+            gazes: (B, 3) float32 텐서
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        shards = self._open_shards()
+
+        if len(shards) == 1:
+            images = shards[0][0][indices]
+            gazes = shards[0][1][indices]
+        else:
+            # 여러 shard에 걸친 배치: shard 별로 모아서 채움
+            shard_ids = np.searchsorted(self._offsets, indices, side='right') - 1
+            images = np.empty((len(indices),) + shards[0][0].shape[1:], dtype=np.uint8)
+            gazes = np.empty((len(indices), 3), dtype=np.float32)
+            for shard in np.unique(shard_ids):
+                mask = shard_ids == shard
+                local_idx = indices[mask] - self._offsets[shard]
+                images[mask] = shards[shard][0][local_idx]
+                gazes[mask] = shards[shard][1][local_idx]
+
+        return _to_batch_tensors(images, gazes)
+
+
+def _unwrap_subset(dataset):
+    """Subset(random_split 결과 포함) → (원본 데이터셋, 원본 인덱스 배열)"""
+    indices = np.arange(len(dataset), dtype=np.int64)
+    while isinstance(dataset, Subset):
+        indices = np.asarray(dataset.indices, dtype=np.int64)[indices]
+        dataset = dataset.dataset
+    return dataset, indices
+
+
+class IndexBatchSampler(Sampler):
+    """
+    인덱스 배열을 배치 단위(numpy 배열)로 잘라서 넘겨주는 sampler
+    - start_batch: 다음 iteration 한 번만 앞 배치들을 건너뜀 (중간 재개, 셔플 순서는 그대로)
+      → 건너뛴 배치는 아예 읽지 않음
+    """
+
+    def __init__(self, indices, batch_size, shuffle=False, drop_last=False, generator=None, start_batch=0):
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.generator = generator
+        self.start_batch = start_batch
+
+    def __iter__(self):
+        if self.shuffle:
+            perm = torch.randperm(len(self.indices), generator=self.generator).numpy()
+            indices = self.indices[perm]
+        else:
+            indices = self.indices
+
+        n = len(indices)
+        end = n - n % self.batch_size if self.drop_last else n
+        start_batch, self.start_batch = self.start_batch, 0
+        for start in range(start_batch * self.batch_size, end, self.batch_size):
+            yield indices[start:start + self.batch_size]
+
+    def __len__(self):
+        if self.drop_last:
+            n_batches = len(self.indices) // self.batch_size
+        else:
+            n_batches = (len(self.indices) + self.batch_size - 1) // self.batch_size
+        return max(n_batches - self.start_batch, 0)
+
+
+class _BatchFetcher(Dataset):
+    """DataLoader(batch_size=None)용: 인덱스 배치 → get_batch 결과"""
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __getitem__(self, batch_indices):
+        return self.dataset.get_batch(batch_indices)
+
+
+def batch_loader(dataset, batch_size, shuffle=False, drop_last=False, generator=None, start_batch=0,
+                 **loader_kwargs):
+    """
+    배치 단위 로더 (샘플 단위 __getitem__ + collate 대신 get_batch 사용)
+    - dataset: MPIIGazeDataset 또는 그 Subset (random_split 결과)
+    - start_batch: 첫 epoch에서 건너뛸 배치 수 (loader.sampler.start_batch로 나중에 지정해도 됨)
+    - loader_kwargs: num_workers, pin_memory 등 DataLoader 옵션
+    """
+    base, indices = _unwrap_subset(dataset)
+    if base.transform is not None:
+        raise ValueError("batch_loader는 transform이 없는 데이터셋만 지원")
+
+    sampler = IndexBatchSampler(indices, batch_size, shuffle=shuffle,
+                                drop_last=drop_last, generator=generator, start_batch=start_batch)
+    return DataLoader(_BatchFetcher(base), sampler=sampler, batch_size=None, generator=generator, **loader_kwargs)
+
+
+class MPIIGazeStream(IterableDataset):
+    """
+    MPIIGaze 스트리밍 로더 (subject/day shard 단위)
+    - 한 번에 .mat 파일 하나 + shuffle buffer만 메모리에 올림
+      → 피험자 수와 상관없이 메모리 사용량 일정
+    - DataLoader worker 별로 shard를 나눠서 읽음
+    - batch_size 지정 시 (B, 1, 36, 60) 배치 단위로 내보냄 (DataLoader는 batch_size=None)
+    """
+
+    def __init__(self, data_root, subject_ids=None, eye='both', transform=None,
+                 shuffle=True, shuffle_buffer=4096, batch_size=None, drop_last=False, seed=0):
+        """
+        Args:
+            data_root: Data/Normalized 폴더 경로
+            subject_ids: 사용할 피험자 리스트. None이면 전체
+            eye: 'left', 'right', 'both' 중 선택
+            transform: 이미지 전처리 함수 (샘플 단위 모드에서만)
+            shuffle: shard 순서 + buffer 내부 섞기
+            shuffle_buffer: 섞기용으로 들고 있는 최대 샘플 수
+            batch_size: None이면 샘플 단위, 숫자면 배치 단위로 내보냄
+            drop_last: 배치 단위일 때 마지막 자투리 배치 버리기
+            seed: 섞기 시드 (epoch와 worker id를 더해서 사용)
+        """
+        if transform is not None and batch_size is not None:
+            raise ValueError("transform은 샘플 단위 모드(batch_size=None)에서만 지원")
+
+        self.eye = eye
+        self.transform = transform
+        self.shuffle = shuffle
+        self.shuffle_buffer = shuffle_buffer if shuffle else 0
+        self.batch_size = batch_size
+        self.drop_last = drop_last
+        self.seed = seed
+        self.epoch = 0
+
+        if subject_ids is None:
+            subject_ids = [f'p{i:02d}' for i in range(15)]  # p00 ~ p14
+
+        # shard 목록만 만들고 파일은 iteration 중에 하나씩 읽음
+        self.shards = []
+        for subject_id in subject_ids:
+            subject_path = os.path.join(data_root, subject_id)
+            if not os.path.exists(subject_path):
+                continue
+            for mat_file in _mat_files(subject_path):
+                self.shards.append(os.path.join(subject_path, mat_file))
+
+    def set_epoch(self, epoch):
+        """epoch마다 호출하면 shard 순서가 바뀜"""
+        self.epoch = epoch
+
+    def _worker_shards(self):
+        """현재 worker가 맡을 shard 목록"""
+        shards = list(self.shards)
+        if self.shuffle:
+            # 모든 worker가 같은 순서로 섞은 뒤 나눠 가짐 (겹치거나 빠지는 shard 없음)
+            order = np.random.default_rng((self.seed, self.epoch)).permutation(len(shards))
+            shards = [shards[i] for i in order]
+
+        worker_info = get_worker_info()
+        if worker_info is None:
+            return shards, 0
+        return shards[worker_info.id::worker_info.num_workers], worker_info.id
+
+    def _emit(self, images, gazes):
+        """배치 단위면 배치 텐서, 아니면 샘플 하나씩"""
+        if self.batch_size is not None:
+            for start in range(0, len(images), self.batch_size):
+                yield _to_batch_tensors(images[start:start + self.batch_size],
+                                        gazes[start:start + self.batch_size])
+            return
+
+        for image, gaze in zip(images, gazes):
+            image = np.expand_dims(image.astype(np.float32) / 255.0, axis=0)
+            if self.transform:
+                image = self.transform(image)
+            yield torch.from_numpy(image), torch.from_numpy(gaze)
+
+    def __iter__(self):
+        shards, worker_id = self._worker_shards()
+        rng = np.random.default_rng((self.seed, self.epoch, worker_id))
+
+        buf_images = np.empty((0, 36, 60), dtype=np.uint8)
+        buf_gazes = np.empty((0, 3), dtype=np.float32)
+
+        for mat_path in shards:
+            parts = _read_mat(mat_path, self.eye)
+            pool_images = np.concatenate([buf_images] + [img for img, _ in parts], axis=0).astype(np.uint8, copy=False)
+            pool_gazes = np.concatenate([buf_gazes] + [gz for _, gz in parts], axis=0).astype(np.float32, copy=False)
+            del parts
+
+            if self.shuffle:
+                perm = rng.permutation(len(pool_images))
+                pool_images = pool_images[perm]
+                pool_gazes = pool_gazes[perm]
+
+            # buffer 크기만 남기고 내보냄 (배치 단위면 배치 크기 배수로)
+            n_emit = max(0, len(pool_images) - self.shuffle_buffer)
+            if self.batch_size is not None:
+                n_emit -= n_emit % self.batch_size
+            yield from self._emit(pool_images[:n_emit], pool_gazes[:n_emit])
+
+            buf_images = pool_images[n_emit:].copy()
+            buf_gazes = pool_gazes[n_emit:].copy()
+            del pool_images, pool_gazes
+
+        # 남은 buffer 정리
+        if self.batch_size is not None and self.drop_last:
+            n_emit = len(buf_images) - len(buf_images) % self.batch_size
+        else:
+            n_emit = len(buf_images)
+        yield from self._emit(buf_images[:n_emit], buf_gazes[:n_emit])
+
 
 # 테스트 코드
 if __name__ == "__main__":
@@ -105,3 +568,13 @@ if __name__ == "__main__":
     print(f"Image batch shape: {images.shape}")  # (32, 1, 36, 60)
     print(f"Gaze batch shape: {gazes.shape}")    # (32, 3)
 
+    # 배치 단위 로더
+    batch_dataloader = batch_loader(dataset, batch_size=32, shuffle=True)
+    images, gazes = next(iter(batch_dataloader))
+    print(f"Batch loader image shape: {images.shape}")  # (32, 1, 36, 60)
+
+    # 스트리밍 로더 (피험자 수와 상관없이 메모리 일정)
+    stream = MPIIGazeStream(data_root, subject_ids=['p00', 'p01'], batch_size=32)
+    stream_loader = DataLoader(stream, batch_size=None, num_workers=2)
+    images, gazes = next(iter(stream_loader))
+    print(f"Stream image shape: {images.shape}")  # (32, 1, 36, 60)
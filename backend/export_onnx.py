@@ -0,0 +1,56 @@
+# export_onnx.py
+# best_model.pth → best_model.onnx (+ ONNX Runtime / PyTorch 출력 비교)
+import argparse
+import numpy as np
+import torch
+from model import load_model
+from gaze_engine import OnnxBackend
+
+
+def export_onnx(model, onnx_path, opset=17):
+    """batch 축만 동적으로 export (입력 (N, 1, 36, 60) → 출력 (N, 3))"""
+    dummy = torch.rand(1, 1, 36, 60)
+    torch.onnx.export(
+        model, dummy, onnx_path,
+        input_names=['eye'], output_names=['gaze'],
+        dynamic_axes={'eye': {0: 'batch'}, 'gaze': {0: 'batch'}},
+        opset_version=opset,
+        dynamo=False,
+    )
+
+
+def check_parity(model, onnx_path, batch_sizes=(1, 2, 8, 64), atol=1e-4, seed=0):
+    """PyTorch vs ONNX Runtime 최대 절대 오차 (batch size별)"""
+    backend = OnnxBackend(onnx_path)
+    rng = np.random.default_rng(seed)
+
+    max_diffs = {}
+    for batch_size in batch_sizes:
+        x = rng.random((batch_size, 1, 36, 60), dtype=np.float32)
+        with torch.inference_mode():
+            expected = model(torch.from_numpy(x)).numpy()
+        actual = backend(x)
+        max_diffs[batch_size] = float(np.abs(expected - actual).max())
+
+    passed = all(diff <= atol for diff in max_diffs.values())
+    return passed, max_diffs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='GazeNet ONNX export + parity check')
+    parser.add_argument('--model', default='best_model.pth')
+    parser.add_argument('--out', default='best_model.onnx')
+    parser.add_argument('--opset', type=int, default=17)
+    parser.add_argument('--atol', type=float, default=1e-4, help='허용 최대 절대 오차')
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    export_onnx(model, args.out, args.opset)
+    print(f"export 완료: {args.out}")
+
+    passed, max_diffs = check_parity(model, args.out, atol=args.atol)
+    for batch_size, diff in max_diffs.items():
+        print(f"  batch {batch_size:3d}: max |torch - onnx| = {diff:.2e}")
+    if not passed:
+        raise SystemExit(f"parity check 실패 (atol={args.atol})")
+    print("parity check 통과")
@@ -0,0 +1,54 @@
+# freeze_model.py
+# best_model.pth → best_model_frozen.pt (TorchScript + freeze, GazeNet 클래스 없이 한 번에 로드)
+import time
+import argparse
+import json
+import numpy as np
+import torch
+from model import load_model
+
+
+def freeze(model):
+    """script → freeze (가중치를 상수로 접고 dropout 등 eval 분기 제거)"""
+    scripted = torch.jit.script(model.eval())
+    return torch.jit.freeze(scripted)
+
+
+def save_frozen(model, path, meta):
+    frozen = freeze(model)
+    torch.jit.save(frozen, path, _extra_files={'meta.json': json.dumps(meta)})
+    return frozen
+
+
+def load_seconds(model_path, repeats=5):
+    """load_model 한 번에 걸리는 시간 (최솟값, 초)"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model = load_model(model_path)
+        with torch.inference_mode():
+            model(torch.rand(1, 1, 36, 60))  # 첫 forward (TorchScript 최적화 포함)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='GazeNet 동결 TorchScript 아티팩트 (빠른 시작용)')
+    parser.add_argument('--model', default='best_model.pth')
+    parser.add_argument('--out', default='best_model_frozen.pt')
+    parser.add_argument('--atol', type=float, default=1e-5, help='허용 최대 절대 오차')
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    save_frozen(model, args.out, {'variant': 'frozen', 'source': args.model})
+    print(f"저장: {args.out}")
+
+    x = torch.from_numpy(np.random.default_rng(0).random((8, 1, 36, 60), dtype=np.float32))
+    with torch.inference_mode():
+        max_diff = float((model(x) - load_model(args.out)(x)).abs().max())
+    print(f"max |pth - frozen| = {max_diff:.2e}")
+    if max_diff > args.atol:
+        raise SystemExit(f"parity check 실패 (atol={args.atol})")
+
+    print(f"로드+첫 forward: {args.model} {load_seconds(args.model) * 1000:.1f}ms, "
+          f"{args.out} {load_seconds(args.out) * 1000:.1f}ms")
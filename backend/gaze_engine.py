@@ -0,0 +1,202 @@
+# gaze_engine.py
+# 트래커 공용 시선 추론 엔진 (양쪽 눈 crop → 한 번의 forward)
+import os
+from collections import namedtuple
+import cv2
+import numpy as np
+
+# 눈 랜드마크 인덱스 (MediaPipe 기준)
+LEFT_EYE = [362, 385, 387, 263, 373, 380]
+RIGHT_EYE = [33, 160, 158, 133, 153, 144]
+EYES = [('Left', LEFT_EYE), ('Right', RIGHT_EYE)]
+
+# eyes: [(이름, (x1, y1, x2, y2), gaze (3,)), ...] (crop이 비어 있는 눈은 빠짐)
+# gaze: 양쪽 눈 평균 (3,), 검출된 눈이 없으면 None
+GazeResult = namedtuple('GazeResult', ['gaze', 'eyes'])
+
+
+def eye_points(landmarks, eye_indices, frame_shape):
+    """눈 랜드마크 → 픽셀 좌표 (6, 2)"""
+    h, w = frame_shape[:2]
+    return np.array([(int(landmarks[idx].x * w), int(landmarks[idx].y * h))
+                     for idx in eye_indices])
+
+
+def eye_rect_from_points(points, frame_shape):
+    """눈 픽셀 좌표에서 bounding box (여유 공간 포함)"""
+    h, w = frame_shape[:2]
+    x_min, y_min = points.min(axis=0)
+    x_max, y_max = points.max(axis=0)
+
+    # 여유 공간 추가
+    padding_w = int((x_max - x_min) * 0.3)
+    padding_h = int((y_max - y_min) * 0.5)
+
+    x_min = max(0, x_min - padding_w)
+    y_min = max(0, y_min - padding_h)
+    # 프레임 밖 (왼쪽/위) 으로 나간 눈은 음수 끝점이 slice에서 뒤로 감기지 않게 0으로 (빈 crop)
+    x_max = max(0, min(w, x_max + padding_w))
+    y_max = max(0, min(h, y_max + padding_h))
+
+    return x_min, y_min, x_max, y_max
+
+
+def get_eye_rect(landmarks, eye_indices, frame_shape):
+    """눈 랜드마크에서 bounding box 추출"""
+    return eye_rect_from_points(eye_points(landmarks, eye_indices, frame_shape), frame_shape)
+
+
+def preprocess_eye(eye_img):
+    """눈 이미지 전처리 → (36, 60) float32, 0~1"""
+    # Grayscale 변환
+    if len(eye_img.shape) == 3:
+        eye_img = cv2.cvtColor(eye_img, cv2.COLOR_BGR2GRAY)
+
+    # 리사이즈 (36x60)
+    eye_img = cv2.resize(eye_img, (60, 36))
+
+    # 정규화
+    return eye_img.astype(np.float32) / 255.0
+
+
+class EyePreprocessor:
+    """
+    preprocess_eye와 같은 결과를 미리 잡아둔 버퍼에 in-place로 씀 (프레임마다 새 배열 할당 없음)
+    - gray: crop보다 큰 scratch 버퍼의 view에 변환 (더 큰 crop이 오면 그때만 키움)
+    - resize → (36, 60) uint8 버퍼, 정규화 → (N, 1, 36, 60) float32 배치 버퍼
+    - 반환한 배치는 다음 호출에서 덮어씀 (스레드 하나에서만 사용)
+    """
+
+    def __init__(self, gray_size=(128, 256)):
+        self._gray = np.empty(gray_size, dtype=np.uint8)
+        self._resized = np.empty((36, 60), dtype=np.uint8)
+        self._batches = {}  # 눈 개수 → (N, 1, 36, 60) float32
+
+    def batch_buffer(self, n):
+        batch = self._batches.get(n)
+        if batch is None:
+            batch = self._batches[n] = np.empty((n, 1, 36, 60), dtype=np.float32)
+        return batch
+
+    def _gray_view(self, h, w):
+        if h > self._gray.shape[0] or w > self._gray.shape[1]:
+            self._gray = np.empty((max(h, self._gray.shape[0]), max(w, self._gray.shape[1])), dtype=np.uint8)
+        return self._gray[:h, :w]
+
+    def __call__(self, eye_imgs):
+        """눈 이미지 목록 → (N, 1, 36, 60) float32, 0~1"""
+        batch = self.batch_buffer(len(eye_imgs))
+        for i, eye_img in enumerate(eye_imgs):
+            if len(eye_img.shape) == 3:
+                gray = self._gray_view(*eye_img.shape[:2])
+                cv2.cvtColor(eye_img, cv2.COLOR_BGR2GRAY, dst=gray)
+                eye_img = gray
+            cv2.resize(eye_img, (60, 36), dst=self._resized)
+            np.divide(self._resized, np.float32(255.0), out=batch[i, 0])
+        return batch
+
+
+class TorchBackend:
+    """PyTorch 추론 (.pth state_dict 또는 .pt TorchScript/int8)"""
+
+    def __init__(self, model_path, num_threads=None):
+        import torch
+        from model import load_model
+
+        if num_threads is not None:
+            torch.set_num_threads(num_threads)
+        self._torch = torch
+        self.model = load_model(model_path)
+        self._input = (None, None)  # (numpy 배치 버퍼, 같은 메모리를 쓰는 tensor)
+
+    def __call__(self, batch):
+        """(N, 1, 36, 60) float32 numpy → (N, 3) numpy"""
+        # EyePreprocessor는 매번 같은 버퍼를 넘기므로 tensor도 한 번 만든 것을 재사용
+        if self._input[0] is not batch:
+            self._input = (batch, self._torch.from_numpy(batch))
+        with self._torch.inference_mode():
+            return self.model(self._input[1]).numpy()
+
+
+class OnnxBackend:
+    """ONNX Runtime CPU 추론 (export_onnx.py로 만든 .onnx, torch 불필요)"""
+
+    def __init__(self, model_path, num_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        # batch 1~2 지연시간 위주: 스레드 적게, 순차 실행, 그래프 최적화 전부
+        options.intra_op_num_threads = num_threads or 1
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch):
+        """(N, 1, 36, 60) float32 numpy → (N, 3) numpy"""
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+BACKENDS = {'torch': TorchBackend, 'onnx': OnnxBackend}
+
+
+class GazeEngine:
+    """
+    GazeNet 추론 엔진
+    - 모델 로드 (backend: 'torch' = .pth/.pt, 'onnx' = .onnx, None이면 확장자로 결정)
+    - 랜드마크 → 양쪽 눈 crop → (2, 1, 36, 60) 한 번의 forward
+    """
+
+    def __init__(self, model_path='best_model.pth', backend=None, num_threads=None):
+        if backend is None:
+            backend = 'onnx' if os.path.splitext(model_path)[1] == '.onnx' else 'torch'
+        self.backend_name = backend
+        self.backend = BACKENDS[backend](model_path, num_threads)
+        self.preprocess = EyePreprocessor()
+
+    def predict_crops(self, eye_imgs):
+        """눈 이미지 목록 → (N, 3) gaze (한 배치로 forward, 입력 버퍼 재사용)"""
+        return self.backend(self.preprocess(eye_imgs))  # (N, 1, 36, 60)
+
+    def crop_eyes(self, frame, landmarks):
+        """프레임 + 랜드마크 → [(이름, rect, 눈 이미지), ...] (빈 crop 제외)"""
+        crops = []
+        for eye_name, eye_indices in EYES:
+            x1, y1, x2, y2 = get_eye_rect(landmarks, eye_indices, frame.shape)
+            eye_img = frame[y1:y2, x1:x2]
+            if eye_img.size == 0:
+                continue
+            crops.append((eye_name, (x1, y1, x2, y2), eye_img))
+        return crops
+
+    def estimate(self, frame, landmarks):
+        """프레임 + 랜드마크 → GazeResult (눈별 gaze + 평균)"""
+        crops = self.crop_eyes(frame, landmarks)
+        if not crops:
+            return GazeResult(None, [])
+
+        gazes = self.predict_crops([eye_img for _, _, eye_img in crops])
+        eyes = [(eye_name, rect, gaze) for (eye_name, rect, _), gaze in zip(crops, gazes)]
+        return GazeResult(gazes.mean(axis=0), eyes)
+
+    def estimate_many(self, faces):
+        """
+        [(프레임, 랜드마크), ...] → [GazeResult, ...]
+        여러 얼굴 / 여러 카메라의 눈 crop을 모두 모아 한 번의 forward
+        """
+        face_crops = [self.crop_eyes(frame, landmarks) for frame, landmarks in faces]
+        eye_imgs = [eye_img for crops in face_crops for _, _, eye_img in crops]
+        gazes = self.predict_crops(eye_imgs) if eye_imgs else None
+
+        results, start = [], 0
+        for crops in face_crops:
+            if not crops:
+                results.append(GazeResult(None, []))
+                continue
+            face_gazes = gazes[start:start + len(crops)]
+            start += len(crops)
+            eyes = [(eye_name, rect, gaze) for (eye_name, rect, _), gaze in zip(crops, face_gazes)]
+            results.append(GazeResult(face_gazes.mean(axis=0), eyes))
+        return results
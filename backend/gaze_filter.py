@@ -0,0 +1,208 @@
+# gaze_filter.py
+# 화면 시선 점 필터 (떨림 제거 + 지연 보상): One-Euro / 등속 Kalman + saccade 검출
+# 상태는 전부 고정 크기 numpy 배열 (프레임마다 리스트 append/pop 없음)
+import numpy as np
+
+
+class RingBuffer:
+    """고정 크기 (size, dim) 버퍼, 가장 오래된 값을 덮어씀"""
+
+    def __init__(self, size, dim):
+        self.data = np.zeros((size, dim))
+        self.count = 0
+        self._next = 0
+
+    def append(self, value):
+        self.data[self._next] = value
+        self._next = (self._next + 1) % len(self.data)
+        self.count = min(self.count + 1, len(self.data))
+
+    def full(self):
+        return self.count == len(self.data)
+
+    def values(self):
+        """들어온 순서대로 (오래된 것 → 최근)"""
+        if self.count < len(self.data):
+            return self.data[:self.count]
+        return np.roll(self.data, -self._next, axis=0)
+
+    def clear(self):
+        self.count = 0
+        self._next = 0
+
+
+class SaccadeDetector:
+    """
+    saccade (빠른 눈 점프) 검출
+    - 최근 confirm개 측정이 모두 필터 위치에서 distance(px) 넘게 떨어져 있고 서로는 가까우면 saccade
+    - 한 프레임짜리 튀는 값(outlier)은 다음 측정이 돌아오므로 무시됨
+    """
+
+    def __init__(self, distance=150.0, confirm=2):
+        self.distance = distance
+        self.recent = RingBuffer(confirm, 2)
+
+    def update(self, point, filtered):
+        self.recent.append(point)
+        if filtered is None or not self.recent.full():
+            return False
+        recent = self.recent.values()
+        far = np.linalg.norm(recent - filtered, axis=1).min() > self.distance
+        together = np.ptp(recent, axis=0).max() < self.distance / 2
+        return bool(far and together)
+
+    def reset(self):
+        self.recent.clear()
+
+
+class OneEuroFilter:
+    """
+    One-Euro 필터 (Casiez et al.): 느리게 움직이면 강하게, 빠르게 움직이면 약하게 스무딩
+    - min_cutoff(Hz): 멈춰 있을 때 떨림 제거 정도 (작을수록 부드럽고 느림)
+    - beta: 속도에 따라 cutoff를 올리는 정도 (클수록 빠른 움직임에 지연이 적음)
+    """
+
+    def __init__(self, min_cutoff=0.5, beta=0.01, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * np.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def reset(self, point=None, t=None):
+        self.x = None if point is None else np.array(point, dtype=np.float64)
+        self.dx = np.zeros(2)
+        self.t = t
+
+    def update(self, point, t):
+        point = np.asarray(point, dtype=np.float64)
+        if self.x is None:
+            self.reset(point, t)
+            return self.x
+        dt = max(t - self.t, 1e-3)
+        self.t = t
+
+        dx = (point - self.x) / dt
+        self.dx += self._alpha(self.d_cutoff, dt) * (dx - self.dx)
+        cutoff = self.min_cutoff + self.beta * np.linalg.norm(self.dx)
+        self.x += self._alpha(cutoff, dt) * (point - self.x)
+        return self.x
+
+    def predict(self, t):
+        return None if self.x is None else self.x.copy()
+
+
+class KalmanFilter:
+    """
+    등속 Kalman 필터 (x, y 각각 [위치, 속도], 공분산은 두 축이 같으므로 2x2 하나)
+    - measurement_std(px): 측정 떨림, accel_std(px/s²): 시선 가속도 (클수록 측정을 빨리 따라감)
+    - predict(t): 마지막 측정 이후 t까지 속도로 외삽 (max_lead초까지) → 파이프라인 지연 보상
+    """
+
+    def __init__(self, measurement_std=25.0, accel_std=500.0, max_lead=0.1):
+        self.R = measurement_std ** 2
+        self.q = accel_std ** 2
+        self.max_lead = max_lead
+        self.reset()
+
+    def reset(self, point=None, t=None):
+        self.state = np.zeros((2, 2))  # 축별 [위치, 속도]
+        self.P = np.diag([self.R, 1e6])
+        self.t = t
+        self.initialized = point is not None
+        if point is not None:
+            self.state[:, 0] = point
+
+    def update(self, point, t):
+        point = np.asarray(point, dtype=np.float64)
+        if not self.initialized:
+            self.reset(point, t)
+            return self.state[:, 0]
+        dt = max(t - self.t, 1e-3)
+        self.t = t
+
+        # 예측: x += v·dt, P = F P Fᵀ + Q (가속도 백색잡음)
+        F = np.array([[1.0, dt], [0.0, 1.0]])
+        Q = self.q * np.array([[dt ** 4 / 4, dt ** 3 / 2], [dt ** 3 / 2, dt ** 2]])
+        self.state = self.state @ F.T
+        self.P = F @ self.P @ F.T + Q
+
+        # 보정 (위치만 측정)
+        gain = self.P[:, 0] / (self.P[0, 0] + self.R)
+        innovation = point - self.state[:, 0]
+        self.state += innovation[:, None] * gain[None, :]
+        self.P = self.P - np.outer(gain, self.P[0])
+        return self.state[:, 0]
+
+    def predict(self, t):
+        if not self.initialized:
+            return None
+        lead = min(max(t - self.t, 0.0), self.max_lead)
+        return self.state[:, 0] + self.state[:, 1] * lead
+
+
+class GazeFilter:
+    """
+    화면 시선 점 필터 + saccade 처리
+    - update(point, t_capture, now): 측정 반영 후 now + lead 시점 위치 (지연 보상, Kalman만 외삽)
+    - saccade로 판단되면 필터를 새 위치로 바로 리셋 (고정 시선은 부드럽게, 점프는 번지지 않게)
+    - lead(초): 측정 가능한 파이프라인 지연(now - t_capture) 외에 더할 화면 표시 지연
+    """
+
+    def __init__(self, smoother, saccades=None, lead=0.0):
+        self.smoother = smoother
+        self.saccades = saccades
+        self.lead = lead
+        self.saccade = False  # 마지막 update가 saccade였는지
+
+    def update(self, point, t_capture, now=None):
+        filtered = self.smoother.predict(t_capture)
+        self.saccade = self.saccades is not None and self.saccades.update(point, filtered)
+        if self.saccade:
+            self.smoother.reset(point, t_capture)
+            self.saccades.reset()
+        else:
+            self.smoother.update(point, t_capture)
+        now = t_capture if now is None else now
+        return self.smoother.predict(now + self.lead)
+
+    def reset(self):
+        self.smoother.reset()
+        if self.saccades is not None:
+            self.saccades.reset()
+
+
+class _NoSmoothing:
+    def __init__(self):
+        self.reset()
+
+    def reset(self, point=None, t=None):
+        self.x = None if point is None else np.array(point, dtype=np.float64)
+
+    def update(self, point, t):
+        self.x = np.array(point, dtype=np.float64)
+        return self.x
+
+    def predict(self, t):
+        return self.x
+
+
+FILTERS = ('kalman', 'one_euro', 'none')
+
+
+def create_filter(kind='kalman', lead=0.0, saccade_px=150.0):
+    """kind: 'kalman' (지연 보상 외삽), 'one_euro', 'none' / saccade_px <= 0 이면 saccade 검출 끔"""
+    if kind == 'kalman':
+        smoother = KalmanFilter()
+    elif kind == 'one_euro':
+        smoother = OneEuroFilter()
+    elif kind == 'none':
+        smoother = _NoSmoothing()
+    else:
+        raise ValueError(f"알 수 없는 필터: {kind} ({', '.join(FILTERS)})")
+    saccades = SaccadeDetector(saccade_px) if saccade_px and saccade_px > 0 and kind != 'none' else None
+    return GazeFilter(smoother, saccades, lead=lead)
@@ -0,0 +1,279 @@
+# gaze_publisher.py
+# 캘리브레이션된 화면 시선 점 → socket.io 캔버스 서버 (server.js) 로 전송
+# - 트래커 루프(메인 스레드)는 publish()로 버퍼에 넣기만 하고, 전송은 별도 스레드의 asyncio 루프에서
+# - rate 번/초 로 모아서 한 메시지 (binary 기본), 서버 ack를 받아야 다음 배치 (backpressure)
+# - 연결이 끊기면 지수 백오프로 재연결, 그동안 버퍼가 차면 오래된 점부터 버림
+import time
+import math
+import json
+import struct
+import asyncio
+import argparse
+import threading
+from collections import deque
+
+EVENT = 'gaze-batch'
+
+# 배치 binary 형식 (little endian)
+# header: version u8, flags u8 (bit0 = paint), screen_w u16, screen_h u16, n u16, t0 f64 (unix 초)
+# sample × n: dt_ms u16 (t0 기준), x u16, y u16
+BATCH_VERSION = 1
+FLAG_PAINT = 1
+_HEADER = struct.Struct('<BBHHHd')
+_SAMPLE = struct.Struct('<HHH')
+
+
+def encode_batch(samples, screen_size, paint=False):
+    """[(t, x, y), ...] (t = unix 초) → bytes (헤더 16 + 점당 6 바이트)"""
+    t0 = samples[0][0]
+    buf = bytearray(_HEADER.size + _SAMPLE.size * len(samples))
+    _HEADER.pack_into(buf, 0, BATCH_VERSION, FLAG_PAINT if paint else 0,
+                      screen_size[0], screen_size[1], len(samples), t0)
+    for i, (t, x, y) in enumerate(samples):
+        _SAMPLE.pack_into(buf, _HEADER.size + i * _SAMPLE.size,
+                          min(int((t - t0) * 1000), 0xFFFF), min(max(int(x), 0), 0xFFFF), min(max(int(y), 0), 0xFFFF))
+    return bytes(buf)
+
+
+def decode_batch(data):
+    """encode_batch / encode_json 결과 → dict (screen, paint, points=[(t, x, y), ...])"""
+    if isinstance(data, (bytes, bytearray)):
+        version, flags, screen_w, screen_h, n, t0 = _HEADER.unpack_from(data, 0)
+        if version != BATCH_VERSION:
+            raise ValueError(f"지원하지 않는 배치 버전: {version}")
+        points = [_SAMPLE.unpack_from(data, _HEADER.size + i * _SAMPLE.size) for i in range(n)]
+        return {
+            'screen': (screen_w, screen_h),
+            'paint': bool(flags & FLAG_PAINT),
+            'points': [(t0 + dt_ms / 1000.0, x, y) for dt_ms, x, y in points],
+        }
+    t0 = data['t0']
+    return {
+        'screen': tuple(data['screen']),
+        'paint': bool(data.get('paint')),
+        'points': [(t0 + dt_ms / 1000.0, x, y) for dt_ms, x, y in data['points']],
+    }
+
+
+def encode_json(samples, screen_size, paint=False):
+    """binary를 못 쓰는 경우용 (같은 내용을 JSON 객체로)"""
+    t0 = samples[0][0]
+    return {
+        'version': BATCH_VERSION,
+        'screen': list(screen_size),
+        'paint': paint,
+        't0': t0,
+        'points': [[int((t - t0) * 1000), int(x), int(y)] for t, x, y in samples],
+    }
+
+
+class GazePublisher:
+    """
+    화면 시선 점을 socket.io 서버로 보내는 백그라운드 전송기
+    - publish(x, y): 스레드 안전, 막히지 않음 (buffer_size 넘으면 가장 오래된 점 버림)
+    - rate: 초당 배치 수, max_batch: 배치당 최대 점 수 (밀리면 최신 점만 보냄)
+    - 서버 ack (ack_timeout초) 를 기다린 뒤 다음 배치 → 느린 서버/네트워크에선 배치가 커지고 전송 횟수는 줄어듦
+    """
+
+    def __init__(self, url='http://localhost:3000', screen_size=(1920, 1080), rate=30.0, max_batch=64,
+                 buffer_size=256, binary=True, paint=False, nickname=None, ack_timeout=1.0, max_backoff=5.0):
+        self.url = url
+        self.screen_size = tuple(screen_size)
+        self.rate = rate
+        self.max_batch = max_batch
+        self.binary = binary
+        self.paint = paint
+        self.nickname = nickname
+        self.ack_timeout = ack_timeout
+        self.max_backoff = max_backoff
+
+        self._buffer = deque(maxlen=buffer_size)  # (unix 초, x, y)
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._thread = None
+
+        self.connected = False
+        self.sent = 0
+        self.batches = 0
+        self.dropped = 0
+        self.timeouts = 0
+        self.reconnects = 0
+        self.ack_ms = 0.0
+
+    def publish(self, x, y, t=None):
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append((time.time() if t is None else t, x, y))
+
+    def _take(self):
+        """버퍼 비우기 → 최신 max_batch개 (나머지는 버림)"""
+        with self._lock:
+            samples = list(self._buffer)
+            self._buffer.clear()
+            if len(samples) > self.max_batch:
+                self.dropped += len(samples) - self.max_batch
+                samples = samples[-self.max_batch:]
+        return samples
+
+    def _requeue(self, samples):
+        """보내지 못한 배치를 버퍼 앞에 되돌림 (넘치면 가장 오래된 점부터 버리고 dropped에 셈)"""
+        with self._lock:
+            merged = samples + list(self._buffer)
+            keep = self._buffer.maxlen
+            self.dropped += max(0, len(merged) - keep)
+            self._buffer.clear()
+            self._buffer.extend(merged[-keep:])
+
+    def _encode(self, samples):
+        if self.binary:
+            return encode_batch(samples, self.screen_size, self.paint)
+        return encode_json(samples, self.screen_size, self.paint)
+
+    async def _send_loop(self, sio):
+        import socketio
+
+        interval = 1.0 / self.rate
+        loop = asyncio.get_running_loop()
+        while not self._stopped and sio.connected:
+            start = loop.time()
+            samples = self._take()
+            if samples:
+                sent_at = time.perf_counter()
+                try:
+                    await sio.call(EVENT, self._encode(samples), timeout=self.ack_timeout)
+                    self.ack_ms = (time.perf_counter() - sent_at) * 1000.0
+                except socketio.exceptions.TimeoutError:
+                    self.timeouts += 1  # ack 없는 서버 (이전 server.js) 라도 계속 보냄
+                except socketio.exceptions.SocketIOError:
+                    self._requeue(samples)  # 끊김 → 재연결 후 다시 보냄
+                    raise
+                self.sent += len(samples)
+                self.batches += 1
+            await asyncio.sleep(max(0.0, interval - (loop.time() - start)))
+
+    async def run(self):
+        """연결 → 전송 → 끊기면 백오프 후 재연결 (stop() 할 때까지)"""
+        import socketio
+
+        backoff = 0.5
+        while not self._stopped:
+            sio = socketio.AsyncClient(reconnection=False)
+            try:
+                await sio.connect(self.url, auth={'nickname': self.nickname} if self.nickname else None,
+                                  wait_timeout=self.ack_timeout * 5)
+            except socketio.exceptions.ConnectionError:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+
+            if self.batches:  # 한 번이라도 보낸 뒤 다시 연결된 경우
+                self.reconnects += 1
+            self.connected = True
+            backoff = 0.5
+            try:
+                await self._send_loop(sio)
+            except socketio.exceptions.SocketIOError:
+                pass  # 전송 중 끊김 → 재연결
+            finally:
+                self.connected = False
+                await sio.disconnect()
+
+    def start(self):
+        """별도 스레드에서 asyncio 루프 실행"""
+        self._stopped = False
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.run()), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stopped = True
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats_text(self):
+        state = 'connected' if self.connected else 'reconnecting'
+        return (f"publish {state} | sent {self.sent} in {self.batches} batches | "
+                f"dropped {self.dropped} | ack {self.ack_ms:.0f}ms")
+
+
+def serve(host='localhost', port=3000):
+    """
+    server.js 대신 쓸 테스트용 서버: gaze-batch를 받아 ack하고 초마다 통계 출력
+    (python-socketio + aiohttp 필요)
+    """
+    import socketio
+    from aiohttp import web
+
+    sio = socketio.AsyncServer(async_mode='aiohttp')
+    app = web.Application()
+    sio.attach(app)
+    stats = {'batches': 0, 'points': 0, 'bytes': 0, 'last': None, 'latency': 0.0, 'since': time.time()}
+
+    @sio.event
+    async def connect(sid, environ, auth=None):
+        print(f"접속: {sid} {auth or ''}")
+
+    @sio.event
+    async def disconnect(sid, reason=None):
+        print(f"퇴장: {sid}")
+
+    @sio.on(EVENT)
+    async def gaze_batch(sid, data):
+        batch = decode_batch(data)
+        stats['batches'] += 1
+        stats['points'] += len(batch['points'])
+        stats['bytes'] += len(data) if isinstance(data, (bytes, bytearray)) else len(json.dumps(data))
+        stats['last'] = batch['points'][-1]
+        stats['latency'] = (time.time() - batch['points'][-1][0]) * 1000.0
+
+        now = time.time()
+        if now - stats['since'] >= 1.0:
+            elapsed = now - stats['since']
+            _, x, y = stats['last']
+            print(f"{stats['batches'] / elapsed:.0f} batches/s, {stats['points'] / elapsed:.0f} points/s, "
+                  f"{stats['bytes'] / elapsed / 1024:.1f} KB/s, last ({x}, {y}), latency {stats['latency']:.0f}ms")
+            stats.update(batches=0, points=0, bytes=0, since=now)
+        return True  # ack → 보낸 쪽이 다음 배치 전송
+
+    print(f"테스트 서버: http://{host}:{port}")
+    web.run_app(app, host=host, port=port, print=None)
+
+
+def demo(publisher, seconds=None, fps=60.0):
+    """카메라 없이 원을 그리는 가짜 시선 점 전송 (서버 연결 테스트용)"""
+    w, h = publisher.screen_size
+    start = last_print = time.perf_counter()
+    try:
+        while seconds is None or time.perf_counter() - start < seconds:
+            angle = (time.perf_counter() - start) * 1.5
+            publisher.publish(w / 2 + math.cos(angle) * h / 3, h / 2 + math.sin(angle) * h / 3)
+            time.sleep(1.0 / fps)
+            if time.perf_counter() - last_print >= 1.0:
+                last_print = time.perf_counter()
+                print(publisher.stats_text())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='시선 점 socket.io 전송 테스트 (트래커 연동은 screen_gaze_calibrated.py --publish)')
+    parser.add_argument('--serve', action='store_true', help='테스트용 서버 실행 (server.js 대신)')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--url', default='http://localhost:3000', help='--serve 없이: 가짜 시선 점을 보낼 서버')
+    parser.add_argument('--rate', type=float, default=30.0, help='초당 배치 수')
+    parser.add_argument('--json', action='store_true', help='binary 대신 JSON 배치')
+    parser.add_argument('--paint', action='store_true', help='캔버스에 브러시로 그리기')
+    parser.add_argument('--seconds', type=float, default=None)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.host, args.port)
+    else:
+        publisher = GazePublisher(args.url, rate=args.rate, binary=not args.json, paint=args.paint,
+                                  nickname='gaze-demo').start()
+        demo(publisher, args.seconds)
+        publisher.stop()
+        print(publisher.stats_text())
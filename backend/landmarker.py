@@ -0,0 +1,234 @@
+# landmarker.py
+# 프레임 → 얼굴 랜드마크 (매 프레임 FaceMesh / 드문드문 FaceMesh + 사이 프레임은 optical flow 추적)
+from collections import namedtuple
+import cv2
+import numpy as np
+from gaze_engine import EYES
+
+# 추적 프레임의 랜드마크 (정규화 좌표 0~1, MediaPipe landmark처럼 .x / .y 로 접근)
+Landmark = namedtuple('Landmark', ['x', 'y'])
+
+# 추적하는 랜드마크 = 양쪽 눈 (get_eye_rect가 쓰는 점들)
+TRACKED_INDICES = sorted({idx for _, eye_indices in EYES for idx in eye_indices})
+
+
+class RegionLandmarks:
+    """ROI 안에서 구한 랜드마크 → 전체 프레임 정규화 좌표 (인덱스로 꺼낼 때 변환)"""
+
+    def __init__(self, landmarks, roi, frame_shape):
+        h, w = frame_shape[:2]
+        x1, y1, x2, y2 = roi
+        self._landmarks = landmarks
+        self._scale = ((x2 - x1) / w, (y2 - y1) / h)
+        self._offset = (x1 / w, y1 / h)
+
+    def __getitem__(self, idx):
+        lm = self._landmarks[idx]
+        return Landmark(lm.x * self._scale[0] + self._offset[0], lm.y * self._scale[1] + self._offset[1])
+
+    def __len__(self):
+        return len(self._landmarks)
+
+    def __iter__(self):
+        return (self[idx] for idx in range(len(self)))
+
+
+class FaceMeshLandmarker:
+    """
+    FaceMesh 랜드마크 검출 (기본: 매 프레임, 전체 해상도 = 기존 동작)
+    - landmark_width: FaceMesh 입력을 이 너비로 줄임 (정규화 좌표라 그대로 전체 프레임에 맞음)
+    - face_crop: 얼굴 주변 ROI만 잘라서 FaceMesh에 넣음 (놓치면 같은 프레임에서 전체로 다시)
+      ROI 위치/크기는 얼굴이 ROI 가장자리(roi_border 비율) 안에 있는 동안 고정
+      → video 모드 FaceMesh(static_image_mode=False)의 내부 추적이 매 프레임 같은 구도를 봄
+      (ROI를 매 프레임 얼굴에 맞춰 옮기면 추적이 가정하는 프레임 간 연속성이 깨짐)
+    - 눈 crop은 항상 원본 해상도 프레임에서 (GazeEngine.estimate(frame, landmarks))
+    """
+
+    def __init__(self, face_mesh, landmark_width=None, face_crop=False, face_margin=0.4, roi_border=0.1):
+        self.face_mesh = face_mesh
+        self.landmark_width = landmark_width
+        self.face_crop = face_crop
+        self.face_margin = face_margin
+        self.roi_border = roi_border
+        self._roi = None  # 다음 검출에 쓸 얼굴 ROI (x1, y1, x2, y2), 원본 픽셀 좌표
+        self._buffers = {}  # 이름 → 재사용 버퍼 (크기가 같으면 프레임마다 새로 할당하지 않음)
+        self.detections = 0
+        self.tracked = 0
+
+    def detect(self, frame):
+        """BGR 프레임 → 첫 번째 얼굴 랜드마크 (전체 프레임 정규화 좌표, 없으면 None)"""
+        self.detections += 1
+        faces = []
+        if self._roi is not None:
+            faces = self._detect_region(frame, self._roi)
+        from_roi = bool(faces)
+        if not faces:
+            faces = self._detect_region(frame, None)
+        landmarks = faces[0] if faces else None
+
+        if self.face_crop:
+            if landmarks is None:
+                self._roi = None
+            elif not from_roi or not self._inside_roi(landmarks, frame.shape):
+                # ROI에서 놓쳤거나 얼굴이 가장자리에 닿을 때만 ROI를 다시 잡음
+                self._roi = self._face_roi(landmarks, frame.shape)
+        return landmarks
+
+    def _inside_roi(self, landmarks, frame_shape):
+        """얼굴 bounding box가 ROI 안쪽 (가장자리 roi_border 비율 제외)에 있는지"""
+        h, w = frame_shape[:2]
+        points = np.array([(lm.x * w, lm.y * h) for lm in landmarks])
+        (x_min, y_min), (x_max, y_max) = points.min(axis=0), points.max(axis=0)
+        x1, y1, x2, y2 = self._roi
+        border_x, border_y = (x2 - x1) * self.roi_border, (y2 - y1) * self.roi_border
+        return (x_min >= x1 + border_x and x_max <= x2 - border_x
+                and y_min >= y1 + border_y and y_max <= y2 - border_y)
+
+    def _buffer(self, name, shape):
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape:
+            buf = self._buffers[name] = np.empty(shape, dtype=np.uint8)
+        return buf
+
+    def detect_faces(self, frame):
+        """BGR 프레임 → 검출된 모든 얼굴 랜드마크 목록 (FaceMesh max_num_faces까지, face_crop 없이 전체 프레임)"""
+        self.detections += 1
+        return self._detect_region(frame, None)
+
+    def _detect_region(self, frame, roi):
+        """프레임(또는 ROI) → 얼굴 랜드마크 목록 (전체 프레임 정규화 좌표, 없으면 빈 목록)"""
+        if roi is None:
+            image = frame
+        else:
+            x1, y1, x2, y2 = roi
+            image = frame[y1:y2, x1:x2]
+
+        # 줄인 뒤 RGB 변환 (변환할 픽셀 수도 같이 줄어듦)
+        if self.landmark_width and image.shape[1] > self.landmark_width:
+            height = max(1, round(image.shape[0] * self.landmark_width / image.shape[1]))
+            image = cv2.resize(image, (self.landmark_width, height), interpolation=cv2.INTER_LINEAR,
+                               dst=self._buffer('small', (height, self.landmark_width, 3)))
+        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=self._buffer('rgb', image.shape))
+
+        results = self.face_mesh.process(rgb_image)
+        if not results.multi_face_landmarks:
+            return []
+        faces = [face.landmark for face in results.multi_face_landmarks]
+        if roi is not None:
+            faces = [RegionLandmarks(landmarks, roi, frame.shape) for landmarks in faces]
+        return faces
+
+    def _face_roi(self, landmarks, frame_shape):
+        """랜드마크 bounding box + 여유(face_margin) → 정사각형에 가까운 ROI"""
+        h, w = frame_shape[:2]
+        points = np.array([(lm.x * w, lm.y * h) for lm in landmarks])
+        (x_min, y_min), (x_max, y_max) = points.min(axis=0), points.max(axis=0)
+        cx, cy = (x_min + x_max) / 2, (y_min + y_max) / 2
+        half = max(x_max - x_min, y_max - y_min) * (0.5 + self.face_margin)
+
+        x1, y1 = max(0, int(cx - half)), max(0, int(cy - half))
+        x2, y2 = min(w, int(cx + half)), min(h, int(cy + half))
+        if x2 - x1 < 32 or y2 - y1 < 32:
+            return None
+        return x1, y1, x2, y2
+
+    def process(self, frame):
+        return self.detect(frame)
+
+    def reset(self):
+        self._roi = None
+
+
+class SparseLandmarker(FaceMeshLandmarker):
+    """
+    FaceMesh는 detect_every 프레임마다만 실행하고, 그 사이에는 눈 랜드마크를 LK optical flow로 추적
+    - 재검출 조건: detect_every 프레임 경과 / 추적 실패한 점 / forward-backward 오차 > max_fb_error(px)
+      / 프레임 간 이동(중앙값) > max_motion(px)
+    - 추적 프레임은 TRACKED_INDICES 랜드마크만 돌려줌 ({인덱스: Landmark})
+    """
+
+    def __init__(self, face_mesh, detect_every=3, max_fb_error=1.0, max_motion=20.0,
+                 indices=TRACKED_INDICES, **detect_kwargs):
+        super().__init__(face_mesh, **detect_kwargs)
+        self.detect_every = detect_every
+        self.max_fb_error = max_fb_error
+        self.max_motion = max_motion
+        self.indices = list(indices)
+        self.lk_params = dict(
+            winSize=(21, 21), maxLevel=2,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03),
+        )
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self._gray_buffers = [None, None]  # 현재 / 이전 프레임 gray를 번갈아 씀
+        self._prev_gray = None
+        self._points = None  # (K, 1, 2) float32 픽셀 좌표
+        self._since_detect = 0
+
+    def _next_gray(self, shape):
+        """이전 프레임 gray가 아닌 쪽 버퍼"""
+        for i, buf in enumerate(self._gray_buffers):
+            if buf is not self._prev_gray:
+                if buf is None or buf.shape != shape:
+                    buf = self._gray_buffers[i] = np.empty(shape, dtype=np.uint8)
+                return buf
+
+    def process(self, frame):
+        # 추적 프레임은 gray 변환만 (전체 프레임 RGB 변환 / FaceMesh 없음)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._next_gray(frame.shape[:2]))
+
+        if self._points is not None and self._since_detect < self.detect_every:
+            points = self._track(gray)
+            if points is not None:
+                self._prev_gray = gray
+                self._points = points
+                self._since_detect += 1
+                self.tracked += 1
+                return self._to_landmarks(points, frame.shape)
+
+        return self._redetect(frame, gray)
+
+    def _redetect(self, frame, gray):
+        landmarks = self.detect(frame)
+        if landmarks is None:
+            self.reset()
+            return None
+
+        h, w = frame.shape[:2]
+        self._points = np.array([[[landmarks[idx].x * w, landmarks[idx].y * h]] for idx in self.indices],
+                                dtype=np.float32)
+        self._prev_gray = gray
+        self._since_detect = 1
+        return landmarks
+
+    def _track(self, gray):
+        """이전 프레임 점 → 현재 프레임 점 (드리프트/움직임이 크면 None)"""
+        points, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, self._points, None,
+                                                     **self.lk_params)
+        if points is None or not status.all():
+            return None
+
+        # forward-backward 검사: 되돌려 추적한 점이 원래 자리로 오지 않으면 드리프트
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, points, None,
+                                                        **self.lk_params)
+        if back is None or not back_status.all():
+            return None
+        fb_error = np.linalg.norm(back - self._points, axis=2).max()
+        motion = np.median(np.linalg.norm(points - self._points, axis=2))
+        if fb_error > self.max_fb_error or motion > self.max_motion:
+            return None
+        return points
+
+    def _to_landmarks(self, points, frame_shape):
+        h, w = frame_shape[:2]
+        return {idx: Landmark(x / w, y / h) for idx, (x, y) in zip(self.indices, points[:, 0])}
+
+
+def create_landmarker(face_mesh, detect_every=1, landmark_width=None, face_crop=False):
+    """detect_every <= 1 이면 매 프레임 FaceMesh, 아니면 드문드문 검출 + 추적"""
+    if detect_every <= 1:
+        return FaceMeshLandmarker(face_mesh, landmark_width=landmark_width, face_crop=face_crop)
+    return SparseLandmarker(face_mesh, detect_every=detect_every,
+                            landmark_width=landmark_width, face_crop=face_crop)
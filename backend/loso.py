@@ -0,0 +1,143 @@
+# loso.py
+# Leave-One-Subject-Out 교차검증 (15 fold 병렬 실행)
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from torch.utils.data import Subset
+from dataset import MPIIGazeDataset, batch_loader
+from model import GazeNet
+from train import run_epoch, DATA_ROOT
+
+CACHE_DIR = 'mpiigaze_cache'
+
+
+def _init_worker(num_threads):
+    """fold 프로세스마다 torch 스레드 수 제한 (fold끼리 코어를 나눠 씀)"""
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+
+
+def run_fold(data_root, cache_dir, test_subject, subject_ids, epochs=10, batch_size=64,
+             lr=0.001, seed=0):
+    """
+    fold 하나: test_subject를 뺀 피험자로 학습 → test_subject로 평가
+    데이터는 캐시 shard를 메모리 맵으로 열어서 모든 fold가 같은 페이지를 공유
+    """
+    torch.manual_seed(seed)
+    device = torch.device('cpu')
+
+    dataset = MPIIGazeDataset(data_root, subject_ids=subject_ids, eye='both', cache_dir=cache_dir)
+    start, end = dataset.subject_range(test_subject)
+    all_indices = np.arange(len(dataset))
+    train_indices = np.concatenate([all_indices[:start], all_indices[end:]])
+    test_indices = all_indices[start:end]
+
+    generator = torch.Generator().manual_seed(seed)
+    train_loader = batch_loader(Subset(dataset, train_indices), batch_size, shuffle=True,
+                                generator=generator)
+    test_loader = batch_loader(Subset(dataset, test_indices), batch_size, shuffle=False)
+
+    model = GazeNet().to(device)
+    criterion = nn.MSELoss()
+    optimizer = optim.Adam(model.parameters(), lr=lr)
+    scheduler = optim.lr_scheduler.ReduceLROnPlateau(optimizer, patience=3, factor=0.5)
+
+    fold_start = time.perf_counter()
+    for _ in range(epochs):
+        train_loss, _, _, _ = run_epoch(model, train_loader, criterion, device,
+                                        optimizer=optimizer, fast=True)
+        scheduler.step(train_loss)
+
+    test_loss, test_angle, n_test, _ = run_epoch(model, test_loader, criterion, device, fast=True)
+
+    return {
+        'subject': test_subject,
+        'angle': test_angle,
+        'loss': test_loss,
+        'n_train': len(train_indices),
+        'n_test': n_test,
+        'seconds': time.perf_counter() - fold_start,
+    }
+
+
+def run_loso(data_root, cache_dir, subject_ids=None, jobs=None, epochs=10, batch_size=64,
+             lr=0.001, seed=0, ingest_workers=0):
+    """
+    LOSO 전체 실행
+    - 캐시를 먼저 한 번 만들어 두고 fold들은 읽기만 함
+    - jobs개 fold를 동시에 실행, fold당 torch 스레드 = CPU 수 // jobs
+    """
+    if subject_ids is None:
+        subject_ids = [f'p{i:02d}' for i in range(15)]  # p00 ~ p14
+
+    # 캐시 준비 (fold 프로세스들은 이미 만들어진 캐시를 메모리 맵으로 공유)
+    dataset = MPIIGazeDataset(data_root, subject_ids=subject_ids, eye='both',
+                              cache_dir=cache_dir, ingest_workers=ingest_workers)
+    subject_ids = dataset.subject_ids
+    del dataset
+
+    if jobs is None:
+        jobs = min(len(subject_ids), os.cpu_count() or 1)
+    num_threads = max(1, (os.cpu_count() or 1) // jobs)
+    print(f"LOSO: {len(subject_ids)} folds, 동시 {jobs}개, fold당 스레드 {num_threads}")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(num_threads,)) as pool:
+        futures = [pool.submit(run_fold, data_root, cache_dir, test_subject, subject_ids,
+                               epochs, batch_size, lr, seed)
+                   for test_subject in subject_ids]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"  {result['subject']}: {result['angle']:.2f}° "
+                  f"({result['seconds']:.0f}s, {len(results)}/{len(futures)})")
+
+    results.sort(key=lambda r: r['subject'])
+    angles = np.array([r['angle'] for r in results])
+    return {
+        'folds': results,
+        'mean_angle': float(angles.mean()),
+        'std_angle': float(angles.std()),
+        'epochs': epochs,
+        'batch_size': batch_size,
+        'lr': lr,
+        'seed': seed,
+    }
+
+
+def print_report(report):
+    print("\n===== LOSO 결과 =====")
+    for fold in report['folds']:
+        print(f"{fold['subject']}: {fold['angle']:6.2f}°  (test {fold['n_test']})")
+    print(f"평균: {report['mean_angle']:.2f}° ± {report['std_angle']:.2f}°")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='MPIIGaze LOSO 교차검증')
+    parser.add_argument('--data-root', default=DATA_ROOT)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--subjects', nargs='*', default=None, help='예: p00 p01 (기본: 전체)')
+    parser.add_argument('--jobs', type=int, default=None, help='동시에 실행할 fold 수')
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--lr', type=float, default=0.001)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ingest-workers', type=int, default=0)
+    parser.add_argument('--out', default='loso_report.json')
+    args = parser.parse_args()
+
+    report = run_loso(args.data_root, args.cache_dir, subject_ids=args.subjects, jobs=args.jobs,
+                      epochs=args.epochs, batch_size=args.batch_size, lr=args.lr, seed=args.seed,
+                      ingest_workers=args.ingest_workers)
+    print_report(report)
+
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"저장: {args.out}")
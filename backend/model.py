@@ -1,4 +1,5 @@
 # model.py
+import json
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -37,7 +38,7 @@ class GazeNet(nn.Module):
         x = self.pool(F.relu(self.conv3(x)))  # (B, 128, 4, 7)
         
         # Flatten
-        x = x.view(x.size(0), -1)  # (B, 128*4*7)
+        x = x.reshape(x.size(0), -1)  # (B, 128*4*7), channels_last 입력도 처리
         
         # FC layers
         x = self.dropout(F.relu(self.fc1(x)))
@@ -46,6 +47,28 @@ class GazeNet(nn.Module):
         return x
 
 
+def load_model(model_path, device='cpu'):
+    """
+    추론용 모델 로드
+    - .pth: GazeNet state_dict (train.py가 저장하는 best_model.pth)
+    - .pt: TorchScript 아티팩트 (quantize.py 등이 저장, int8 모델 포함)
+    """
+    if model_path.endswith('.pt'):
+        extra_files = {'meta.json': ''}
+        model = torch.jit.load(model_path, map_location=device, _extra_files=extra_files)
+        if extra_files['meta.json']:
+            meta = json.loads(extra_files['meta.json'])
+            # int8 모델은 만들 때 쓴 quantized 엔진으로 실행해야 함
+            if meta.get('quantized_engine'):
+                torch.backends.quantized.engine = meta['quantized_engine']
+    else:
+        model = GazeNet()
+        model.load_state_dict(torch.load(model_path, map_location=device))
+        model.to(device)
+    model.eval()
+    return model
+
+
 # 모델 테스트
 if __name__ == "__main__":
     model = GazeNet()
@@ -0,0 +1,196 @@
+# multi_gaze.py
+# 여러 카메라 × 여러 얼굴 시선 추적 (프로세스 하나, 모델 하나, tick마다 모든 눈을 한 번에 forward)
+import time
+_T_START = time.perf_counter()  # --timing 기준 (import 시간 포함)
+import argparse
+from collections import deque, namedtuple
+import cv2
+import numpy as np
+from gaze_engine import GazeEngine, EYES, eye_points
+from landmarker import FaceMeshLandmarker
+from startup import StartupTimer, create_face_mesh, open_camera
+
+# person_id: 'cam<카메라>-<번호>', center: 양쪽 눈 중심 (픽셀), t: tick 시각 (perf_counter)
+PersonGaze = namedtuple('PersonGaze', ['person_id', 'camera', 'gaze', 'eyes', 'center', 't'])
+
+
+def face_center(landmarks, frame_shape):
+    """양쪽 눈 랜드마크 중심 (픽셀)"""
+    points = np.vstack([eye_points(landmarks, eye_indices, frame_shape) for _, eye_indices in EYES])
+    return points.mean(axis=0)
+
+
+class FaceTracks:
+    """
+    카메라 하나에서 얼굴 → 사람 ID 연결
+    - FaceMesh의 얼굴 순서는 프레임마다 바뀔 수 있으므로 직전 위치와 가까운 순서로 짝지음
+    - max_jump(프레임 너비 비율)보다 멀면 새 사람, max_missed tick 동안 안 보이면 삭제
+    """
+
+    def __init__(self, camera, max_jump=0.15, max_missed=15):
+        self.camera = camera
+        self.max_jump = max_jump
+        self.max_missed = max_missed
+        self.tracks = {}  # person_id → [마지막 중심, 안 보인 tick 수]
+        self._next_id = 0
+
+    def assign(self, centers, frame_width):
+        """얼굴 중심 목록 → 같은 순서의 person_id 목록"""
+        max_dist = self.max_jump * frame_width
+        pairs = sorted((float(np.linalg.norm(center - track[0])), person_id, face_idx)
+                       for person_id, track in self.tracks.items()
+                       for face_idx, center in enumerate(centers))
+
+        ids = [None] * len(centers)
+        used = set()
+        for dist, person_id, face_idx in pairs:
+            if dist > max_dist:
+                break
+            if person_id in used or ids[face_idx] is not None:
+                continue
+            ids[face_idx] = person_id
+            used.add(person_id)
+
+        for person_id in list(self.tracks):
+            if person_id not in used:
+                self.tracks[person_id][1] += 1
+                if self.tracks[person_id][1] > self.max_missed:
+                    del self.tracks[person_id]
+
+        for face_idx, center in enumerate(centers):
+            if ids[face_idx] is None:
+                ids[face_idx] = f'cam{self.camera}-{self._next_id}'
+                self._next_id += 1
+            self.tracks[ids[face_idx]] = [center, 0]
+        return ids
+
+
+class MultiGazeTracker:
+    """
+    카메라 M개 × 얼굴 최대 N개
+    - 카메라마다 FaceMesh(max_num_faces=N) + 얼굴 ID 추적, GazeEngine은 하나를 공유
+    - tick(): 모든 카메라 / 모든 얼굴의 눈 crop → GazeEngine.estimate_many 한 번
+    - streams[person_id]: 사람별 최근 (시각, gaze) 기록
+    """
+
+    def __init__(self, camera_indices=(0,), max_faces=4, model_path='best_model.pth', backend=None,
+                 num_threads=None, landmark_width=None, history=300, timer=None):
+        self.timer = timer or StartupTimer()
+        self.camera_indices = list(camera_indices)
+
+        # 모델 / 카메라별 FaceMesh / 카메라 열기를 동시에 초기화
+        tasks = {'model': lambda: GazeEngine(model_path, backend=backend, num_threads=num_threads)}
+        for cam in self.camera_indices:
+            tasks[f'face_mesh{cam}'] = lambda: create_face_mesh(max_num_faces=max_faces)
+            tasks[f'camera{cam}'] = lambda cam=cam: open_camera(cam)
+        ready = self.timer.parallel(tasks)
+
+        self.engine = ready['model']
+        self.caps = {cam: ready[f'camera{cam}'] for cam in self.camera_indices}
+        self.landmarkers = {cam: FaceMeshLandmarker(ready[f'face_mesh{cam}'], landmark_width=landmark_width)
+                            for cam in self.camera_indices}
+        self.tracks = {cam: FaceTracks(cam) for cam in self.camera_indices}
+
+        self.history = history
+        self.streams = {}  # person_id → deque[(t, gaze)]
+
+    def read_frames(self):
+        """카메라별 최신 프레임 (좌우 반전), 읽기 실패한 카메라는 빠짐"""
+        # 전부 grab한 뒤 retrieve → 카메라 사이 촬영 시각 차이를 줄임
+        grabbed = [cam for cam, cap in self.caps.items() if cap.grab()]
+        frames = {}
+        for cam in grabbed:
+            ret, frame = self.caps[cam].retrieve()
+            if ret:
+                frames[cam] = cv2.flip(frame, 1)
+        return frames
+
+    def tick(self, frames):
+        """카메라별 프레임 → [PersonGaze, ...] (모든 얼굴의 눈을 한 배치로 추론)"""
+        now = time.perf_counter()
+        faces, owners = [], []
+        for cam, frame in frames.items():
+            detected = self.landmarkers[cam].detect_faces(frame)
+            centers = [face_center(landmarks, frame.shape) for landmarks in detected]
+            person_ids = self.tracks[cam].assign(centers, frame.shape[1])
+            for landmarks, person_id, center in zip(detected, person_ids, centers):
+                faces.append((frame, landmarks))
+                owners.append((person_id, cam, center))
+
+        people = []
+        for (person_id, cam, center), result in zip(owners, self.engine.estimate_many(faces)):
+            if result.gaze is None:
+                continue
+            self.streams.setdefault(person_id, deque(maxlen=self.history)).append((now, result.gaze))
+            people.append(PersonGaze(person_id, cam, result.gaze, result.eyes, center, now))
+
+        # 사라진 사람의 기록 정리
+        active = {person_id for tracks in self.tracks.values() for person_id in tracks.tracks}
+        for person_id in list(self.streams):
+            if person_id not in active:
+                del self.streams[person_id]
+        return people
+
+    def draw(self, frame, people):
+        """카메라 프레임 위에 사람별 눈 박스 / 시선 화살표 / ID"""
+        for person in people:
+            for _, (x1, y1, x2, y2), gaze in person.eyes:
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+                eye_center = ((x1 + x2) // 2, (y1 + y2) // 2)
+                end_point = (int(eye_center[0] + gaze[0] * 50), int(eye_center[1] - gaze[1] * 50))
+                cv2.arrowedLine(frame, eye_center, end_point, (0, 0, 255), 2)
+
+            x, y = int(person.center[0]), int(person.center[1])
+            text = f"{person.person_id}: ({person.gaze[0]:.2f}, {person.gaze[1]:.2f}, {person.gaze[2]:.2f})"
+            cv2.putText(frame, text, (x - 80, y - 40), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+    def run(self):
+        print(f"카메라 {self.camera_indices} 시작! 'q' 누르면 종료")
+
+        tick_times = deque(maxlen=60)
+        while True:
+            start = time.perf_counter()
+            frames = self.read_frames()
+            if not frames:
+                break
+            self.timer.first('first_frame')
+
+            people = self.tick(frames)
+            if people and self.timer.first('first_gaze'):
+                self.timer.report()
+            tick_times.append(time.perf_counter() - start)
+
+            for cam, frame in frames.items():
+                self.draw(frame, [person for person in people if person.camera == cam])
+                cv2.putText(frame, f"{len(people)} people, tick {np.mean(tick_times) * 1000:.1f}ms",
+                            (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+                cv2.imshow(f'Gaze cam{cam}', frame)
+
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+
+        for cap in self.caps.values():
+            cap.release()
+        cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='여러 카메라 / 여러 얼굴 시선 추적 (모델 하나 공유)')
+    parser.add_argument('--cameras', type=int, nargs='+', default=[0], help='카메라 인덱스 (예: 0 1)')
+    parser.add_argument('--max-faces', type=int, default=4, help='카메라당 최대 얼굴 수')
+    parser.add_argument('--model', default='best_model.pth',
+                        help='.pth, 동결/int8 등 .pt (freeze_model.py, quantize.py), .onnx (export_onnx.py)')
+    parser.add_argument('--backend', choices=['torch', 'onnx'], default=None,
+                        help='추론 백엔드 (기본: 모델 확장자로 결정)')
+    parser.add_argument('--threads', type=int, default=None, help='추론 스레드 수')
+    parser.add_argument('--landmark-width', type=int, default=None,
+                        help='FaceMesh 입력을 이 너비로 축소 (예: 640, 눈 crop은 원본 해상도)')
+    parser.add_argument('--timing', action='store_true', help='시작 시간 단계별 출력 (첫 gaze까지)')
+    args = parser.parse_args()
+
+    timer = StartupTimer(args.timing, t0=_T_START)
+    timer.mark('imports')
+    tracker = MultiGazeTracker(camera_indices=args.cameras, max_faces=args.max_faces,
+                               model_path=args.model, backend=args.backend, num_threads=args.threads,
+                               landmark_width=args.landmark_width, timer=timer)
+    tracker.run()
@@ -0,0 +1,71 @@
+# overlay.py
+# 전체화면 시선 표시용 렌더러 (캔버스 하나를 계속 쓰고, 바뀐 영역만 지우고 다시 그림)
+import time
+import cv2
+import numpy as np
+
+
+class OverlayRenderer:
+    """
+    검은 전체화면 캔버스 위 오버레이
+    - 매 프레임 np.zeros 대신 지난 프레임에 그린 영역(dirty rect)만 0으로 지움
+    - circle / text / image 가 그린 영역을 기록 → 다음 clear()에서 지움
+    - max_fps: 렌더 빈도 상한 (추론은 계속 돌고 due()가 False인 프레임은 그리지 않음)
+    """
+
+    def __init__(self, width, height, max_fps=None):
+        self.width = width
+        self.height = height
+        self.canvas = np.zeros((height, width, 3), dtype=np.uint8)
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self._dirty = []
+        self._last_show = None
+
+    def due(self):
+        """렌더할 차례인지 (max_fps 상한)"""
+        if self._last_show is None:
+            return True
+        return time.perf_counter() - self._last_show >= self.min_interval
+
+    def _mark(self, x1, y1, x2, y2):
+        x1, y1 = max(0, int(x1)), max(0, int(y1))
+        x2, y2 = min(self.width, int(x2)), min(self.height, int(y2))
+        if x2 > x1 and y2 > y1:
+            self._dirty.append((x1, y1, x2, y2))
+
+    def clear(self):
+        """지난 프레임에 그린 영역만 지움"""
+        for x1, y1, x2, y2 in self._dirty:
+            self.canvas[y1:y2, x1:x2] = 0
+        self._dirty = []
+
+    def circle(self, center, radius, color, thickness=-1):
+        cv2.circle(self.canvas, center, radius, color, thickness)
+        pad = radius + max(thickness, 0) + 1
+        self._mark(center[0] - pad, center[1] - pad, center[0] + pad + 1, center[1] + pad + 1)
+
+    def arc(self, center, radius, start_angle, end_angle, color, thickness=1):
+        """원호 (각도는 12시 방향부터 시계방향, 도)"""
+        cv2.ellipse(self.canvas, center, (radius, radius), -90, start_angle, end_angle, color, thickness)
+        pad = radius + max(thickness, 0) + 1
+        self._mark(center[0] - pad, center[1] - pad, center[0] + pad + 1, center[1] + pad + 1)
+
+    def text(self, text, org, scale, color, thickness=1, font=cv2.FONT_HERSHEY_SIMPLEX):
+        cv2.putText(self.canvas, text, org, font, scale, color, thickness)
+        (text_w, text_h), baseline = cv2.getTextSize(text, font, scale, thickness)
+        self._mark(org[0] - thickness, org[1] - text_h - thickness,
+                   org[0] + text_w + thickness + 1, org[1] + baseline + thickness + 1)
+
+    def image(self, img, x, y, size=None):
+        """캔버스 (x, y)에 이미지 붙이기 (size=(w, h)면 캔버스 영역에 바로 resize)"""
+        w, h = size if size is not None else (img.shape[1], img.shape[0])
+        region = self.canvas[y:y + h, x:x + w]
+        if size is not None:
+            cv2.resize(img, (w, h), dst=region)
+        else:
+            region[:] = img
+        self._mark(x, y, x + w, y + h)
+
+    def show(self, window_name):
+        cv2.imshow(window_name, self.canvas)
+        self._last_show = time.perf_counter()
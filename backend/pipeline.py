@@ -0,0 +1,198 @@
+# pipeline.py
+# 캡처 / FaceMesh / 눈 추론을 스레드 단계로 나눈 파이프라인 (오래된 프레임은 버림)
+import time
+import threading
+from collections import deque
+import cv2
+import numpy as np
+
+
+class LatestQueue:
+    """
+    크기 제한 큐 (항상 가장 최신 항목을 꺼냄)
+    - 가득 차면 가장 오래된 항목을 버림
+    - get은 최신 항목 하나만 돌려주고 나머지는 버림 (stale frame drop)
+    """
+
+    def __init__(self, maxsize=1):
+        self._items = deque()
+        self._maxsize = maxsize
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self._maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """최신 항목 (timeout이 지나거나 close되면 None)"""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            item = self._items.pop()
+            self.dropped += len(self._items)
+            self._items.clear()
+            return item
+
+    def depth(self):
+        with self._cond:
+            return len(self._items)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class Packet:
+    """파이프라인을 따라 흐르는 프레임 하나"""
+    __slots__ = ('frame', 't_capture', 'landmarks', 'result', 't_landmark', 't_infer')
+
+    def __init__(self, frame, t_capture):
+        self.frame = frame
+        self.t_capture = t_capture
+        self.landmarks = None
+        self.result = None
+        self.t_landmark = None
+        self.t_infer = None
+
+
+class GazePipeline:
+    """
+    capture → landmark(landmarker.process) → inference(GazeEngine) 스레드 + 렌더(호출한 스레드)
+    - 단계 사이는 LatestQueue: 각 단계는 항상 가장 최신 프레임만 처리
+    - get()으로 최신 결과를 받고, 렌더 후 mark_rendered()로 glass-to-gaze 지연 기록
+    - stats(): 지연시간 / 단계별 처리시간 / 큐 깊이 / 버린 프레임 수
+    """
+
+    def __init__(self, cap, landmarker, engine, queue_size=1, window=120, flip=True):
+        self.cap = cap
+        self.landmarker = landmarker
+        self.engine = engine
+        self.flip = flip
+
+        self.captured = LatestQueue(queue_size)
+        self.landmarked = LatestQueue(queue_size)
+        self.inferred = LatestQueue(queue_size)
+
+        self._running = False
+        self._threads = []
+
+        self._stats_lock = threading.Lock()
+        self._latency = deque(maxlen=window)
+        self._stage_times = {name: deque(maxlen=window)
+                             for name in ['capture', 'landmark', 'inference', 'render']}
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        self._running = True
+        for target in [self._capture_loop, self._landmark_loop, self._inference_loop]:
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._running = False
+        for q in [self.captured, self.landmarked, self.inferred]:
+            q.close()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+
+    def _record(self, stage, seconds):
+        with self._stats_lock:
+            self._stage_times[stage].append(seconds)
+
+    def _capture_loop(self):
+        while self._running:
+            start = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                self._running = False
+                self.captured.close()
+                break
+            if self.flip:
+                frame = cv2.flip(frame, 1)
+            now = time.perf_counter()
+            self._record('capture', now - start)
+            self.captured.put(Packet(frame, now))
+
+    def _landmark_loop(self):
+        while self._running:
+            packet = self.captured.get(timeout=0.1)
+            if packet is None:
+                continue
+            start = time.perf_counter()
+            packet.landmarks = self.landmarker.process(packet.frame)
+            packet.t_landmark = time.perf_counter()
+            self._record('landmark', packet.t_landmark - start)
+            self.landmarked.put(packet)
+
+        self.landmarked.close()
+
+    def _inference_loop(self):
+        while self._running:
+            packet = self.landmarked.get(timeout=0.1)
+            if packet is None:
+                continue
+            start = time.perf_counter()
+            if packet.landmarks is not None:
+                packet.result = self.engine.estimate(packet.frame, packet.landmarks)
+            packet.t_infer = time.perf_counter()
+            self._record('inference', packet.t_infer - start)
+            self.inferred.put(packet)
+
+        self.inferred.close()
+
+    def get(self, timeout=None):
+        """가장 최신 추론 결과 Packet (없으면 None)"""
+        return self.inferred.get(timeout)
+
+    def mark_rendered(self, packet, render_start=None):
+        """렌더가 끝난 시점 기록 → glass-to-gaze 지연"""
+        now = time.perf_counter()
+        with self._stats_lock:
+            self._latency.append(now - packet.t_capture)
+            if render_start is not None:
+                self._stage_times['render'].append(now - render_start)
+
+    def stats(self):
+        """최근 window 프레임 기준 통계 (ms)"""
+        with self._stats_lock:
+            latency = np.array(self._latency) * 1000.0
+            stage_ms = {name: float(np.mean(times)) * 1000.0 if times else 0.0
+                        for name, times in self._stage_times.items()}
+        return {
+            'latency_ms': float(latency.mean()) if len(latency) else 0.0,
+            'latency_p95_ms': float(np.percentile(latency, 95)) if len(latency) else 0.0,
+            'stage_ms': stage_ms,
+            'queue_depth': {
+                'captured': self.captured.depth(),
+                'landmarked': self.landmarked.depth(),
+                'inferred': self.inferred.depth(),
+            },
+            'dropped': {
+                'captured': self.captured.dropped,
+                'landmarked': self.landmarked.dropped,
+                'inferred': self.inferred.dropped,
+            },
+        }
+
+    def stats_text(self):
+        """화면 표시용 한 줄 요약"""
+        s = self.stats()
+        stages = ' '.join(f"{name[:4]}={ms:.1f}" for name, ms in s['stage_ms'].items())
+        depths = '/'.join(str(d) for d in s['queue_depth'].values())
+        return (f"latency {s['latency_ms']:.0f}ms (p95 {s['latency_p95_ms']:.0f}) | "
+                f"{stages} | q {depths}")
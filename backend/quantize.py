@@ -0,0 +1,168 @@
+# quantize.py
+# best_model.pth → int8 GazeNet (dynamic / static PTQ) + 정확도/지연시간 리포트
+import json
+import argparse
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.ao.quantization import (QuantStub, DeQuantStub, get_default_qconfig,
+                                   fuse_modules, prepare, convert, quantize_dynamic)
+from dataset import MPIIGazeDataset
+from model import load_model
+from train import angular_error, DATA_ROOT
+from bench_infer import measure, latency_stats
+
+
+class QuantizableGazeNet(nn.Module):
+    """
+    static 양자화용 GazeNet (가중치는 GazeNet 그대로 복사)
+    - 입력/출력에 Quant/DeQuant stub
+    - F.relu 대신 nn.ReLU 모듈 (conv+relu, linear+relu fuse 용)
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.quant = QuantStub()
+        self.conv1, self.relu1 = model.conv1, nn.ReLU()
+        self.conv2, self.relu2 = model.conv2, nn.ReLU()
+        self.conv3, self.relu3 = model.conv3, nn.ReLU()
+        self.pool = model.pool
+        self.fc1, self.relu4 = model.fc1, nn.ReLU()
+        self.fc2 = model.fc2
+        self.dequant = DeQuantStub()
+
+    def forward(self, x):
+        x = self.quant(x)
+        x = self.pool(self.relu1(self.conv1(x)))
+        x = self.pool(self.relu2(self.conv2(x)))
+        x = self.pool(self.relu3(self.conv3(x)))
+        x = x.reshape(x.size(0), -1)
+        x = self.relu4(self.fc1(x))  # dropout은 eval에서 항등
+        x = self.fc2(x)
+        return self.dequant(x)
+
+
+def quantize_dynamic_int8(model):
+    """Linear 레이어만 int8 (fc1이 파라미터 대부분)"""
+    return quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def quantize_static_int8(model, calib_images, engine, batch_size=64):
+    """conv + linear 전부 int8, calib_images로 activation 범위 보정"""
+    torch.backends.quantized.engine = engine
+    qmodel = QuantizableGazeNet(model).eval()
+    qmodel = fuse_modules(qmodel, [['conv1', 'relu1'], ['conv2', 'relu2'],
+                                   ['conv3', 'relu3'], ['fc1', 'relu4']])
+    qmodel.qconfig = get_default_qconfig(engine)
+    prepare(qmodel, inplace=True)
+
+    with torch.no_grad():
+        for start in range(0, len(calib_images), batch_size):
+            qmodel(calib_images[start:start + batch_size])
+
+    return convert(qmodel)
+
+
+def evaluate(model, images, gazes, batch_size=256):
+    """평균 angular error (도)"""
+    total = 0.0
+    with torch.inference_mode():
+        for start in range(0, len(images), batch_size):
+            outputs = model(images[start:start + batch_size])
+            total += angular_error(outputs, gazes[start:start + batch_size]).item() * len(outputs)
+    return total / len(images)
+
+
+def cpu_latency(model, batch_sizes=(1, 2), iters=300, warmup=30):
+    """트래커 구간(batch 1~2) CPU 지연시간"""
+    results = {}
+    for batch_size in batch_sizes:
+        x = torch.rand(batch_size, 1, 36, 60)
+        with torch.inference_mode():
+            results[f'batch{batch_size}'] = latency_stats(measure(lambda: model(x), iters, warmup))
+    return results
+
+
+def save_artifact(model, path, meta):
+    """TorchScript로 저장 (model.load_model로 한 번에 로드)"""
+    scripted = torch.jit.trace(model, torch.rand(1, 1, 36, 60))
+    torch.jit.save(scripted, path, _extra_files={'meta.json': json.dumps(meta)})
+
+
+def load_samples(data_root, cache_dir, subject_ids, n_calib, n_eval, seed=0):
+    """보정용 / 평가용 샘플 (서로 겹치지 않게)"""
+    dataset = MPIIGazeDataset(data_root, subject_ids=subject_ids, eye='both', cache_dir=cache_dir)
+    perm = np.random.default_rng(seed).permutation(len(dataset))
+    calib_images, _ = dataset.get_batch(perm[:n_calib])
+    eval_images, eval_gazes = dataset.get_batch(perm[n_calib:n_calib + n_eval])
+    return calib_images, eval_images, eval_gazes
+
+
+if __name__ == "__main__":
+    engines = torch.backends.quantized.supported_engines
+    default_engine = 'x86' if 'x86' in engines else ('fbgemm' if 'fbgemm' in engines else 'qnnpack')
+
+    parser = argparse.ArgumentParser(description='GazeNet int8 양자화 + 정확도 게이트')
+    parser.add_argument('--model', default='best_model.pth')
+    parser.add_argument('--data-root', default=DATA_ROOT)
+    parser.add_argument('--cache-dir', default=None)
+    parser.add_argument('--subjects', nargs='*', default=None, help='보정/평가에 쓸 피험자 (기본: 전체)')
+    parser.add_argument('--calib-samples', type=int, default=2000)
+    parser.add_argument('--eval-samples', type=int, default=5000)
+    parser.add_argument('--engine', default=default_engine, choices=engines,
+                        help='quantized 엔진 (x86/fbgemm: 인텔·AMD, qnnpack: ARM)')
+    parser.add_argument('--max-delta', type=float, default=0.5,
+                        help='fp32 대비 허용 angular error 증가량(도), 넘으면 저장 안 함')
+    parser.add_argument('--force', action='store_true', help='게이트를 넘어도 저장')
+    parser.add_argument('--out-prefix', default='best_model')
+    parser.add_argument('--report', default='quantize_report.json')
+    args = parser.parse_args()
+
+    torch.backends.quantized.engine = args.engine
+    fp32_model = load_model(args.model)
+    calib_images, eval_images, eval_gazes = load_samples(
+        args.data_root, args.cache_dir, args.subjects, args.calib_samples, args.eval_samples)
+
+    fp32_angle = evaluate(fp32_model, eval_images, eval_gazes)
+    report = {
+        'engine': args.engine,
+        'eval_samples': len(eval_images),
+        'calib_samples': len(calib_images),
+        'max_delta': args.max_delta,
+        'fp32': {'angle': fp32_angle, 'latency': cpu_latency(fp32_model)},
+        'variants': {},
+    }
+    print(f"fp32: {fp32_angle:.3f}°, batch1 p50 {report['fp32']['latency']['batch1']['p50_ms']:.3f}ms")
+
+    variants = {
+        'dynamic': lambda: quantize_dynamic_int8(load_model(args.model)),
+        'static': lambda: quantize_static_int8(load_model(args.model), calib_images, args.engine),
+    }
+    for name, build in variants.items():
+        qmodel = build()
+        angle = evaluate(qmodel, eval_images, eval_gazes)
+        delta = angle - fp32_angle
+        passed = delta <= args.max_delta
+        path = f'{args.out_prefix}_{name}_int8.pt'
+
+        result = {
+            'angle': angle,
+            'delta': delta,
+            'passed': passed,
+            'latency': cpu_latency(qmodel),
+            'path': path if (passed or args.force) else None,
+        }
+        report['variants'][name] = result
+
+        if passed or args.force:
+            save_artifact(qmodel, path, {'variant': name, 'quantized_engine': args.engine,
+                                         'fp32_angle': fp32_angle, 'angle': angle})
+        status = "OK" if passed else "FAIL"
+        print(f"{name}: {angle:.3f}° (Δ {delta:+.3f}°) [{status}], "
+              f"batch1 p50 {result['latency']['batch1']['p50_ms']:.3f}ms"
+              + (f" → {path}" if result['path'] else " (저장 안 함)"))
+
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"리포트 저장: {args.report}")
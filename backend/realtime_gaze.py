@@ -1,80 +1,32 @@
 # realtime_gaze.py
+import time
+_T_START = time.perf_counter()  # --timing 기준 (import 시간 포함)
+import argparse
 import cv2
-import torch
-import numpy as np
-import mediapipe as mp
-from model import GazeNet
+from gaze_engine import GazeEngine
+from landmarker import create_landmarker
+from startup import StartupTimer, create_face_mesh, open_camera
 
 class GazeEstimator:
-    def __init__(self, model_path='best_model.pth'):
-        # 모델 로드
-        self.model = GazeNet()
-        self.model.load_state_dict(torch.load(model_path, map_location='cpu'))
-        self.model.eval()
+    def __init__(self, model_path='best_model.pth', backend=None, num_threads=None, timer=None,
+                 detect_every=1, landmark_width=None, face_crop=False):
+        self.timer = timer or StartupTimer()
         
-        # MediaPipe 얼굴 메쉬 초기화
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,  # 눈 주변 상세 랜드마크
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        
-        # 눈 랜드마크 인덱스 (MediaPipe 기준)
-        # 왼쪽 눈
-        self.LEFT_EYE = [362, 385, 387, 263, 373, 380]
-        # 오른쪽 눈
-        self.RIGHT_EYE = [33, 160, 158, 133, 153, 144]
-    
-    def get_eye_rect(self, landmarks, eye_indices, frame_shape):
-        """눈 랜드마크에서 bounding box 추출"""
-        h, w = frame_shape[:2]
-        points = []
-        for idx in eye_indices:
-            x = int(landmarks[idx].x * w)
-            y = int(landmarks[idx].y * h)
-            points.append((x, y))
-        
-        points = np.array(points)
-        x_min, y_min = points.min(axis=0)
-        x_max, y_max = points.max(axis=0)
-        
-        # 여유 공간 추가
-        padding_w = int((x_max - x_min) * 0.3)
-        padding_h = int((y_max - y_min) * 0.5)
-        
-        x_min = max(0, x_min - padding_w)
-        y_min = max(0, y_min - padding_h)
-        x_max = min(w, x_max + padding_w)
-        y_max = min(h, y_max + padding_h)
-        
-        return x_min, y_min, x_max, y_max
-    
-    def preprocess_eye(self, eye_img):
-        """눈 이미지 전처리 (36x60 grayscale)"""
-        # Grayscale 변환
-        if len(eye_img.shape) == 3:
-            eye_img = cv2.cvtColor(eye_img, cv2.COLOR_BGR2GRAY)
-        
-        # 리사이즈 (36x60)
-        eye_img = cv2.resize(eye_img, (60, 36))
-        
-        # 정규화 & 텐서 변환
-        eye_img = eye_img.astype(np.float32) / 255.0
-        eye_tensor = torch.from_numpy(eye_img).unsqueeze(0).unsqueeze(0)  # (1, 1, 36, 60)
-        
-        return eye_tensor
-    
-    def predict_gaze(self, eye_tensor):
-        """시선 방향 예측"""
-        with torch.no_grad():
-            gaze = self.model(eye_tensor)
-        return gaze.numpy()[0]  # (3,) 벡터
+        # 모델 로드(.pth / 동결·int8 등 .pt / .onnx), MediaPipe 얼굴 메쉬, 웹캠을 동시에 초기화
+        ready = self.timer.parallel({
+            'model': lambda: GazeEngine(model_path, backend=backend, num_threads=num_threads),
+            'face_mesh': create_face_mesh,
+            'camera': open_camera,
+        })
+        self.engine = ready['model']
+        self.face_mesh = ready['face_mesh']
+        self.cap = ready['camera']
+        self.landmarker = create_landmarker(self.face_mesh, detect_every,
+                                            landmark_width=landmark_width, face_crop=face_crop)
     
     def run(self):
         """웹캠 실시간 추론"""
-        cap = cv2.VideoCapture(0)
+        cap = self.cap
         
         print("웹캠 시작! 'q' 누르면 종료")
         
@@ -82,29 +34,20 @@ class GazeEstimator:
             ret, frame = cap.read()
             if not ret:
                 break
+            self.timer.first('first_frame')
             
             frame = cv2.flip(frame, 1)  # 좌우 반전
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             
-            # 얼굴 검출
-            results = self.face_mesh.process(rgb_frame)
+            # 얼굴 랜드마크 (검출 또는 추적)
+            landmarks = self.landmarker.process(frame)
             
-            if results.multi_face_landmarks:
-                landmarks = results.multi_face_landmarks[0].landmark
+            if landmarks is not None:
+                # 양쪽 눈 한 번에 추론
+                result = self.engine.estimate(frame, landmarks)
+                if result.gaze is not None and self.timer.first('first_gaze'):
+                    self.timer.report()
                 
-                # 양쪽 눈 처리
-                for eye_name, eye_indices in [('Left', self.LEFT_EYE), ('Right', self.RIGHT_EYE)]:
-                    # 눈 영역 추출
-                    x1, y1, x2, y2 = self.get_eye_rect(landmarks, eye_indices, frame.shape)
-                    eye_img = frame[y1:y2, x1:x2]
-                    
-                    if eye_img.size == 0:
-                        continue
-                    
-                    # 전처리 & 추론
-                    eye_tensor = self.preprocess_eye(eye_img)
-                    gaze = self.predict_gaze(eye_tensor)
-                    
+                for eye_name, (x1, y1, x2, y2), gaze in result.eyes:
                     # 시각화: 눈 박스
                     cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
                     
@@ -133,5 +76,24 @@ class GazeEstimator:
 
 
 if __name__ == "__main__":
-    estimator = GazeEstimator()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', default='best_model.pth',
+                        help='.pth, 동결/int8 등 .pt (freeze_model.py, quantize.py), .onnx (export_onnx.py)')
+    parser.add_argument('--backend', choices=['torch', 'onnx'], default=None,
+                        help='추론 백엔드 (기본: 모델 확장자로 결정)')
+    parser.add_argument('--threads', type=int, default=None, help='추론 스레드 수')
+    parser.add_argument('--timing', action='store_true', help='시작 시간 단계별 출력 (첫 gaze까지)')
+    parser.add_argument('--detect-every', type=int, default=1,
+                        help='FaceMesh를 N프레임마다 실행, 사이는 눈 랜드마크 optical flow 추적 (1 = 매 프레임)')
+    parser.add_argument('--landmark-width', type=int, default=None,
+                        help='FaceMesh 입력을 이 너비로 축소 (예: 640, 눈 crop은 원본 해상도)')
+    parser.add_argument('--face-crop', action='store_true',
+                        help='직전 얼굴 주변만 잘라서 FaceMesh 실행')
+    args = parser.parse_args()
+
+    timer = StartupTimer(args.timing, t0=_T_START)
+    timer.mark('imports')
+    estimator = GazeEstimator(model_path=args.model, backend=args.backend, num_threads=args.threads,
+                              timer=timer, detect_every=args.detect_every,
+                              landmark_width=args.landmark_width, face_crop=args.face_crop)
     estimator.run()
\ No newline at end of file
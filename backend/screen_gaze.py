@@ -1,68 +1,41 @@
 # screen_gaze.py
+import time
+_T_START = time.perf_counter()  # --timing 기준 (import 시간 포함)
+import argparse
 import cv2
-import torch
 import numpy as np
-import mediapipe as mp
-from model import GazeNet
-import screeninfo
+from gaze_engine import GazeEngine
+from gaze_filter import FILTERS, create_filter
+from landmarker import create_landmarker
+from overlay import OverlayRenderer
+from startup import StartupTimer, create_face_mesh, open_camera, primary_screen_size
 
 class ScreenGazeTracker:
-    def __init__(self, model_path='best_model.pth'):
-        # 모델 로드
-        self.model = GazeNet()
-        self.model.load_state_dict(torch.load(model_path, map_location='cpu'))
-        self.model.eval()
-        
-        # 화면 해상도
-        screen = screeninfo.get_monitors()[0]
-        self.screen_w = screen.width
-        self.screen_h = screen.height
-        
-        # MediaPipe
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        
-        self.LEFT_EYE = [362, 385, 387, 263, 373, 380]
-        self.RIGHT_EYE = [33, 160, 158, 133, 153, 144]
-        
-        # 스무딩용
-        self.gaze_history = []
-        self.smoothing = 5
-    
-    def get_eye_rect(self, landmarks, eye_indices, frame_shape):
-        h, w = frame_shape[:2]
-        points = []
-        for idx in eye_indices:
-            x = int(landmarks[idx].x * w)
-            y = int(landmarks[idx].y * h)
-            points.append((x, y))
-        
-        points = np.array(points)
-        x_min, y_min = points.min(axis=0)
-        x_max, y_max = points.max(axis=0)
-        
-        padding_w = int((x_max - x_min) * 0.3)
-        padding_h = int((y_max - y_min) * 0.5)
-        
-        x_min = max(0, x_min - padding_w)
-        y_min = max(0, y_min - padding_h)
-        x_max = min(w, x_max + padding_w)
-        y_max = min(h, y_max + padding_h)
-        
-        return x_min, y_min, x_max, y_max
-    
-    def preprocess_eye(self, eye_img):
-        if len(eye_img.shape) == 3:
-            eye_img = cv2.cvtColor(eye_img, cv2.COLOR_BGR2GRAY)
-        eye_img = cv2.resize(eye_img, (60, 36))
-        eye_img = eye_img.astype(np.float32) / 255.0
-        eye_tensor = torch.from_numpy(eye_img).unsqueeze(0).unsqueeze(0)
-        return eye_tensor
+    def __init__(self, model_path='best_model.pth', backend=None, num_threads=None, timer=None,
+                 detect_every=1, landmark_width=None, face_crop=False, render_fps=None,
+                 gaze_filter='kalman', filter_lead=0.0, saccade_px=150.0):
+        self.timer = timer or StartupTimer()
+        
+        # 모델 로드 / MediaPipe / 웹캠 / 화면 해상도를 동시에 초기화
+        ready = self.timer.parallel({
+            'model': lambda: GazeEngine(model_path, backend=backend, num_threads=num_threads),
+            'face_mesh': create_face_mesh,
+            'camera': open_camera,
+            'screen': primary_screen_size,
+        })
+        self.engine = ready['model']
+        self.face_mesh = ready['face_mesh']
+        self.cap = ready['camera']
+        self.screen_w, self.screen_h = ready['screen']
+        self.landmarker = create_landmarker(self.face_mesh, detect_every,
+                                            landmark_width=landmark_width, face_crop=face_crop)
+        
+        # 스무딩 + 지연 보상 (화면 좌표에서, gaze_filter.py)
+        self.gaze_filter = create_filter(gaze_filter, lead=filter_lead, saccade_px=saccade_px)
+        
+        # 렌더 (화면은 render_fps 상한, 추론은 카메라 속도 그대로)
+        self.render_fps = render_fps
+        self.webcam_small = np.empty((240, 320, 3), dtype=np.uint8)
     
     def gaze_to_screen(self, gaze):
         """3D gaze 벡터 → 화면 좌표 변환"""
@@ -81,15 +54,32 @@ class ScreenGazeTracker:
         
         return int(screen_x), int(screen_y)
     
-    def smooth_gaze(self, gaze):
-        """시선 스무딩 (떨림 방지)"""
-        self.gaze_history.append(gaze)
-        if len(self.gaze_history) > self.smoothing:
-            self.gaze_history.pop(0)
-        return np.mean(self.gaze_history, axis=0)
+    def update_gaze(self, gaze, t_capture):
+        """
+        평균 gaze → 화면 좌표 → 필터 (렌더 여부와 상관없이 추론마다 호출)
+        t_capture: 프레임 캡처 시각, 지금까지의 지연만큼 앞을 예측해서 돌려줌
+        """
+        point = self.gaze_filter.update(self.gaze_to_screen(gaze), t_capture, time.perf_counter())
+        return (int(np.clip(point[0], 0, self.screen_w)), int(np.clip(point[1], 0, self.screen_h)))
+    
+    def draw_gaze(self, overlay, point):
+        """시선 점 + 좌표 그리기"""
+        screen_x, screen_y = point
+        overlay.circle((screen_x, screen_y), 30, (0, 255, 0), -1)
+        overlay.circle((screen_x, screen_y), 35, (255, 255, 255), 3)
+        
+        # 좌표 표시
+        text = f"({screen_x}, {screen_y})"
+        overlay.text(text, (screen_x + 50, screen_y), 1, (255, 255, 255), 2)
+    
+    def show_webcam(self, frame):
+        """웹캠 프리뷰 (작게, 미리 잡아둔 버퍼에 resize)"""
+        cv2.resize(frame, (320, 240), dst=self.webcam_small)
+        cv2.imshow('Webcam', self.webcam_small)
     
     def run(self):
-        cap = cv2.VideoCapture(0)
+        cap = self.cap
+        overlay = OverlayRenderer(self.screen_w, self.screen_h, max_fps=self.render_fps)
         
         # 전체화면 시선 표시 창
         cv2.namedWindow('Gaze Point', cv2.WND_PROP_FULLSCREEN)
@@ -101,61 +91,118 @@ class ScreenGazeTracker:
             ret, frame = cap.read()
             if not ret:
                 break
+            t_capture = time.perf_counter()
+            self.timer.first('first_frame')
             
             frame = cv2.flip(frame, 1)
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            # 검은 화면 (시선 점 표시용)
-            screen = np.zeros((self.screen_h, self.screen_w, 3), dtype=np.uint8)
+            point = None
             
-            results = self.face_mesh.process(rgb_frame)
+            landmarks = self.landmarker.process(frame)
             
-            if results.multi_face_landmarks:
-                landmarks = results.multi_face_landmarks[0].landmark
-                
-                gazes = []
-                for eye_indices in [self.LEFT_EYE, self.RIGHT_EYE]:
-                    x1, y1, x2, y2 = self.get_eye_rect(landmarks, eye_indices, frame.shape)
-                    eye_img = frame[y1:y2, x1:x2]
-                    
-                    if eye_img.size == 0:
-                        continue
-                    
-                    eye_tensor = self.preprocess_eye(eye_img)
-                    with torch.no_grad():
-                        gaze = self.model(eye_tensor).numpy()[0]
-                    gazes.append(gaze)
+            if landmarks is not None:
+                # 양쪽 눈 한 번에 추론 (평균 포함)
+                result = self.engine.estimate(frame, landmarks)
                 
-                if gazes:
-                    # 양쪽 눈 평균
-                    avg_gaze = np.mean(gazes, axis=0)
-                    smoothed_gaze = self.smooth_gaze(avg_gaze)
-                    
-                    # 화면 좌표 변환
-                    screen_x, screen_y = self.gaze_to_screen(smoothed_gaze)
-                    
-                    # 시선 점 그리기
-                    cv2.circle(screen, (screen_x, screen_y), 30, (0, 255, 0), -1)
-                    cv2.circle(screen, (screen_x, screen_y), 35, (255, 255, 255), 3)
-                    
-                    # 좌표 표시
-                    text = f"({screen_x}, {screen_y})"
-                    cv2.putText(screen, text, (screen_x + 50, screen_y), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+                if result.gaze is not None:
+                    point = self.update_gaze(result.gaze, t_capture)
+                    if self.timer.first('first_gaze'):
+                        self.timer.report()
+            
+            # 검은 화면 위 시선 점 (지난번에 그린 영역만 지우고 다시 그림)
+            if overlay.due():
+                overlay.clear()
+                if point is not None:
+                    self.draw_gaze(overlay, point)
+                overlay.show('Gaze Point')
+                self.show_webcam(frame)
+            
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+        
+        cap.release()
+        cv2.destroyAllWindows()
+    
+    def run_pipelined(self):
+        """캡처 / FaceMesh / 추론을 별도 스레드로 돌리고 여기서는 렌더만"""
+        from pipeline import GazePipeline
+        
+        cap = self.cap
+        
+        cv2.namedWindow('Gaze Point', cv2.WND_PROP_FULLSCREEN)
+        cv2.setWindowProperty('Gaze Point', cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+        
+        print("실행 중 (파이프라인 모드)! 'q' = 종료")
+        
+        overlay = OverlayRenderer(self.screen_w, self.screen_h, max_fps=self.render_fps)
+        pipeline = GazePipeline(cap, self.landmarker, self.engine).start()
+        
+        while pipeline.running:
+            packet = pipeline.get(timeout=0.1)
+            if packet is None:
+                continue
+            render_start = time.perf_counter()
+            self.timer.first('first_frame')
             
-            cv2.imshow('Gaze Point', screen)
+            point = None
+            if packet.result is not None and packet.result.gaze is not None:
+                point = self.update_gaze(packet.result.gaze, packet.t_capture)
+                if self.timer.first('first_gaze'):
+                    self.timer.report()
             
-            # 웹캠 프리뷰 (작게)
-            small_frame = cv2.resize(frame, (320, 240))
-            cv2.imshow('Webcam', small_frame)
+            if overlay.due():
+                overlay.clear()
+                if point is not None:
+                    self.draw_gaze(overlay, point)
+                
+                # 지연시간 / 단계별 시간 / 큐 깊이
+                overlay.text(pipeline.stats_text(), (20, self.screen_h - 20), 0.6, (200, 200, 200), 1)
+                
+                overlay.show('Gaze Point')
+                self.show_webcam(packet.frame)
+                pipeline.mark_rendered(packet, render_start)
             
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
         
+        pipeline.stop()
         cap.release()
         cv2.destroyAllWindows()
 
 
 if __name__ == "__main__":
-    tracker = ScreenGazeTracker()
-    tracker.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', default='best_model.pth',
+                        help='.pth, 동결/int8 등 .pt (freeze_model.py, quantize.py), .onnx (export_onnx.py)')
+    parser.add_argument('--backend', choices=['torch', 'onnx'], default=None,
+                        help='추론 백엔드 (기본: 모델 확장자로 결정)')
+    parser.add_argument('--threads', type=int, default=None, help='추론 스레드 수')
+    parser.add_argument('--pipelined', action='store_true',
+                        help='캡처/랜드마크/추론을 스레드 파이프라인으로 실행')
+    parser.add_argument('--timing', action='store_true', help='시작 시간 단계별 출력 (첫 gaze까지)')
+    parser.add_argument('--detect-every', type=int, default=1,
+                        help='FaceMesh를 N프레임마다 실행, 사이는 눈 랜드마크 optical flow 추적 (1 = 매 프레임)')
+    parser.add_argument('--landmark-width', type=int, default=None,
+                        help='FaceMesh 입력을 이 너비로 축소 (예: 640, 눈 crop은 원본 해상도)')
+    parser.add_argument('--face-crop', action='store_true',
+                        help='직전 얼굴 주변만 잘라서 FaceMesh 실행')
+    parser.add_argument('--render-fps', type=float, default=None,
+                        help='화면 렌더 빈도 상한 (기본: 제한 없음, 추론 속도와 별개)')
+    parser.add_argument('--filter', choices=FILTERS, default='kalman',
+                        help='시선 필터 (kalman: 지연만큼 앞을 예측, one_euro, none)')
+    parser.add_argument('--filter-lead', type=float, default=0.0,
+                        help='측정된 파이프라인 지연 외에 더 예측할 화면 표시 지연 (ms)')
+    parser.add_argument('--saccade-px', type=float, default=150.0,
+                        help='이보다 크게 점프하면 saccade로 보고 필터를 바로 새 위치로 (0 = 끔)')
+    args = parser.parse_args()
+
+    timer = StartupTimer(args.timing, t0=_T_START)
+    timer.mark('imports')
+    tracker = ScreenGazeTracker(model_path=args.model, backend=args.backend, num_threads=args.threads,
+                                timer=timer, detect_every=args.detect_every,
+                                landmark_width=args.landmark_width, face_crop=args.face_crop,
+                                render_fps=args.render_fps, gaze_filter=args.filter,
+                                filter_lead=args.filter_lead / 1000.0, saccade_px=args.saccade_px)
+    if args.pipelined:
+        tracker.run_pipelined()
+    else:
+        tracker.run()
\ No newline at end of file
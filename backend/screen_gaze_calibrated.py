@@ -1,275 +1,525 @@
 # screen_gaze_robust.py
+import time
+_T_START = time.perf_counter()  # --timing 기준 (import 시간 포함)
+import os
+import argparse
 import cv2
-import torch
 import numpy as np
-import mediapipe as mp
-from model import GazeNet
-import screeninfo
+from calibration import (save_calibration, load_calibration, calibration_grid, quick_points, head_features,
+                         calibration_error, CalibrationSession, ProfileStore, RLSCalibration, FixationDetector)
+from gaze_engine import GazeEngine
+from gaze_filter import FILTERS, create_filter
+from landmarker import create_landmarker
+from overlay import OverlayRenderer
+from startup import StartupTimer, create_face_mesh, open_camera, primary_screen_size
 from collections import deque
 
 class RobustGazeTracker:
-    def __init__(self, model_path='best_model.pth'):
-        self.model = GazeNet()
-        self.model.load_state_dict(torch.load(model_path, map_location='cpu'))
-        self.model.eval()
-        
-        screen = screeninfo.get_monitors()[0]
-        self.screen_w = screen.width
-        self.screen_h = screen.height
-        
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        
-        self.LEFT_EYE = [362, 385, 387, 263, 373, 380]
-        self.RIGHT_EYE = [33, 160, 158, 133, 153, 144]
+    def __init__(self, model_path='best_model.pth', backend=None, num_threads=None, timer=None,
+                 detect_every=1, landmark_width=None, face_crop=False, render_fps=None,
+                 calibration_path=None, camera_index=0, user_id=None, profiles_dir='calibration_profiles',
+                 poly=False, use_head=False, implicit=True, forgetting=0.99, max_implicit_error=150,
+                 max_validation_error=(1.5, 20.0),
+                 gaze_filter='kalman', filter_lead=0.0, saccade_px=150.0, publisher=None):
+        self.timer = timer or StartupTimer()
+        
+        # 모델 로드 / MediaPipe / 웹캠 / 화면 해상도를 동시에 초기화
+        ready = self.timer.parallel({
+            'model': lambda: GazeEngine(model_path, backend=backend, num_threads=num_threads),
+            'face_mesh': create_face_mesh,
+            'camera': lambda: open_camera(camera_index),
+            'screen': primary_screen_size,
+        })
+        self.engine = ready['model']
+        self.face_mesh = ready['face_mesh']
+        self.cap = ready['camera']
+        self.screen_w, self.screen_h = ready['screen']
+        self.landmarker = create_landmarker(self.face_mesh, detect_every,
+                                            landmark_width=landmark_width, face_crop=face_crop)
         
         # 캘리브레이션 데이터
         self.calib_gazes = []
         self.calib_points = []
+        self.calib_heads = []
         self.is_calibrated = False
-        
-        # 변환 행렬 (x, y 각각)
-        self.transform_x = None
-        self.transform_y = None
-        
-        # 스무딩
-        self.ema_x = None
-        self.ema_y = None
-        
-        self.cap = None
-    
-    def get_eye_rect(self, landmarks, eye_indices, frame_shape):
-        h, w = frame_shape[:2]
-        points = []
-        for idx in eye_indices:
-            x = int(landmarks[idx].x * w)
-            y = int(landmarks[idx].y * h)
-            points.append((x, y))
-        
-        points = np.array(points)
-        x_min, y_min = points.min(axis=0)
-        x_max, y_max = points.max(axis=0)
-        
-        padding_w = int((x_max - x_min) * 0.3)
-        padding_h = int((y_max - y_min) * 0.5)
-        
-        x_min = max(0, x_min - padding_w)
-        y_min = max(0, y_min - padding_h)
-        x_max = min(w, x_max + padding_w)
-        y_max = min(h, y_max + padding_h)
-        
-        return x_min, y_min, x_max, y_max
-    
-    def preprocess_eye(self, eye_img):
-        if len(eye_img.shape) == 3:
-            eye_img = cv2.cvtColor(eye_img, cv2.COLOR_BGR2GRAY)
-        eye_img = cv2.resize(eye_img, (60, 36))
-        eye_img = eye_img.astype(np.float32) / 255.0
-        eye_tensor = torch.from_numpy(eye_img).unsqueeze(0).unsqueeze(0)
-        return eye_tensor
+        self.calibration = None  # 진행 중인 CalibrationSession
+        self.calibration_mode = None  # 'full' (25점) / 'quick' (캐시된 프로필 위에 3~5점 보정)
+        
+        # gaze (+ 머리 위치) → 화면 변환 (RLS, 점이 들어올 때마다 바로 갱신)
+        self.poly = poly
+        self.use_head = use_head
+        self.model = None
+        self._calib_model = None  # full 캘리브레이션 중 채워지는 새 모델
+        self.last_head = None  # 최근 프레임의 head_features
+        
+        # 사용 중 암묵적 샘플 (클릭 / 목표 위 고정 시선) → forgetting으로 드리프트 보정
+        self.implicit = implicit
+        self.forgetting = forgetting
+        self.max_implicit_error = max_implicit_error  # 예측과 이보다(px) 멀면 다른 곳을 본 것으로 보고 버림
+        # 저장 전 검증: 명시적 캘리브레이션 점 오차가 (배율, px) → 기존 오차 × 배율 + px 이하여야 저장
+        self.max_validation_error = max_validation_error
+        self.implicit_targets = []  # 앱이 알려주는 화면 목표 (x, y), 근처 고정 시선을 샘플로 씀 (set_implicit_targets)
+        self.target_radius = 60
+        self.fixations = FixationDetector()
+        self.recent = deque(maxlen=8)  # 최근 (gaze, head), 클릭 직전 시선
+        self._click = None
+        self.implicit_samples = 0
+        
+        # 캘리브레이션이 끝나면 저장할 경로 (batch_video.py --calibration 으로 재사용)
+        self.calibration_path = calibration_path
+        
+        # 스무딩 + 지연 보상 (화면 좌표에서, gaze_filter.py)
+        self.gaze_filter = create_filter(gaze_filter, lead=filter_lead, saccade_px=saccade_px)
+        
+        # 사용자 / 카메라 / 화면별 프로필: 있으면 바로 불러와서 캘리브레이션 생략
+        self.camera_index = camera_index
+        self.user_id = user_id
+        self.profiles = ProfileStore(profiles_dir)
+        if user_id is not None:
+            profile = self.profiles.load(user_id, camera_index, (self.screen_w, self.screen_h))
+            if profile is not None:
+                self.apply_calibration(profile)
+                print(f"프로필 불러옴: {user_id} (cam{camera_index}, {self.screen_w}x{self.screen_h}) "
+                      f"→ 'r'로 빠른 보정")
+        
+        # 렌더 빈도 상한 (추론은 카메라 속도 그대로)
+        self.render_fps = render_fps
+        
+        # 캔버스 서버로 시선 점 전송 (gaze_publisher.GazePublisher, 없으면 None)
+        self.publisher = publisher
     
     def get_current_gaze(self, frame):
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.face_mesh.process(rgb_frame)
-        
-        if not results.multi_face_landmarks:
+        # FaceMesh 검출 또는 (detect_every > 1이면) 사이 프레임 optical flow 추적
+        landmarks = self.landmarker.process(frame)
+        if landmarks is None:
             return None
+        self.observe_head(landmarks, frame.shape)
         
-        landmarks = results.multi_face_landmarks[0].landmark
-        gazes = []
-        
-        for eye_indices in [self.LEFT_EYE, self.RIGHT_EYE]:
-            x1, y1, x2, y2 = self.get_eye_rect(landmarks, eye_indices, frame.shape)
-            eye_img = frame[y1:y2, x1:x2]
-            
-            if eye_img.size == 0:
-                continue
-            
-            eye_tensor = self.preprocess_eye(eye_img)
-            with torch.no_grad():
-                gaze = self.model(eye_tensor).numpy()[0]
-            gazes.append(gaze)
-        
-        if gazes:
-            return np.mean(gazes, axis=0)
-        return None
+        # 양쪽 눈 한 번에 추론 → 평균 (눈이 없으면 None)
+        return self.engine.estimate(frame, landmarks).gaze
     
-    def collect_gaze_robust(self, n=30):
-        """n개 샘플, 이상치 제거 후 평균"""
-        samples = []
-        for _ in range(n):
-            ret, frame = self.cap.read()
-            frame = cv2.flip(frame, 1)
-            gaze = self.get_current_gaze(frame)
-            if gaze is not None:
-                samples.append(gaze)
-        
-        if len(samples) < 10:
-            return None
-        
-        samples = np.array(samples)
-        
-        # 각 축별 이상치 제거 (상하위 10% 제거)
-        result = []
-        for axis in range(3):
-            values = samples[:, axis]
-            lower = np.percentile(values, 10)
-            upper = np.percentile(values, 90)
-            filtered = values[(values >= lower) & (values <= upper)]
-            result.append(filtered.mean() if len(filtered) > 0 else values.mean())
-        
-        return np.array(result)
+    def observe_head(self, landmarks, frame_shape):
+        self.last_head = None if landmarks is None else head_features(landmarks, frame_shape)
     
-    def calibrate(self):
-        if self.cap is None:
-            self.cap = cv2.VideoCapture(0)
-        
-        margin = 80
-        
-        # 5x5 = 25포인트 그리드
-        rows, cols = 5, 5
-        points = []
-        for r in range(rows):
-            for c in range(cols):
-                px = margin + c * (self.screen_w - 2 * margin) // (cols - 1)
-                py = margin + r * (self.screen_h - 2 * margin) // (rows - 1)
-                points.append((px, py))
-        
-        cv2.namedWindow('Calibration', cv2.WND_PROP_FULLSCREEN)
-        cv2.setWindowProperty('Calibration', cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
-        
-        self.calib_gazes = []
-        self.calib_points = []
-        
-        for i, (px, py) in enumerate(points):
-            # 3초 카운트다운 + 자동 수집
-            for countdown in range(3, 0, -1):
-                screen = np.zeros((self.screen_h, self.screen_w, 3), dtype=np.uint8)
-                cv2.circle(screen, (px, py), 25, (0, 255, 0), -1)
-                cv2.circle(screen, (px, py), 30, (255, 255, 255), 3)
-                cv2.putText(screen, f"Point {i+1}/{len(points)}: Look at dot... {countdown}", 
-                           (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-                cv2.imshow('Calibration', screen)
-                
-                # 1초 대기 (프레임 소비하면서)
-                for _ in range(30):
-                    ret, frame = self.cap.read()
-                    cv2.waitKey(33)
-            
-            # 데이터 수집
-            screen = np.zeros((self.screen_h, self.screen_w, 3), dtype=np.uint8)
-            cv2.circle(screen, (px, py), 25, (0, 0, 255), -1)  # 빨간색 = 수집중
-            cv2.putText(screen, f"Collecting...", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-            cv2.imshow('Calibration', screen)
-            cv2.waitKey(1)
-            
-            gaze = self.collect_gaze_robust(30)
-            if gaze is not None:
-                self.calib_gazes.append(gaze)
-                self.calib_points.append([px, py])
-                print(f"Point {i+1} OK: gaze={gaze}")
+    def start_calibration(self, now=None, quick=False):
+        """
+        캘리브레이션 시작 (트래킹 루프는 계속 돌고 프레임마다 step_calibration으로 진행)
+        quick: 이미 캘리브레이션된 상태에서 5점만 모아 기존 변환을 보정
+        """
+        if quick and self.is_calibrated:
+            self.calibration_mode = 'quick'
+            points = quick_points(self.screen_w, self.screen_h, n=5)
+        else:
+            self.calibration_mode = 'full'
+            points = calibration_grid(self.screen_w, self.screen_h, rows=5, cols=5, margin=80)
+            self._calib_model = RLSCalibration(poly=self.poly, head=self.use_head)
+        self.calibration = CalibrationSession(points, now=time.perf_counter() if now is None else now)
+        print(f"캘리브레이션 시작 ({self.calibration_mode}, {len(points)} points)")
+    
+    def cancel_calibration(self):
+        # 만들던 모델은 버리고 기존 모델(프로필 / 이전 캘리브레이션) 유지
+        self.calibration = None
+        self._calib_model = None
+        print("캘리브레이션 취소")
+    
+    def step_calibration(self, gaze, now):
+        """현재 프레임 gaze로 캘리브레이션 진행, 모든 점이 끝나면 변환 계산"""
+        session = self.calibration
+        if session is None:
+            return
+        index, n_failed = session.index, len(session.failed)
+        session.update(gaze, now, self.last_head)
+        if session.index != index:
+            if len(session.failed) == n_failed:
+                print(f"Point {index+1} OK: gaze={session.calib_gazes[-1]}")
+                if self.calibration_mode == 'full':
+                    # 점 하나 끝날 때마다 RLS 갱신 (마지막에 전체 재계산 없음)
+                    self._calib_model.update(session.calib_gazes[-1], session.calib_points[-1],
+                                             session.calib_heads[-1])
             else:
-                print(f"Point {i+1} FAILED")
-        
-        cv2.destroyWindow('Calibration')
-        
-        # 변환 행렬 계산
-        if len(self.calib_gazes) >= 9:
-            self._compute_transform()
+                print(f"Point {index+1} FAILED")
+        if not session.done:
+            return
+        
+        self.calibration = None
+        new_model, self._calib_model = self._calib_model, None  # 실패해도 반쯤 만든 모델이 남지 않게
+        
+        if self.calibration_mode == 'quick':
+            # 기존 변환 위에 화면 공간 affine 보정 (3점 이상 성공해야 적용, 보정 결과가 새 anchor)
+            if len(session.calib_gazes) < 3:
+                print("빠른 보정 실패 (기존 캘리브레이션 유지)")
+                return
+            self.model.correct(session.calib_gazes, session.calib_points, session.calib_heads)
+            print(f"빠른 보정 완료! ({len(session.calib_gazes)} points)")
+        else:
+            if len(session.calib_gazes) < 9:
+                print("캘리브레이션 실패 (기존 캘리브레이션 유지)")
+                return
+            # 명시적 캘리브레이션 점은 full 성공 때만 교체 (빠른 보정 / 취소 / 실패는 이전 25점 유지)
+            self.calib_gazes = session.calib_gazes
+            self.calib_points = session.calib_points
+            self.calib_heads = session.calib_heads
+            self.model = new_model
+            self.model.anchor()  # 이후 암묵적 갱신의 기준
             self.is_calibrated = True
-            self.ema_x = None
-            self.ema_y = None
             print(f"캘리브레이션 완료! ({len(self.calib_gazes)} points)")
-            return True
         
-        print("캘리브레이션 실패")
-        return False
+        self.gaze_filter.reset()
+        self.save_results(len(session.calib_gazes), self.calibration_mode)
     
-    def _compute_transform(self):
-        """최소자승법으로 gaze → screen 변환"""
-        G = np.array(self.calib_gazes)  # (N, 3)
-        P = np.array(self.calib_points)  # (N, 2)
-        
-        # [gaze_x, gaze_y, gaze_z, 1] → screen_x or screen_y
-        G_bias = np.hstack([G, np.ones((G.shape[0], 1))])  # (N, 4)
-        
-        # 각 축 따로 계산
-        self.transform_x, _, _, _ = np.linalg.lstsq(G_bias, P[:, 0], rcond=None)
-        self.transform_y, _, _, _ = np.linalg.lstsq(G_bias, P[:, 1], rcond=None)
+    def save_results(self, n_points, method):
+        """현재 모델을 --calibration 파일 / 사용자 프로필에 저장"""
+        if self.calibration_path:
+            self.save_calibration(self.calibration_path)
+        if self.user_id is not None:
+            path = self.profiles.save(self.user_id, self.camera_index, (self.screen_w, self.screen_h),
+                                      self.model, n_points=n_points, method=method,
+                                      samples=self._explicit_samples())
+            print(f"프로필 저장: {path}")
+    
+    def draw_calibration(self, overlay):
+        """캘리브레이션 목표 점 (초록 = 시선 이동 대기, 빨강 = 수집중 + 진행률 링)"""
+        session = self.calibration
+        px, py = session.current_point
+        if session.collecting:
+            overlay.circle((px, py), 25, (0, 0, 255), -1)
+            overlay.circle((px, py), 32, (80, 80, 80), 3)
+            end_angle = int(360 * session.progress())
+            if end_angle > 0:
+                overlay.arc((px, py), 32, 0, end_angle, (255, 255, 255), 3)
+        else:
+            overlay.circle((px, py), 25, (0, 255, 0), -1)
+            overlay.circle((px, py), 30, (255, 255, 255), 3)
+        overlay.text(f"Point {session.index+1}/{len(session.points)}: Look at dot (ESC = cancel)",
+                     (50, 90), 1, (255, 255, 255), 2)
+    
+    def add_implicit_sample(self, gaze, point, head=None):
+        """
+        사용 중 얻은 (gaze, 실제로 본 화면 점) 하나를 forgetting과 함께 RLS에 반영
+        예측과 max_implicit_error(px) 넘게 떨어지면 다른 곳을 보고 있었던 것으로 보고 버림
+        """
+        if not self.is_calibrated or self.calibration is not None:
+            return False
+        error = np.linalg.norm(np.asarray(point, dtype=np.float64) - self.model.predict(gaze, head))
+        if error > self.max_implicit_error:
+            return False
+        self.model.update(gaze, point, head, forgetting=self.forgetting)
+        self.implicit_samples += 1
+        return True
+    
+    def set_implicit_targets(self, targets, radius=None):
+        """
+        앱이 지금 화면에 띄운 목표 (버튼, 글자 등) 의 (x, y) 목록 → 근처 고정 시선을 암묵적 샘플로 씀
+        radius: 고정 시선 중심이 목표에서 이만큼(px) 안이면 그 목표를 본 것으로 봄
+        """
+        self.implicit_targets = [tuple(target) for target in targets]
+        if radius is not None:
+            self.target_radius = radius
+        self.fixations = FixationDetector()  # 이전 목표 때의 고정 구간은 버림
+    
+    def on_mouse(self, event, x, y, flags, param):
+        if event == cv2.EVENT_LBUTTONDOWN:
+            self._click = (x, y)  # 다음 프레임에서 처리 (최근 gaze와 짝지음)
+    
+    def learn_implicit(self, gaze, point, now):
+        """클릭 위치 / implicit_targets 근처 고정 시선 → 암묵적 캘리브레이션 샘플"""
+        if gaze is not None:
+            self.recent.append((gaze, self.last_head))
+        if not self.implicit:
+            return
+        
+        # 클릭: 클릭 직전 몇 프레임 gaze 평균 ↔ 클릭 위치
+        if self._click is not None and self.recent:
+            click, self._click = self._click, None
+            gaze_mean = np.mean([g for g, _ in self.recent], axis=0)
+            heads = [h for _, h in self.recent if h is not None]
+            self.add_implicit_sample(gaze_mean, click, np.mean(heads, axis=0) if heads else None)
+        
+        # 고정 시선이 앱 목표 근처면 그 목표를 본 것으로 봄
+        if gaze is None or point is None or not self.implicit_targets:
+            return
+        fixation = self.fixations.update(now, point, gaze, self.last_head)
+        if fixation is None:
+            return
+        center, gaze_mean, head_mean = fixation
+        targets = np.asarray(self.implicit_targets, dtype=np.float64)
+        distances = np.linalg.norm(targets - center, axis=1)
+        nearest = int(np.argmin(distances))
+        if distances[nearest] <= self.target_radius:
+            self.add_implicit_sample(gaze_mean, targets[nearest], head_mean)
+    
+    def _explicit_samples(self):
+        """명시적 캘리브레이션 점 (다음 실행에서 암묵적 갱신을 검증할 때 씀)"""
+        heads = self.calib_heads if len(self.calib_heads) == len(self.calib_gazes) else []
+        return {
+            'gazes': np.asarray(self.calib_gazes, dtype=np.float64).tolist(),
+            'points': np.asarray(self.calib_points, dtype=np.float64).tolist(),
+            'heads': [None if h is None else np.asarray(h, dtype=np.float64).tolist() for h in heads],
+        }
+    
+    def validate_implicit(self):
+        """
+        암묵적 갱신 후 모델이 명시적 캘리브레이션 점에서 anchor보다 크게 나빠지지 않았는지
+        (점이 없으면 검증할 수 없으므로 False)
+        """
+        if not self.calib_points:
+            return False
+        heads = self.calib_heads if len(self.calib_heads) == len(self.calib_gazes) else None
+        if self.model.head and (heads is None or any(h is None for h in heads)):
+            return False  # 머리 위치 특징이 없는 점이 있으면 검증 불가
+        anchor_error = calibration_error(self.model.anchor_model(), self.calib_gazes, self.calib_points, heads)
+        error = calibration_error(self.model, self.calib_gazes, self.calib_points, heads)
+        scale, slack = self.max_validation_error
+        print(f"명시적 캘리브레이션 점 오차: {anchor_error:.1f}px → {error:.1f}px")
+        return error <= anchor_error * scale + slack
+    
+    def save_calibration(self, path):
+        save_calibration(path, self.model, (self.screen_w, self.screen_h),
+                         n_points=len(self.calib_gazes), samples=self._explicit_samples())
+        print(f"캘리브레이션 저장: {path}")
+    
+    def load_calibration(self, path):
+        self.apply_calibration(load_calibration(path))
+    
+    def apply_calibration(self, calib):
+        """불러온 캘리브레이션 dict (load_calibration / ProfileStore.load) 적용"""
+        if calib['screen_size'] != (self.screen_w, self.screen_h):
+            print(f"경고: 캘리브레이션 화면 {calib['screen_size']} != 현재 화면 {(self.screen_w, self.screen_h)}")
+        self.model = RLSCalibration.from_calibration(calib)
+        samples = calib.get('samples') or {}
+        self.calib_gazes = [np.asarray(g, dtype=np.float64) for g in samples.get('gazes', [])]
+        self.calib_points = [tuple(p) for p in samples.get('points', [])]
+        self.calib_heads = [None if h is None else np.asarray(h, dtype=np.float64) for h in samples.get('heads', [])]
+        self.is_calibrated = True
+        self.gaze_filter.reset()
     
     def gaze_to_screen(self, gaze):
         if not self.is_calibrated:
             return self.screen_w // 2, self.screen_h // 2
         
-        gaze_bias = np.append(gaze, 1)
-        screen_x = np.dot(gaze_bias, self.transform_x)
-        screen_y = np.dot(gaze_bias, self.transform_y)
+        screen_x, screen_y = self.model.predict(gaze, self.last_head)
         
         screen_x = np.clip(screen_x, 0, self.screen_w)
         screen_y = np.clip(screen_y, 0, self.screen_h)
         
         return int(screen_x), int(screen_y)
     
-    def smooth_screen(self, x, y):
-        if self.ema_x is None:
-            self.ema_x = x
-            self.ema_y = y
-            return x, y
-        
-        alpha = 0.2
-        self.ema_x = alpha * x + (1 - alpha) * self.ema_x
-        self.ema_y = alpha * y + (1 - alpha) * self.ema_y
+    def update(self, gaze, t_capture):
+        """
+        gaze → 필터된 화면 좌표 (렌더 여부와 상관없이 추론마다 호출, 없으면 None)
+        t_capture: 프레임 캡처 시각, 지금까지의 지연만큼 앞을 예측해서 돌려줌
+        """
+        if gaze is None:
+            return None
+        point = self.gaze_filter.update(self.gaze_to_screen(gaze), t_capture, time.perf_counter())
+        point = (int(np.clip(point[0], 0, self.screen_w)), int(np.clip(point[1], 0, self.screen_h)))
         
-        return int(self.ema_x), int(self.ema_y)
+        # 캘리브레이션된 점만 전송 (캘리브레이션 중에는 보내지 않음)
+        if self.publisher is not None and self.is_calibrated and self.calibration is None:
+            self.publisher.publish(*point)
+        return point
+    
+    def render(self, overlay, frame, point):
+        """시선 점 + 상태 + 웹캠 미리보기 (지난번에 그린 영역만 지우고 다시 그림)"""
+        overlay.clear()
+        
+        if point is not None:
+            overlay.circle(point, 20, (0, 255, 0), -1)
+        
+        if self.calibration is not None:
+            self.draw_calibration(overlay)
+        elif self.implicit:
+            for target in self.implicit_targets:
+                overlay.circle((int(target[0]), int(target[1])), 10, (255, 200, 0), 2)
+        
+        status = "CALIBRATED" if self.is_calibrated else "Press 'c'"
+        overlay.text(status, (20, 40), 1, (255, 255, 255), 2)
+        if self.publisher is not None:
+            overlay.text("LIVE" if self.publisher.connected else "OFFLINE", (20, 130), 0.8,
+                         (0, 255, 0) if self.publisher.connected else (0, 0, 255), 2)
+        
+        overlay.image(frame, self.screen_w - 220, 20, size=(200, 150))
     
     def run(self):
-        if self.cap is None:
-            self.cap = cv2.VideoCapture(0)
-        
         cv2.namedWindow('Gaze', cv2.WND_PROP_FULLSCREEN)
         cv2.setWindowProperty('Gaze', cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+        cv2.setMouseCallback('Gaze', self.on_mouse)
+        
+        print("'c' = 캘리브레이션, 'r' = 빠른 보정, ESC = 캘리브레이션 취소, 'q' = 종료")
         
-        print("'c' = 캘리브레이션, 'q' = 종료")
+        overlay = OverlayRenderer(self.screen_w, self.screen_h, max_fps=self.render_fps)
         
         while self.cap.isOpened():
             ret, frame = self.cap.read()
             if not ret:
                 break
             
+            t_capture = time.perf_counter()
             frame = cv2.flip(frame, 1)
-            screen = np.zeros((self.screen_h, self.screen_w, 3), dtype=np.uint8)
-            
+            self.timer.first('first_frame')
             gaze = self.get_current_gaze(frame)
+            if gaze is not None and self.timer.first('first_gaze'):
+                self.timer.report()
+            point = self.update(gaze, t_capture)
+            self.step_calibration(gaze, t_capture)
+            self.learn_implicit(gaze, point, t_capture)
             
-            if gaze is not None:
-                raw_x, raw_y = self.gaze_to_screen(gaze)
-                screen_x, screen_y = self.smooth_screen(raw_x, raw_y)
-                
-                cv2.circle(screen, (screen_x, screen_y), 20, (0, 255, 0), -1)
+            if overlay.due():
+                self.render(overlay, frame, point)
+                overlay.show('Gaze')
             
-            status = "CALIBRATED" if self.is_calibrated else "Press 'c'"
-            cv2.putText(screen, status, (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord('q'):
+                break
+            elif key == ord('c') and self.calibration is None:
+                self.start_calibration()
+            elif key == ord('r') and self.calibration is None:
+                self.start_calibration(quick=True)
+            elif key == 27 and self.calibration is not None:  # ESC
+                self.cancel_calibration()
+        
+        self.finish()
+        self.cap.release()
+        cv2.destroyAllWindows()
+    
+    def finish(self):
+        """종료 시 암묵적 샘플로 갱신된 모델 저장 (명시적 캘리브레이션 점으로 검증한 뒤)"""
+        if not (self.implicit_samples and self.is_calibrated):
+            return
+        print(f"암묵적 샘플 {self.implicit_samples}개 반영")
+        if not self.validate_implicit():
+            print("암묵적 갱신이 명시적 캘리브레이션과 맞지 않음 → 저장하지 않음")
+            return
+        self.save_results(self.model.n_samples, 'implicit')
+    
+    def run_pipelined(self):
+        """캡처 / FaceMesh / 추론을 별도 스레드로 돌리고 여기서는 렌더만"""
+        from pipeline import GazePipeline
+        
+        cv2.namedWindow('Gaze', cv2.WND_PROP_FULLSCREEN)
+        cv2.setWindowProperty('Gaze', cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+        cv2.setMouseCallback('Gaze', self.on_mouse)
+        
+        print("'c' = 캘리브레이션, 'r' = 빠른 보정, ESC = 캘리브레이션 취소, 'q' = 종료 (파이프라인 모드)")
+        
+        overlay = OverlayRenderer(self.screen_w, self.screen_h, max_fps=self.render_fps)
+        pipeline = GazePipeline(self.cap, self.landmarker, self.engine).start()
+        
+        while pipeline.running:
+            packet = pipeline.get(timeout=0.1)
+            if packet is None:
+                continue
+            render_start = time.perf_counter()
             
-            small = cv2.resize(frame, (200, 150))
-            screen[20:170, self.screen_w-220:self.screen_w-20] = small
+            gaze = packet.result.gaze if packet.result is not None else None
+            self.observe_head(packet.landmarks, packet.frame.shape)
+            self.timer.first('first_frame')
+            if gaze is not None and self.timer.first('first_gaze'):
+                self.timer.report()
+            point = self.update(gaze, packet.t_capture)
+            self.step_calibration(gaze, packet.t_capture)
+            self.learn_implicit(gaze, point, packet.t_capture)
             
-            cv2.imshow('Gaze', screen)
+            if overlay.due():
+                self.render(overlay, packet.frame, point)
+                
+                # 지연시간 / 단계별 시간 / 큐 깊이
+                overlay.text(pipeline.stats_text(), (20, self.screen_h - 20), 0.6, (200, 200, 200), 1)
+                if self.publisher is not None:
+                    overlay.text(self.publisher.stats_text(), (20, self.screen_h - 50), 0.6, (200, 200, 200), 1)
+                
+                overlay.show('Gaze')
+                pipeline.mark_rendered(packet, render_start)
             
             key = cv2.waitKey(1) & 0xFF
             if key == ord('q'):
                 break
-            elif key == ord('c'):
-                self.calibrate()
-        
+            elif key in (ord('c'), ord('r')) and self.calibration is None:
+                # 캘리브레이션도 파이프라인 결과로 진행 (멈추지 않음)
+                self.start_calibration(packet.t_capture, quick=key == ord('r'))
+            elif key == 27 and self.calibration is not None:  # ESC
+                self.cancel_calibration()
+        
+        self.finish()
+        pipeline.stop()
         self.cap.release()
         cv2.destroyAllWindows()
 
 
 if __name__ == "__main__":
-    tracker = RobustGazeTracker()
-    tracker.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', default='best_model.pth',
+                        help='.pth, 동결/int8 등 .pt (freeze_model.py, quantize.py), .onnx (export_onnx.py)')
+    parser.add_argument('--backend', choices=['torch', 'onnx'], default=None,
+                        help='추론 백엔드 (기본: 모델 확장자로 결정)')
+    parser.add_argument('--threads', type=int, default=None, help='추론 스레드 수')
+    parser.add_argument('--pipelined', action='store_true',
+                        help='캡처/랜드마크/추론을 스레드 파이프라인으로 실행')
+    parser.add_argument('--timing', action='store_true', help='시작 시간 단계별 출력 (첫 gaze까지)')
+    parser.add_argument('--detect-every', type=int, default=1,
+                        help='FaceMesh를 N프레임마다 실행, 사이는 눈 랜드마크 optical flow 추적 (1 = 매 프레임)')
+    parser.add_argument('--landmark-width', type=int, default=None,
+                        help='FaceMesh 입력을 이 너비로 축소 (예: 640, 눈 crop은 원본 해상도)')
+    parser.add_argument('--face-crop', action='store_true',
+                        help='직전 얼굴 주변만 잘라서 FaceMesh 실행')
+    parser.add_argument('--render-fps', type=float, default=None,
+                        help='화면 렌더 빈도 상한 (기본: 제한 없음, 추론 속도와 별개)')
+    parser.add_argument('--calibration', default=None,
+                        help='캘리브레이션 JSON: 있으면 불러오고, 새로 캘리브레이션하면 여기에 저장')
+    parser.add_argument('--camera', type=int, default=0, help='카메라 인덱스')
+    parser.add_argument('--user', default=None,
+                        help='사용자 ID: 사용자/카메라/화면별 프로필을 불러오고 캘리브레이션 후 저장')
+    parser.add_argument('--profiles-dir', default='calibration_profiles')
+    parser.add_argument('--poly', action='store_true', help='캘리브레이션에 2차 항 (gx², gy², gx·gy) 추가')
+    parser.add_argument('--head-features', action='store_true',
+                        help='캘리브레이션에 머리 위치 (눈 중심, 눈 간격) 특징 추가')
+    parser.add_argument('--no-implicit', action='store_true',
+                        help='사용 중 클릭 / 고정 시선으로 캘리브레이션을 갱신하지 않음')
+    parser.add_argument('--implicit-target', type=int, nargs=2, action='append', default=[], metavar=('X', 'Y'),
+                        help='화면 목표 (여러 번 지정 가능): 근처를 고정해서 보면 암묵적 캘리브레이션 샘플로 씀')
+    parser.add_argument('--forgetting', type=float, default=0.99,
+                        help='암묵적 샘플의 RLS forgetting factor (작을수록 최근 샘플 비중 큼)')
+    parser.add_argument('--filter', choices=FILTERS, default='kalman',
+                        help='시선 필터 (kalman: 지연만큼 앞을 예측, one_euro, none)')
+    parser.add_argument('--filter-lead', type=float, default=0.0,
+                        help='측정된 파이프라인 지연 외에 더 예측할 화면 표시 지연 (ms)')
+    parser.add_argument('--saccade-px', type=float, default=150.0,
+                        help='이보다 크게 점프하면 saccade로 보고 필터를 바로 새 위치로 (0 = 끔)')
+    parser.add_argument('--publish', default=None, metavar='URL',
+                        help='캔버스 서버 (server.js, 예: http://localhost:3000) 로 시선 점 전송')
+    parser.add_argument('--publish-rate', type=float, default=30.0, help='초당 전송 배치 수')
+    parser.add_argument('--publish-json', action='store_true', help='binary 대신 JSON 배치로 전송')
+    parser.add_argument('--paint', action='store_true', help='시선으로 캔버스에 브러시 그리기')
+    args = parser.parse_args()
+
+    publisher = None
+    if args.publish:
+        from gaze_publisher import GazePublisher
+        publisher = GazePublisher(args.publish, rate=args.publish_rate, binary=not args.publish_json,
+                                  paint=args.paint, nickname=args.user)
+
+    timer = StartupTimer(args.timing, t0=_T_START)
+    timer.mark('imports')
+    tracker = RobustGazeTracker(model_path=args.model, backend=args.backend, num_threads=args.threads,
+                                timer=timer, detect_every=args.detect_every,
+                                landmark_width=args.landmark_width, face_crop=args.face_crop,
+                                render_fps=args.render_fps, calibration_path=args.calibration,
+                                camera_index=args.camera, user_id=args.user, profiles_dir=args.profiles_dir,
+                                poly=args.poly, use_head=args.head_features, implicit=not args.no_implicit,
+                                forgetting=args.forgetting, gaze_filter=args.filter,
+                                filter_lead=args.filter_lead / 1000.0, saccade_px=args.saccade_px,
+                                publisher=publisher)
+    if args.calibration and os.path.exists(args.calibration):
+        tracker.load_calibration(args.calibration)
+    tracker.set_implicit_targets(args.implicit_target)
+    if publisher is not None:
+        publisher.screen_size = (tracker.screen_w, tracker.screen_h)
+        publisher.start()
+    try:
+        if args.pipelined:
+            tracker.run_pipelined()
+        else:
+            tracker.run()
+    finally:
+        if publisher is not None:
+            publisher.stop()
\ No newline at end of file
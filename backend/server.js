@@ -25,23 +25,125 @@ app.get('/', (req, res) => {
 const canvasHistory = [];
 const MAX_HISTORY = 1000;
 
+// 캔버스 크기 (art_multiplayer.html의 artCanvas) / 브러시 움직임 임계값 (script_mupliplayer.js와 같음)
+const CANVAS_WIDTH = 1920;
+const CANVAS_HEIGHT = 1080;
+const MOVEMENT_THRESHOLD = 8;
+
+// 사용자 포인터 색
+const USER_COLORS = ['#FF6B6B', '#4ECDC4', '#FFD93D', '#6BCB77', '#A66CFF', '#FF9F45'];
+let userCount = 0;
+
+// 접속 중인 사용자 (socket.id → user)
+const users = new Map();
+
+function broadcastUserList() {
+  io.emit('user-list', Array.from(users.values()).map((u) => ({ id: u.userId, color: u.color, nickname: u.nickname })));
+}
+
+function pushHistory(stroke) {
+  canvasHistory.push(stroke);
+  if (canvasHistory.length > MAX_HISTORY) {
+    canvasHistory.shift();
+  }
+}
+
+// Python 트래커 (backend/gaze_publisher.py) 의 시선 배치 해석
+// binary: header (version u8, flags u8, screen_w u16, screen_h u16, n u16, t0 f64) + 점마다 (dt_ms u16, x u16, y u16)
+function decodeGazeBatch(data) {
+  if (Buffer.isBuffer(data)) {
+    const n = data.readUInt16LE(6);
+    const points = [];
+    for (let i = 0; i < n; i++) {
+      const offset = 16 + i * 6;
+      points.push([data.readUInt16LE(offset + 2), data.readUInt16LE(offset + 4)]);
+    }
+    return {
+      paint: (data.readUInt8(1) & 1) === 1,
+      screenWidth: data.readUInt16LE(2),
+      screenHeight: data.readUInt16LE(4),
+      points,
+    };
+  }
+  return {
+    paint: Boolean(data.paint),
+    screenWidth: data.screen[0],
+    screenHeight: data.screen[1],
+    points: data.points.map(([, x, y]) => [x, y]),
+  };
+}
+
 io.on('connection', (socket) => {
-  console.log(`✅ 사용자 접속 (총 ${io.engine.clientsCount}명)`);
+  const user = {
+    userId: socket.id,
+    color: USER_COLORS[userCount++ % USER_COLORS.length],
+    nickname: (socket.handshake.auth && socket.handshake.auth.nickname) || `user-${socket.id.slice(0, 4)}`,
+  };
+  let lastBrush = null;  // Python 트래커 브러시의 마지막 점 (캔버스 좌표)
+  users.set(socket.id, user);
+  console.log(`✅ 사용자 접속: ${user.nickname} (총 ${io.engine.clientsCount}명)`);
 
-  // 기존 캔버스 내용 전송
-  socket.emit('welcome', canvasHistory);
+  // 내 정보 + 기존 캔버스 내용 전송 (script_mupliplayer.js의 welcome 핸들러 형식)
+  socket.emit('welcome', {
+    userId: user.userId,
+    userColor: user.color,
+    nickname: user.nickname,
+    canvasHistory,
+  });
+  socket.broadcast.emit('user-joined', user);
+  broadcastUserList();
 
   // 브러시 스트로크 수신 및 브로드캐스트
   socket.on('brush-stroke', (data) => {
     // 히스토리에 저장
-    canvasHistory.push(data);
-    if (canvasHistory.length > MAX_HISTORY) {
-      canvasHistory.shift();
-    }
+    pushHistory(data);
     // 다른 사용자들에게 전송
     socket.broadcast.emit('brush-stroke', data);
   });
 
+  // 시선 위치 (브라우저 WebGazer, 캔버스 좌표) → 다른 사용자 포인터
+  socket.on('gaze-position', (data) => {
+    socket.broadcast.emit('gaze-position', { ...user, x: data.x, y: data.y });
+  });
+
+  // 시선 배치 (Python 트래커): 마지막 점은 포인터로, paint면 점들을 브러시 스트로크로
+  socket.on('gaze-batch', (data, ack) => {
+    let batch;
+    try {
+      batch = decodeGazeBatch(data);
+    } catch (err) {
+      if (typeof ack === 'function') ack(false);
+      return;
+    }
+    // 트래커 화면 좌표 → 캔버스 좌표 (포인터, 브러시 모두)
+    const scaleX = CANVAS_WIDTH / batch.screenWidth;
+    const scaleY = CANVAS_HEIGHT / batch.screenHeight;
+    if (batch.points.length > 0) {
+      const [x, y] = batch.points[batch.points.length - 1];
+      socket.broadcast.emit('gaze-position', { ...user, x: x * scaleX, y: y * scaleY });
+    }
+
+    if (batch.paint) {
+      batch.points.forEach(([x, y]) => {
+        const cx = x * scaleX;
+        const cy = y * scaleY;
+        if (lastBrush === null) {
+          lastBrush = [cx, cy];
+          return;
+        }
+        if (Math.hypot(cx - lastBrush[0], cy - lastBrush[1]) >= MOVEMENT_THRESHOLD) {
+          const stroke = { x1: lastBrush[0], y1: lastBrush[1], x2: cx, y2: cy };
+          pushHistory(stroke);
+          io.emit('brush-stroke', stroke);
+          lastBrush = [cx, cy];
+        }
+      });
+    }
+
+    // ack → 보낸 쪽이 다음 배치 전송 (backpressure)
+    if (typeof ack === 'function') ack(true);
+  });
+
   // 캔버스 리셋
   socket.on('reset-canvas', () => {
     canvasHistory.length = 0;
@@ -51,7 +153,10 @@ io.on('connection', (socket) => {
 
   // 연결 해제
   socket.on('disconnect', () => {
-    console.log(`❌ 사용자 퇴장 (총 ${io.engine.clientsCount}명)`);
+    users.delete(socket.id);
+    socket.broadcast.emit('user-left', user);
+    broadcastUserList();
+    console.log(`❌ 사용자 퇴장: ${user.nickname} (총 ${io.engine.clientsCount}명)`);
   });
 });
 
@@ -0,0 +1,95 @@
+# startup.py
+# 트래커 시작 시간 단축: 무거운 초기화를 스레드로 겹쳐 실행 + 단계별 시간 측정 (--timing)
+import time
+import threading
+
+
+def create_face_mesh(max_num_faces=1):
+    """MediaPipe FaceMesh (mediapipe는 여기서 처음 import)"""
+    import mediapipe as mp
+
+    return mp.solutions.face_mesh.FaceMesh(
+        max_num_faces=max_num_faces,
+        refine_landmarks=True,  # 눈 주변 상세 랜드마크
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+
+def open_camera(index=0):
+    import cv2
+
+    return cv2.VideoCapture(index)
+
+
+def primary_screen_size():
+    """첫 번째 모니터 해상도 (w, h) (screeninfo는 여기서 처음 import)"""
+    import screeninfo
+
+    screen = screeninfo.get_monitors()[0]
+    return screen.width, screen.height
+
+
+class StartupTimer:
+    """
+    시작 시간 측정
+    - t0: 기준 시점 (스크립트 맨 위에서 잰 perf_counter, 없으면 생성 시점)
+    - parallel(): 여러 초기화를 스레드로 동시에 실행하고 각각 시간 기록
+    - first(): 첫 프레임 / 첫 gaze 등 처음 한 번만 기록
+    """
+
+    def __init__(self, enabled=False, t0=None):
+        self.enabled = enabled
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.stages = {}  # 이름 → 걸린 시간 (초)
+        self.marks = {}   # 이름 → t0 기준 시점 (초)
+        self._reported = False
+
+    def mark(self, name):
+        self.marks[name] = time.perf_counter() - self.t0
+
+    def first(self, name):
+        """처음 호출될 때만 기록 (새로 기록했으면 True)"""
+        if name in self.marks:
+            return False
+        self.mark(name)
+        return True
+
+    def parallel(self, tasks):
+        """
+        {이름: 함수} 를 스레드로 동시에 실행 → {이름: 결과}
+        - FaceMesh 초기화, 카메라 열기, 모델 로드는 대부분 C/C++ 안에서 GIL을 놓으므로 겹쳐짐
+        - 하나라도 예외가 나면 모두 끝난 뒤 그 예외를 다시 발생
+        """
+        results, errors = {}, {}
+
+        def run(name, fn):
+            start = time.perf_counter()
+            try:
+                results[name] = fn()
+            except BaseException as e:
+                errors[name] = e
+            self.stages[name] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=run, args=item, daemon=True) for item in tasks.items()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.stages['init (wall)'] = time.perf_counter() - start
+        self.mark('ready')
+
+        if errors:
+            raise next(iter(errors.values()))
+        return results
+
+    def report(self):
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        print("[timing] 시작 시간 (ms)")
+        for name, seconds in self.stages.items():
+            print(f"[timing]   {name:14s} {seconds * 1000:8.1f}")
+        for name, seconds in self.marks.items():
+            print(f"[timing]   → {name:12s} {seconds * 1000:8.1f} (시작부터)")
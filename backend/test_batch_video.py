@@ -0,0 +1,165 @@
+# test_batch_video.py
+# batch_video.py 단위 테스트 (합성 영상 + 무작위 가중치 모델, 가짜 FaceMesh) (python -m pytest -q test_batch_video.py)
+import os
+import csv
+import sys
+from types import SimpleNamespace
+import cv2
+import numpy as np
+import pytest
+import torch
+import batch_video
+from batch_video import (output_paths, write_table, check_format, add_screen_points, process_video,
+                         process_file, _EyeBatcher, HEAD_COLUMNS)
+from calibration import RLSCalibration, save_calibration, load_calibration
+from gaze_engine import GazeEngine
+from model import GazeNet
+
+W, H, N_FRAMES = 320, 240, 6
+
+
+def test_output_paths_use_video_names():
+    assert output_paths(['rec/a.mp4', 'rec/b.avi'], 'out', 'csv') == [
+        os.path.join('out', 'a_gaze.csv'), os.path.join('out', 'b_gaze.csv')]
+
+
+def test_output_paths_unique_for_same_file_names():
+    paths = output_paths(['a/session.mp4', 'b/session.mp4', 'c/other.mp4'], 'out', 'parquet')
+    assert [os.path.basename(p) for p in paths] == [
+        'a_session_gaze.parquet', 'b_session_gaze.parquet', 'other_gaze.parquet']
+
+    # 폴더 이름까지 같거나 같은 영상을 두 번 줘도 겹치지 않음
+    paths = output_paths(['x/a/session.mp4', 'y/a/session.mp4', 'x/a/session.mp4'], 'out', 'csv')
+    assert len(set(paths)) == 3
+
+
+def test_write_table_csv_blank_for_nan(tmp_path):
+    path = str(tmp_path / 'out.csv')
+    write_table(path, {'frame': np.arange(3), 'gaze_x': np.array([0.5, np.nan, -1.0])})
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows == [['frame', 'gaze_x'], ['0', '0.5'], ['1', ''], ['2', '-1.0']]
+
+
+def test_parquet_needs_pandas_and_pyarrow(monkeypatch, tmp_path):
+    check_format('csv')
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)  # import pyarrow → ImportError
+    with pytest.raises(ImportError, match='--format csv'):
+        check_format('parquet')
+    with pytest.raises(ImportError):
+        write_table(str(tmp_path / 'out.parquet'), {'frame': np.arange(2)})
+    assert not os.path.exists(tmp_path / 'out.parquet')
+
+
+def test_parquet_round_trip(tmp_path):
+    pd = pytest.importorskip('pandas')
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / 'out.parquet')
+    write_table(path, {'frame': np.arange(3), 'gaze_x': np.array([0.5, np.nan, -1.0])})
+    table = pd.read_parquet(path)
+    assert list(table.columns) == ['frame', 'gaze_x']
+    assert np.isnan(table['gaze_x'][1]) and table['gaze_x'][2] == -1.0
+
+
+def head_calibration(tmp_path):
+    """head 특징을 쓰는 RLS 캘리브레이션 JSON (screen = 1000·gx + 500 + 2000·head_x, ...)"""
+    rng = np.random.default_rng(0)
+    model = RLSCalibration(head=True)
+    for _ in range(40):
+        gaze, head = rng.normal(0, 0.2, 3), rng.normal(0, 0.05, 3)
+        model.update(gaze, (1000 * gaze[0] + 500 + 2000 * head[0], 800 * gaze[1] + 400), head)
+    path = str(tmp_path / 'calib.json')
+    save_calibration(path, model, (1000, 800), n_points=40)
+    return path
+
+
+def test_add_screen_points_uses_head_columns(tmp_path):
+    calib = load_calibration(head_calibration(tmp_path))
+    columns = {'gaze_x': np.array([0.1, 0.1, np.nan, 2.0]), 'gaze_y': np.array([0.0, 0.0, 0.0, 0.0]),
+               'gaze_z': np.array([-1.0, -1.0, -1.0, -1.0]),
+               'head_x': np.array([0.0, 0.05, 0.0, 0.0]), 'head_y': np.zeros(4), 'head_eye_dist': np.full(4, 0.1)}
+    add_screen_points(columns, calib)
+    # 같은 gaze라도 머리 위치가 다르면 다른 점, gaze가 NaN이면 NaN, 화면 밖은 잘림
+    np.testing.assert_allclose(columns['screen_x'][:2], [600, 700], atol=1.0)
+    np.testing.assert_allclose(columns['screen_y'][:2], [400, 400], atol=1.0)
+    assert np.isnan(columns['screen_x'][2]) and np.isnan(columns['screen_y'][2])
+    assert columns['screen_x'][3] == 1000
+
+
+def test_eye_batcher_maps_outputs_back_to_frames():
+    # backend 출력 = 입력 밝기 → 어느 프레임 / 눈으로 돌아갔는지 확인
+    engine = SimpleNamespace(backend=lambda batch: np.repeat(batch.mean(axis=(1, 2, 3))[:, None], 3, axis=1))
+    gazes = {i: np.full((2, 3), np.nan) for i in range(3)}
+    batcher = _EyeBatcher(engine, 2, gazes)
+    for frame_idx, eye_idx in [(0, 0), (0, 1), (1, 1), (2, 0), (2, 1)]:
+        batcher.add(frame_idx, eye_idx, np.full((10, 20), 10 * (2 * frame_idx + eye_idx + 1), dtype=np.uint8))
+    assert len(batcher.slots) == 1  # 2개씩 forward, 마지막 하나는 flush 전
+    batcher.flush()
+    expected = np.array([[10, 20], [np.nan, 40], [50, 60]]) / 255
+    np.testing.assert_allclose(np.array([gazes[i][:, 0] for i in range(3)]), expected, atol=1e-6)
+
+
+class AlternatingFaceMesh:
+    """0, 2, 4, ... 번째 프레임에서만 얼굴 (화면 가운데 격자 랜드마크)"""
+
+    def __init__(self):
+        self.calls = 0
+        self.landmark = [SimpleNamespace(x=0.3 + 0.4 * (i % 18) / 17, y=0.3 + 0.4 * (i // 18) / 25)
+                         for i in range(468)]
+
+    def process(self, rgb):
+        self.calls += 1
+        faces = [SimpleNamespace(landmark=self.landmark)] if self.calls % 2 == 1 else None
+        return SimpleNamespace(multi_face_landmarks=faces)
+
+
+@pytest.fixture
+def video_setup(tmp_path, monkeypatch):
+    """무작위 프레임 영상 + 무작위 가중치 모델, FaceMesh는 가짜"""
+    video_path = str(tmp_path / 'clip.avi')
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'MJPG'), 10.0, (W, H))
+    for i in range(N_FRAMES):
+        writer.write(np.random.default_rng(i).integers(0, 256, (H, W, 3), dtype=np.uint8))
+    writer.release()
+
+    torch.manual_seed(0)
+    model_path = str(tmp_path / 'model.pth')
+    torch.save(GazeNet().state_dict(), model_path)
+    monkeypatch.setattr(batch_video, 'create_face_mesh', AlternatingFaceMesh)
+    return video_path, model_path
+
+
+def test_process_video_matches_per_frame_estimate(video_setup):
+    video_path, model_path = video_setup
+    columns, fps = process_video(video_path, model_path, batch_size=3)
+    assert fps == pytest.approx(10.0)
+    np.testing.assert_array_equal(columns['frame'], np.arange(N_FRAMES))
+    np.testing.assert_array_equal(columns['face'], [1, 0] * (N_FRAMES // 2))
+
+    # 프레임을 넘나드는 배치 forward = 프레임별 GazeEngine.estimate (좌우 반전한 프레임)
+    engine, face_mesh = GazeEngine(model_path), AlternatingFaceMesh()
+    cap = cv2.VideoCapture(video_path)
+    for i in range(N_FRAMES):
+        frame = cv2.flip(cap.read()[1], 1)
+        face = face_mesh.process(frame)
+        gaze = [columns[f'gaze_{axis}'][i] for axis in 'xyz']
+        if face.multi_face_landmarks is None:
+            assert np.isnan(gaze).all() and np.isnan([columns[name][i] for name in HEAD_COLUMNS]).all()
+            continue
+        result = engine.estimate(frame, face.multi_face_landmarks[0].landmark)
+        np.testing.assert_allclose(gaze, result.gaze, atol=1e-5)
+        np.testing.assert_allclose([columns[f'left_{axis}'][i] for axis in 'xyz'], result.eyes[0][2], atol=1e-5)
+        assert np.isfinite([columns[name][i] for name in HEAD_COLUMNS]).all()
+    cap.release()
+
+
+def test_process_file_writes_table_with_screen_points(video_setup, tmp_path):
+    video_path, model_path = video_setup
+    out_path = str(tmp_path / 'clip_gaze.csv')
+    summary = process_file(video_path, out_path, head_calibration(tmp_path), model_path=model_path, max_frames=4)
+    assert summary['frames'] == 4 and summary['face_rate'] == 0.5 and summary['out'] == out_path
+
+    with open(out_path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 4 and 'screen_x' in rows[0]
+    assert [row['screen_x'] == '' for row in rows] == [False, True, False, True]
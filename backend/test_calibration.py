@@ -0,0 +1,181 @@
+# test_calibration.py
+# calibration.py 단위 테스트 (python -m pytest -q test_calibration.py)
+import numpy as np
+import pytest
+from calibration import (RLSCalibration, CalibrationSession, FixationDetector, ProfileStore, apply_calibration,
+                         calibration_grid, quick_points)
+
+SCREEN = (1920, 1080)
+GRID = calibration_grid(*SCREEN)
+CORNERS = [(100, 100), (1820, 100), (100, 980), (1820, 980)]
+
+
+def gaze_for(point):
+    """화면 점 → 그 점을 볼 때의 gaze (선형 + gz에 약간의 x 의존)"""
+    gx = (point[0] - SCREEN[0] / 2) / 3000
+    gy = -(point[1] - SCREEN[1] / 2) / 2000
+    return np.array([gx, gy, -1 + 0.05 * gx])
+
+
+def grid_error(model):
+    return np.mean([np.linalg.norm(model.predict(gaze_for(p)) - p) for p in GRID])
+
+
+def calibrated_model(rng, noise=0.002):
+    model = RLSCalibration()
+    for point in GRID:
+        model.update(gaze_for(point) + rng.normal(0, noise, 3), point)
+    model.anchor()
+    return model
+
+
+def add_implicit(model, rng, targets, n, noise, gate=150.0, forgetting=0.99):
+    """screen_gaze_calibrated.add_implicit_sample과 같은 방식 (예측 오차 gate + forgetting)"""
+    for i in range(n):
+        point = np.asarray(targets[i % len(targets)], dtype=np.float64)
+        gaze = gaze_for(point) + rng.normal(0, noise, 3)
+        if np.linalg.norm(model.predict(gaze) - point) <= gate:
+            model.update(gaze, point, forgetting=forgetting)
+
+
+def test_rls_matches_batch_least_squares():
+    rng = np.random.default_rng(0)
+    model = RLSCalibration(poly=True)
+    gazes = np.stack([gaze_for(p) + rng.normal(0, 0.002, 3) for p in GRID])
+    for gaze, point in zip(gazes, GRID):
+        model.update(gaze, point)
+
+    X = np.stack([model.features(g) for g in gazes])
+    theta, _, _, _ = np.linalg.lstsq(X, np.asarray(GRID, dtype=np.float64), rcond=None)
+    np.testing.assert_allclose(model.predict_many(gazes), X @ theta, atol=0.5)
+    assert model.n_samples == len(GRID)
+
+
+def test_rls_converges_on_noiseless_samples():
+    model = RLSCalibration()
+    for point in GRID:
+        model.update(gaze_for(point), point)
+    assert grid_error(model) < 1.0
+    # 다시 넣어도 예측 오차 (반환값) 가 거의 0
+    assert np.abs(model.update(gaze_for(GRID[0]), GRID[0])).max() < 1.0
+
+
+def test_correct_removes_screen_offset():
+    model = calibrated_model(np.random.default_rng(0))
+    model.theta[3] += [60.0, -40.0]  # 카메라가 움직여 생긴 오프셋
+    points = quick_points(*SCREEN)
+    model.correct([gaze_for(p) for p in points], points)
+    assert grid_error(model) < 5.0
+    np.testing.assert_allclose(model.anchor_theta, model.theta)
+
+
+def test_clustered_implicit_samples_keep_grid_error_bounded():
+    for targets, n, noise in [(CORNERS, 400, 0.002), (CORNERS, 400, 0.005), ([(960, 540)], 1000, 0.005)]:
+        rng = np.random.default_rng(0)
+        model = calibrated_model(rng)
+        before = grid_error(model)
+        trace_limit = np.trace(np.linalg.inv(model.anchor_info))
+
+        add_implicit(model, rng, targets, n, noise)
+
+        assert grid_error(model) < before + 10.0
+        # 공분산이 명시적 캘리브레이션보다 커지지 않음 (windup 없음)
+        assert np.trace(model.P) <= trace_limit * (1 + 1e-6)
+
+
+def test_head_model_requires_head_features():
+    rng = np.random.default_rng(0)
+    model = RLSCalibration(head=True)
+    for point in GRID:
+        model.update(gaze_for(point), point, head=rng.normal(0, 0.05, 3))
+    calib = {'model': model.state_dict(), 'screen_size': SCREEN}
+
+    gazes = np.stack([gaze_for(p) for p in GRID[:2]])
+    with pytest.raises(ValueError):
+        apply_calibration(calib, gazes)
+    # 얼굴이 없는 프레임 (head NaN) → 화면 좌표도 NaN, 0으로 채우지 않음
+    points = apply_calibration(calib, gazes, np.array([[0.0, 0.0, 0.1], [np.nan] * 3]))
+    assert np.isfinite(points[0]).all() and np.isnan(points[1]).all()
+
+
+def test_calibration_session_collects_each_point():
+    points = calibration_grid(*SCREEN, rows=3, cols=3)
+    session = CalibrationSession(points, settle_s=0.5, min_samples=5, max_samples=10, timeout_s=2.0)
+    rng = np.random.default_rng(0)
+    t = 0.0
+    while not session.done and t < 60.0:
+        point = session.current_point
+        session.update(None if point is None else gaze_for(point) + rng.normal(0, 0.001, 3), t)
+        t += 1 / 30
+
+    assert session.done and not session.failed
+    assert session.calib_points == [list(p) for p in points]
+    for gaze, point in zip(session.calib_gazes, points):
+        np.testing.assert_allclose(gaze, gaze_for(point), atol=0.002)
+
+
+def test_calibration_session_averages_head_features_over_the_window():
+    session = CalibrationSession([(100, 100), (200, 200)], settle_s=0.0, min_samples=5, max_samples=10,
+                                 timeout_s=1.0)
+    head = np.array([0.05, -0.02, 0.12])
+    offsets = iter([0.0, 0.01, -0.01, 0.0, 0.01, -0.02])  # settle 1프레임 + 수집 5프레임
+    t = 0.0
+    while session.index == 0:
+        session.update(gaze_for((100, 100)), t, head + next(offsets))
+        t += 1 / 30
+    # 점을 끝낸 프레임 (-0.02) 값이 아니라 수집 구간의 trimmed mean
+    assert len(session.calib_heads) == 1
+    np.testing.assert_allclose(session.calib_heads[0], head + 0.0025)  # -0.02는 하위 10%로 빠짐
+
+    while not session.done:
+        session.update(gaze_for((200, 200)), t)  # 머리 특징 없음 → None
+        t += 1 / 30
+    assert session.calib_heads[1] is None
+
+
+def test_calibration_session_fails_point_without_face():
+    session = CalibrationSession([(100, 100), (200, 200)], settle_s=0.1, min_samples=5, timeout_s=1.0)
+    t = 0.0
+    while session.index == 0:
+        session.update(None, t)  # 얼굴 없음 → timeout
+        t += 1 / 30
+    assert session.failed == [(100, 100)]
+    assert t < 1.5
+
+
+def test_profile_round_trip(tmp_path):
+    store = ProfileStore(str(tmp_path))
+    assert store.load('alice', 0, SCREEN) is None
+
+    model = calibrated_model(np.random.default_rng(0))
+    path = store.save('alice', 0, SCREEN, model, n_points=len(GRID), samples={'gazes': [], 'points': []})
+    assert path.startswith(str(tmp_path))
+
+    calib = store.load('alice', 0, SCREEN)
+    assert calib['screen_size'] == SCREEN and calib['method'] == 'full' and calib['n_points'] == len(GRID)
+    loaded = RLSCalibration.from_calibration(calib)
+    np.testing.assert_allclose(loaded.theta, model.theta)
+    np.testing.assert_allclose(loaded.P, model.P)
+    np.testing.assert_allclose(loaded.anchor_theta, model.anchor_theta)
+    # 다른 카메라 / 화면은 다른 프로필
+    assert store.load('alice', 1, SCREEN) is None
+    assert store.load('alice', 0, (1280, 720)) is None
+
+
+def test_fixation_detector_emits_once_per_fixation():
+    detector = FixationDetector(max_dispersion=80.0, min_duration=0.3)
+    gaze = np.zeros(3)
+    emitted = []
+    for i in range(30):  # 0.5초 동안 (500, 500) 근처
+        t = i / 60
+        result = detector.update(t, (500 + i % 3, 500), gaze)
+        if result is not None:
+            emitted.append((t, result))
+    assert len(emitted) == 1
+    t, (center, _, head) = emitted[0]
+    assert t >= 0.3 and head is None
+    np.testing.assert_allclose(center, (501, 500), atol=1.0)
+
+    # 다른 곳으로 이동 → 새 고정
+    results = [detector.update(0.5 + i / 60, (1200, 300), gaze) for i in range(30)]
+    assert sum(r is not None for r in results) == 1
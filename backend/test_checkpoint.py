@@ -0,0 +1,90 @@
+# test_checkpoint.py
+# checkpoint.py 단위 테스트 (python -m pytest -q test_checkpoint.py)
+import os
+import threading
+import numpy as np
+import pytest
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from checkpoint import (AsyncCheckpointer, EarlyStopping, capture_state, cpu_copy, get_rng_states,
+                        set_rng_states, load_checkpoint, restore_state)
+
+
+def test_cpu_copy_is_a_snapshot():
+    weight = torch.ones(3)
+    state = cpu_copy({'w': weight, 'list': [weight], 'tuple': (weight, 1)})
+    weight.add_(1)
+    assert state['w'].tolist() == [1, 1, 1] and state['list'][0].tolist() == [1, 1, 1]
+    assert state['tuple'][1] == 1
+
+
+def test_rng_states_round_trip():
+    states = get_rng_states()
+    expected = (torch.rand(3), np.random.rand(3))
+    set_rng_states(states)
+    torch.testing.assert_close(torch.rand(3), expected[0])
+    np.testing.assert_array_equal(np.random.rand(3), expected[1])
+
+
+def test_checkpoint_round_trip(tmp_path):
+    model = nn.Linear(4, 2)
+    optimizer = optim.Adam(model.parameters())
+    scheduler = optim.lr_scheduler.ReduceLROnPlateau(optimizer)
+    model(torch.randn(5, 4)).sum().backward()
+    optimizer.step()
+
+    path = str(tmp_path / 'checkpoint.pth')
+    checkpointer = AsyncCheckpointer(path)
+    checkpointer.save(capture_state(model, optimizer, scheduler, epoch=2, step=7, rng=get_rng_states()))
+    checkpointer.close()
+    assert not os.path.exists(path + '.tmp')
+
+    state = load_checkpoint(path)
+    assert state['epoch'] == 2 and state['step'] == 7
+    restored = nn.Linear(4, 2)
+    restored_optimizer = optim.Adam(restored.parameters())
+    restore_state(state, restored, restored_optimizer, optim.lr_scheduler.ReduceLROnPlateau(restored_optimizer))
+    torch.testing.assert_close(restored.weight, model.weight)
+    assert restored_optimizer.state_dict()['state'][0]['step'] == 1
+
+
+def test_checkpointer_keeps_only_latest_pending(tmp_path, monkeypatch):
+    path = str(tmp_path / 'checkpoint.pth')
+    checkpointer = AsyncCheckpointer(path)
+    written = []
+    started, release = threading.Event(), threading.Event()
+    real_write = checkpointer._write
+
+    def slow_write(state):
+        started.set()
+        release.wait(5)
+        written.append(state['step'])
+        real_write(state)
+
+    monkeypatch.setattr(checkpointer, '_write', slow_write)
+    checkpointer.save({'step': 0})
+    assert started.wait(5)
+    for step in range(1, 5):
+        checkpointer.save({'step': step})  # 저장 중에 들어온 스냅샷 → 기다리지 않고 최신 것만 남김
+    release.set()
+    checkpointer.close()
+    assert written == [0, 4]
+    assert load_checkpoint(path)['step'] == 4
+
+
+def test_checkpointer_reports_write_errors(tmp_path):
+    checkpointer = AsyncCheckpointer(str(tmp_path / 'missing' / 'checkpoint.pth'))
+    checkpointer.save({'step': 1})
+    with pytest.raises(OSError):
+        checkpointer.close()
+
+
+def test_early_stopping():
+    stopping = EarlyStopping(patience=2, min_delta=0.1)
+    assert [stopping.step(v) for v in [5.0, 4.0, 3.95, 3.99]] == [False, False, False, True]
+
+    restored = EarlyStopping(patience=2)
+    restored.load_state_dict({'best': 4.0, 'bad_epochs': 1})
+    assert restored.step(4.5)
+    assert not any(EarlyStopping(patience=0).step(v) for v in [1.0, 2.0, 3.0])  # 0이면 사용 안 함
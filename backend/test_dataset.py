@@ -0,0 +1,209 @@
+# test_dataset.py
+# dataset.py 단위 테스트 (가짜 MPIIGaze .mat, conftest.mpiigaze_root) (python -m pytest -q test_dataset.py)
+import json
+import os
+import numpy as np
+import pytest
+import torch
+import dataset
+from torch.utils.data import DataLoader, Subset
+from dataset import MPIIGazeDataset, MPIIGazeStream, IndexBatchSampler, batch_loader, build_cache, _read_mat
+
+SUBJECTS = {'p00': [8, 5], 'p01': [6]}  # 피험자 → day별 샘플 수 (눈마다)
+
+
+def raw_samples(root, subjects=SUBJECTS, eye='both'):
+    """.mat을 직접 읽은 (images, gazes) (데이터셋과 같은 순서: 피험자 → day → 오른쪽 → 왼쪽 눈)"""
+    images, gazes = [], []
+    for subject_id, counts in subjects.items():
+        for day in range(len(counts)):
+            for img, gz in _read_mat(os.path.join(root, subject_id, f'day{day + 1:02d}.mat'), eye):
+                images.append(img)
+                gazes.append(gz)
+    return np.concatenate(images), np.concatenate(gazes).astype(np.float32)
+
+
+def test_cache_matches_mat_loading(mpiigaze_root, tmp_path):
+    root = mpiigaze_root(SUBJECTS)
+    in_memory = MPIIGazeDataset(root, subject_ids=list(SUBJECTS))
+    cached = MPIIGazeDataset(root, subject_ids=list(SUBJECTS), cache_dir=str(tmp_path / 'cache'))
+    assert len(in_memory) == len(cached) == 2 * (8 + 5 + 6)
+    assert cached.subject_range('p01') == (26, 38)
+
+    images, gazes = raw_samples(root)
+    for idx in [0, 12, 25, 26, len(cached) - 1]:
+        image, gaze = cached[idx]
+        assert image.shape == (1, 36, 60) and image.dtype == torch.float32
+        np.testing.assert_allclose(image[0].numpy(), images[idx] / 255.0, rtol=1e-6)
+        np.testing.assert_array_equal(gaze.numpy(), gazes[idx])
+        torch.testing.assert_close(in_memory[idx][1], gaze)
+
+
+def test_cache_is_rebuilt_only_for_changed_subjects(mpiigaze_root, tmp_path, monkeypatch):
+    root = mpiigaze_root(SUBJECTS)
+    cache_dir = str(tmp_path / 'cache')
+    index = build_cache(root, cache_dir, list(SUBJECTS))
+    with open(os.path.join(cache_dir, 'both', 'index.json')) as f:
+        assert json.load(f)['subjects']['p00']['count'] == 26
+    assert index['subjects']['p01']['count'] == 12
+
+    ingested = []
+    real_ingest = dataset._ingest
+
+    def recording_ingest(mat_paths, *args, **kwargs):
+        ingested.append(mat_paths)
+        return real_ingest(mat_paths, *args, **kwargs)
+
+    monkeypatch.setattr(dataset, '_ingest', recording_ingest)
+
+    build_cache(root, cache_dir, list(SUBJECTS))
+    assert ingested == []  # 그대로면 다시 읽지 않음
+
+    # p01 원본이 바뀜 (크기 / mtime) → p01만 다시 변환
+    mpiigaze_root({'p01': [9]})
+    index = build_cache(root, cache_dir, list(SUBJECTS))
+    assert [[os.path.basename(os.path.dirname(p)) for p in paths] for paths in ingested] == [['p01']]
+    assert index['subjects']['p01']['count'] == 18
+    assert len(MPIIGazeDataset(root, list(SUBJECTS), cache_dir=cache_dir)) == 26 + 18
+
+
+def test_cache_version_change_invalidates_index(mpiigaze_root, tmp_path, monkeypatch):
+    root = mpiigaze_root(SUBJECTS)
+    cache_dir = str(tmp_path / 'cache')
+    build_cache(root, cache_dir, list(SUBJECTS))
+    monkeypatch.setattr(dataset, 'CACHE_VERSION', dataset.CACHE_VERSION + 1)
+    assert dataset._load_index(os.path.join(cache_dir, 'both', 'index.json'))['subjects'] == {}
+
+
+def test_negative_and_out_of_range_indices(mpiigaze_root, tmp_path):
+    cached = MPIIGazeDataset(mpiigaze_root(SUBJECTS), list(SUBJECTS), cache_dir=str(tmp_path / 'cache'))
+    torch.testing.assert_close(cached[-1][1], cached[len(cached) - 1][1])
+    torch.testing.assert_close(cached[-len(cached)][1], cached[0][1])
+    for idx in [len(cached), -len(cached) - 1]:
+        with pytest.raises(IndexError):
+            cached[idx]
+
+
+def test_get_batch_matches_getitem_across_shards(mpiigaze_root, tmp_path):
+    root = mpiigaze_root(SUBJECTS)
+    for cache_dir in [None, str(tmp_path / 'cache')]:
+        ds = MPIIGazeDataset(root, list(SUBJECTS), cache_dir=cache_dir)
+        indices = np.array([37, 0, 25, 26, 3, 30])  # 두 피험자 shard에 걸침, 순서 섞임
+        images, gazes = ds.get_batch(indices)
+        assert images.shape == (6, 1, 36, 60) and images.dtype == torch.float32
+        for row, idx in enumerate(indices):
+            image, gaze = ds[int(idx)]
+            torch.testing.assert_close(images[row], image)
+            torch.testing.assert_close(gazes[row], gaze)
+
+
+def test_index_batch_sampler_batches():
+    sampler = IndexBatchSampler(np.arange(10) * 2, batch_size=4)
+    assert [b.tolist() for b in sampler] == [[0, 2, 4, 6], [8, 10, 12, 14], [16, 18]]
+    assert len(sampler) == 3
+
+    sampler = IndexBatchSampler(np.arange(10), batch_size=4, drop_last=True)
+    assert [len(b) for b in sampler] == [4, 4] and len(sampler) == 2
+
+    sampler = IndexBatchSampler(np.arange(10), batch_size=4, shuffle=True,
+                                generator=torch.Generator().manual_seed(0))
+    batches = list(sampler)
+    assert sorted(np.concatenate(batches).tolist()) == list(range(10))
+    assert np.concatenate(batches).tolist() != list(range(10))
+
+
+def test_batch_loader_on_subset(mpiigaze_root, tmp_path):
+    ds = MPIIGazeDataset(mpiigaze_root(SUBJECTS), list(SUBJECTS), cache_dir=str(tmp_path / 'cache'))
+    subset = Subset(ds, list(range(20, 38)))
+    loader = batch_loader(subset, batch_size=8)
+    batches = list(loader)
+    assert [len(gazes) for _, gazes in batches] == [8, 8, 2]
+    gazes = torch.cat([g for _, g in batches])
+    torch.testing.assert_close(gazes, ds.get_batch(np.arange(20, 38))[1])
+
+    with pytest.raises(ValueError):
+        batch_loader(MPIIGazeDataset(mpiigaze_root(SUBJECTS), list(SUBJECTS), transform=lambda x: x), 8)
+
+
+def test_parallel_ingest_matches_serial(mpiigaze_root):
+    root = mpiigaze_root({'p00': [8, 5], 'p01': [6], 'p02': [3, 4]})
+    mat_paths = [os.path.join(root, subject_id, mat_file) for subject_id in ['p00', 'p01', 'p02']
+                 for mat_file in sorted(os.listdir(os.path.join(root, subject_id)))]
+    serial = dataset._ingest(mat_paths, 'both', num_workers=0)
+    parallel = dataset._ingest(mat_paths, 'both', num_workers=3)
+
+    assert serial[2] == parallel[2] == [16, 10, 12, 6, 8]  # 파일별 샘플 수, 파일 순서대로
+    for a, b in zip(serial[:2], parallel[:2]):
+        assert a.dtype == b.dtype
+        np.testing.assert_array_equal(a, b)
+    assert parallel[0].dtype == np.uint8 and parallel[1].dtype == np.float32
+
+
+def test_parallel_cache_build_matches_serial(mpiigaze_root, tmp_path):
+    root = mpiigaze_root(SUBJECTS)
+    serial = MPIIGazeDataset(root, list(SUBJECTS), cache_dir=str(tmp_path / 'serial'))
+    parallel = MPIIGazeDataset(root, list(SUBJECTS), cache_dir=str(tmp_path / 'parallel'), ingest_workers=2)
+    indices = np.arange(len(serial))
+    for a, b in zip(serial.get_batch(indices), parallel.get_batch(indices)):
+        torch.testing.assert_close(a, b)
+
+
+def stream_gaze_z(stream):
+    """스트림이 내보낸 샘플의 gaze z (conftest에서 샘플 순번으로 넣은 값)"""
+    return torch.cat([gazes.reshape(-1, 3)[:, 2] for _, gazes in stream]).tolist()
+
+
+def test_stream_without_shuffle_keeps_file_order(mpiigaze_root):
+    root = mpiigaze_root(SUBJECTS)
+    stream = MPIIGazeStream(root, list(SUBJECTS), shuffle=False)
+    _, gazes = raw_samples(root)
+    assert stream_gaze_z(stream) == gazes[:, 2].tolist()
+
+
+def test_stream_shuffle_buffer_emits_every_sample_once(mpiigaze_root):
+    root = mpiigaze_root(SUBJECTS)
+    _, gazes = raw_samples(root)
+    stream = MPIIGazeStream(root, list(SUBJECTS), shuffle_buffer=10, seed=0)
+    emitted = stream_gaze_z(stream)
+    assert sorted(emitted) == sorted(gazes[:, 2].tolist())
+    assert emitted != gazes[:, 2].tolist()
+
+    assert stream_gaze_z(stream) == emitted  # 같은 seed / epoch → 같은 순서
+    stream.set_epoch(1)
+    assert stream_gaze_z(stream) != emitted
+
+
+def test_stream_batches(mpiigaze_root):
+    root = mpiigaze_root(SUBJECTS)
+    stream = MPIIGazeStream(root, list(SUBJECTS), shuffle_buffer=10, batch_size=8)
+    batches = list(stream)
+    assert all(images.shape[1:] == (1, 36, 60) for images, _ in batches)
+    assert sum(len(g) for _, g in batches) == 38
+    assert all(len(g) == 8 for _, g in batches[:-1])
+
+    stream = MPIIGazeStream(root, list(SUBJECTS), shuffle_buffer=10, batch_size=8, drop_last=True)
+    assert [len(g) for _, g in stream] == [8] * 4
+
+    with pytest.raises(ValueError):
+        MPIIGazeStream(root, batch_size=8, transform=lambda x: x)
+
+
+def test_stream_workers_split_shards(mpiigaze_root):
+    root = mpiigaze_root({'p00': [4, 4], 'p01': [4], 'p02': [4]})
+    stream = MPIIGazeStream(root, shuffle_buffer=4, batch_size=4)
+    loader = DataLoader(stream, batch_size=None, num_workers=2)
+    emitted = torch.cat([g[:, 2] for _, g in loader]).tolist()
+    assert sorted(emitted) == sorted(stream_gaze_z(MPIIGazeStream(root, shuffle=False)))
+
+
+def test_index_batch_sampler_start_batch_skips_once():
+    def batches(start_batch):
+        sampler = IndexBatchSampler(np.arange(10), batch_size=3, shuffle=True,
+                                    generator=torch.Generator().manual_seed(0), start_batch=start_batch)
+        return sampler, [b.tolist() for b in sampler]
+
+    _, full = batches(0)
+    sampler, resumed = batches(2)
+    assert resumed == full[2:]  # 같은 셔플 순서에서 앞 2개만 건너뜀
+    assert len(sampler) == 4 and sampler.start_batch == 0  # 다음 epoch는 처음부터
+    assert len(list(sampler)) == 4
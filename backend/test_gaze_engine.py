@@ -0,0 +1,86 @@
+# test_gaze_engine.py
+# gaze_engine.py 단위 테스트 (무작위 가중치 GazeNet, 가짜 랜드마크) (python -m pytest -q test_gaze_engine.py)
+from types import SimpleNamespace
+import numpy as np
+import pytest
+import torch
+from gaze_engine import GazeEngine, EyePreprocessor, preprocess_eye, LEFT_EYE, RIGHT_EYE
+from model import GazeNet
+
+W, H = 320, 240
+
+
+@pytest.fixture
+def engine(tmp_path):
+    torch.manual_seed(0)
+    path = str(tmp_path / 'model.pth')
+    torch.save(GazeNet().state_dict(), path)
+    return GazeEngine(path)
+
+
+def fake_landmarks(left=(0.65, 0.4), right=(0.35, 0.4), size=(0.08, 0.03)):
+    """눈 중심 주위 타원 위에 6점씩 놓인 468개 랜드마크 (정규화 좌표)"""
+    landmarks = [SimpleNamespace(x=0.5, y=0.5) for _ in range(468)]
+    for indices, (cx, cy) in ((LEFT_EYE, left), (RIGHT_EYE, right)):
+        for k, idx in enumerate(indices):
+            angle = 2 * np.pi * k / len(indices)
+            landmarks[idx] = SimpleNamespace(x=cx + size[0] * np.cos(angle), y=cy + size[1] * np.sin(angle))
+    return landmarks
+
+
+def random_frame(seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (H, W, 3), dtype=np.uint8)
+
+
+def forward_one(engine, eye_img):
+    with torch.no_grad():
+        return engine.backend.model(torch.from_numpy(preprocess_eye(eye_img))[None, None]).numpy()[0]
+
+
+def test_preprocessor_matches_preprocess_eye():
+    rng = np.random.default_rng(1)
+    crops = [rng.integers(0, 256, (20, 40, 3), dtype=np.uint8),
+             rng.integers(0, 256, (300, 500, 3), dtype=np.uint8),  # scratch 버퍼보다 큰 crop
+             rng.integers(0, 256, (30, 50), dtype=np.uint8)]       # 이미 gray
+    batch = EyePreprocessor()(crops)
+    assert batch.shape == (3, 1, 36, 60) and batch.dtype == np.float32
+    for i, crop in enumerate(crops):
+        np.testing.assert_array_equal(batch[i, 0], preprocess_eye(crop))
+
+
+def test_two_eye_batch_matches_per_eye_forward(engine):
+    frame, landmarks = random_frame(), fake_landmarks()
+    result = engine.estimate(frame, landmarks)
+
+    assert [name for name, _, _ in result.eyes] == ['Left', 'Right']
+    expected = []
+    for _, (x1, y1, x2, y2), gaze in result.eyes:
+        assert 0 <= x1 < x2 <= W and 0 <= y1 < y2 <= H
+        expected.append(forward_one(engine, frame[y1:y2, x1:x2]))
+        np.testing.assert_allclose(gaze, expected[-1], atol=1e-5)
+    np.testing.assert_allclose(result.gaze, np.mean(expected, axis=0), atol=1e-5)
+
+
+def test_empty_crop_is_skipped(engine):
+    # 왼쪽 눈이 프레임 밖 → crop이 비어 오른쪽 눈만 사용
+    landmarks = fake_landmarks(left=(1.5, 0.4))
+    result = engine.estimate(random_frame(), landmarks)
+    assert [name for name, _, _ in result.eyes] == ['Right']
+    np.testing.assert_allclose(result.gaze, result.eyes[0][2])
+
+    result = engine.estimate(random_frame(), fake_landmarks(left=(1.5, 0.4), right=(-0.5, 0.4)))
+    assert result.gaze is None and result.eyes == []
+
+
+def test_estimate_many_matches_estimate(engine):
+    faces = [(random_frame(0), fake_landmarks()),
+             (random_frame(1), fake_landmarks(left=(1.5, 1.5), right=(-0.5, -0.5))),  # 눈 없음
+             (random_frame(2), fake_landmarks(left=(0.6, 0.5), right=(0.3, 0.5)))]
+    results = engine.estimate_many(faces)
+    assert len(results) == 3 and results[1].gaze is None
+    for (frame, landmarks), result in zip(faces, results):
+        single = engine.estimate(frame, landmarks)
+        if single.gaze is None:
+            continue
+        np.testing.assert_allclose(result.gaze, single.gaze, atol=1e-5)
+        assert [rect for _, rect, _ in result.eyes] == [rect for _, rect, _ in single.eyes]
@@ -0,0 +1,95 @@
+# test_gaze_filter.py
+# gaze_filter.py 단위 테스트 (python -m pytest -q test_gaze_filter.py)
+import numpy as np
+import pytest
+from gaze_filter import KalmanFilter, OneEuroFilter, SaccadeDetector, RingBuffer, GazeFilter, create_filter
+
+FPS = 30.0
+
+
+def run(gaze_filter, points, fps=FPS):
+    return np.array([gaze_filter.update(point, i / fps) for i, point in enumerate(points)])
+
+
+def ramp(n, speed=300.0, fps=FPS):
+    """(100, 500)에서 오른쪽으로 speed px/s 등속 이동"""
+    return [(100 + speed * i / fps, 500.0) for i in range(n)]
+
+
+def test_ring_buffer_keeps_latest_in_order():
+    buffer = RingBuffer(3, 2)
+    assert len(buffer.values()) == 0 and not buffer.full()
+    for i in range(5):
+        buffer.append((i, -i))
+    assert buffer.full()
+    np.testing.assert_array_equal(buffer.values(), [[2, -2], [3, -3], [4, -4]])
+    buffer.clear()
+    assert buffer.count == 0
+
+
+def test_kalman_tracks_ramp_without_lag():
+    points = ramp(60)
+    kalman = KalmanFilter()
+    for i, point in enumerate(points):
+        kalman.update(point, i / FPS)
+    # 등속 운동 → 정상 상태에서 지연 없음, 속도도 추정
+    assert abs(kalman.state[0, 0] - points[-1][0]) < 2.0
+    assert abs(kalman.state[0, 1] - 300.0) < 10.0
+    # predict: 다음 프레임 위치로 외삽 (max_lead까지만)
+    assert abs(kalman.predict(60 / FPS)[0] - (points[-1][0] + 300.0 / FPS)) < 2.0
+    assert kalman.predict(10.0)[0] == pytest.approx(kalman.state[0, 0] + kalman.state[0, 1] * kalman.max_lead)
+
+
+def test_one_euro_lag_is_bounded_and_smooths_jitter():
+    points = ramp(60)
+    filtered = run(OneEuroFilter(), points)
+    lag = points[-1][0] - filtered[-1][0]
+    assert 0 < lag < 300.0 * 0.2  # 200ms 분량 미만
+
+    rng = np.random.default_rng(0)
+    noisy = [(500 + rng.normal(0, 10), 500 + rng.normal(0, 10)) for _ in range(120)]
+    smoothed = run(OneEuroFilter(), noisy)
+    assert smoothed[30:].std(axis=0).max() < np.std(noisy, axis=0).max() / 2
+
+
+@pytest.mark.parametrize('smoother', [KalmanFilter, OneEuroFilter])
+def test_step_response_without_saccade_detection_settles(smoother):
+    points = [(500.0, 500.0)] * 30 + [(900.0, 500.0)] * 60
+    filtered = run(GazeFilter(smoother()), points)
+    assert filtered[30, 0] < 900.0 - 50  # 점프 직후에는 번짐
+    assert abs(filtered[-1, 0] - 900.0) < 5.0
+
+
+def test_saccade_resets_filter_after_confirmation():
+    gaze_filter = create_filter('kalman', saccade_px=150.0)
+    run(gaze_filter, [(500.0, 500.0)] * 30)
+    first = gaze_filter.update((900.0, 500.0), 30 / FPS)
+    assert not gaze_filter.saccade and first[0] < 900.0 - 50  # 한 번은 확정 안 됨 → 번짐
+    # 새 위치 두 번째 측정에서 saccade 확정 → 필터를 새 위치로 리셋
+    second = gaze_filter.update((900.0, 500.0), 31 / FPS)
+    assert gaze_filter.saccade
+    np.testing.assert_allclose(second, (900.0, 500.0))
+
+
+def test_single_outlier_is_not_a_saccade():
+    detector = SaccadeDetector(distance=150.0, confirm=2)
+    filtered = np.array([500.0, 500.0])
+    assert not detector.update((500, 500), filtered)
+    assert not detector.update((900, 500), filtered)  # 튀는 값 하나
+    assert not detector.update((500, 500), filtered)  # 다음 측정이 돌아옴
+
+
+def test_saccade_threshold():
+    filtered = np.array([500.0, 500.0])
+    for jump, expected in [(140.0, False), (160.0, True)]:
+        detector = SaccadeDetector(distance=150.0, confirm=2)
+        results = [detector.update((500 + jump, 500), filtered) for _ in range(2)]
+        assert results == [False, expected]
+
+
+def test_create_filter_options():
+    assert create_filter('none').saccades is None
+    assert create_filter('kalman', saccade_px=0).saccades is None
+    assert create_filter('one_euro').saccades.distance == 150.0
+    with pytest.raises(ValueError):
+        create_filter('ema')
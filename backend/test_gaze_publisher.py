@@ -0,0 +1,91 @@
+# test_gaze_publisher.py
+# gaze_publisher.py 단위 테스트 (배치 형식, 버퍼; 네트워크 없이) (python -m pytest -q test_gaze_publisher.py)
+import json
+import struct
+import pytest
+from gaze_publisher import GazePublisher, encode_batch, decode_batch, encode_json, BATCH_VERSION
+
+SCREEN = (1920, 1080)
+SAMPLES = [(1000.0, 10, 20), (1000.016, 960.4, 540.9), (1000.5, 1919, 1079)]
+
+
+def test_binary_round_trip():
+    data = encode_batch(SAMPLES, SCREEN, paint=True)
+    assert len(data) == 16 + 6 * len(SAMPLES)
+
+    batch = decode_batch(data)
+    assert batch['screen'] == SCREEN and batch['paint'] is True
+    assert [(x, y) for _, x, y in batch['points']] == [(10, 20), (960, 540), (1919, 1079)]
+    for (t, _, _), (t_decoded, _, _) in zip(SAMPLES, batch['points']):
+        assert t_decoded == pytest.approx(t, abs=1e-3)  # ms 단위
+
+
+def test_json_round_trip_matches_binary():
+    data = encode_json(SAMPLES, SCREEN)
+    batch = decode_batch(json.loads(json.dumps(data)))
+    assert batch == {**decode_batch(encode_batch(SAMPLES, SCREEN)), 'screen': SCREEN}
+    assert batch['paint'] is False
+
+
+def test_encode_clamps_to_u16():
+    data = encode_batch([(0.0, -5, 70000), (100.0, 1, 2)], SCREEN)
+    points = decode_batch(data)['points']
+    assert points[0][1:] == (0, 0xFFFF)
+    assert points[1][0] == pytest.approx(0xFFFF / 1000.0)  # dt_ms 상한
+
+
+def test_decode_rejects_unknown_version():
+    data = bytearray(encode_batch(SAMPLES, SCREEN))
+    struct.pack_into('<B', data, 0, BATCH_VERSION + 1)
+    with pytest.raises(ValueError):
+        decode_batch(bytes(data))
+
+
+def test_buffer_drops_oldest_when_full():
+    publisher = GazePublisher(buffer_size=4, max_batch=64)
+    for i in range(6):
+        publisher.publish(i, i, t=float(i))
+    assert publisher.dropped == 2
+    assert [x for _, x, _ in publisher._take()] == [2, 3, 4, 5]
+    assert publisher._take() == []
+
+
+def test_take_keeps_newest_max_batch():
+    publisher = GazePublisher(buffer_size=16, max_batch=3)
+    for i in range(5):
+        publisher.publish(i, i, t=float(i))
+    assert [x for _, x, _ in publisher._take()] == [2, 3, 4]
+    assert publisher.dropped == 2
+
+
+def test_requeue_puts_unsent_batch_back_in_order():
+    publisher = GazePublisher(buffer_size=4, max_batch=64)
+    for i in range(3):
+        publisher.publish(i, i, t=float(i))
+    unsent = publisher._take()
+    publisher.publish(3, 3, t=3.0)
+    publisher.publish(4, 4, t=4.0)  # 보내는 동안 들어온 점
+
+    publisher._requeue(unsent)
+    # 버퍼 4개 → 가장 오래된 점 하나 버림
+    assert publisher.dropped == 1
+    assert [x for _, x, _ in publisher._take()] == [1, 2, 3, 4]
+
+
+def test_send_failure_requeues_samples():
+    import asyncio
+    import socketio
+
+    class FailingClient:
+        connected = True
+
+        async def call(self, event, data, timeout=None):
+            raise socketio.exceptions.BadNamespaceError('/ is not a connected namespace.')
+
+    publisher = GazePublisher(buffer_size=8)
+    for i in range(3):
+        publisher.publish(i, i, t=float(i))
+    with pytest.raises(socketio.exceptions.SocketIOError):
+        asyncio.run(publisher._send_loop(FailingClient()))
+    assert publisher.dropped == 0 and publisher.sent == 0
+    assert [x for _, x, _ in publisher._take()] == [0, 1, 2]
@@ -0,0 +1,182 @@
+# test_landmarker.py
+# landmarker.py 단위 테스트 (가짜 FaceMesh: 밝은 사각형 = 얼굴) (python -m pytest -q test_landmarker.py)
+from types import SimpleNamespace
+import cv2
+import numpy as np
+import pytest
+from landmarker import FaceMeshLandmarker, SparseLandmarker, TRACKED_INDICES, create_landmarker
+
+W, H = 640, 480
+FACE = (200, 150, 360, 330)  # 얼굴 사각형 (x1, y1, x2, y2), 픽셀
+
+
+class FakeFaceMesh:
+    """
+    입력 이미지에서 밝은 영역(R > 150)의 bounding box를 얼굴로 보고
+    그 안에 18 x 26 격자로 468개 랜드마크 (입력 이미지 기준 정규화 좌표)
+    """
+
+    def __init__(self):
+        self.shapes = []  # process에 들어온 이미지 크기
+
+    def process(self, rgb):
+        self.shapes.append(rgb.shape)
+        ys, xs = np.nonzero(rgb[..., 0] > 150)
+        if len(xs) == 0:
+            return SimpleNamespace(multi_face_landmarks=None)
+        h, w = rgb.shape[:2]
+        x1, x2, y1, y2 = xs.min(), xs.max() + 1, ys.min(), ys.max() + 1
+        landmark = [SimpleNamespace(x=(x1 + (x2 - x1) * (i % 18) / 17) / w,
+                                    y=(y1 + (y2 - y1) * (i // 18) / 25) / h) for i in range(468)]
+        return SimpleNamespace(multi_face_landmarks=[SimpleNamespace(landmark=landmark)])
+
+
+def make_frame(face=FACE, seed=0):
+    """optical flow가 잡을 수 있는 무늬 배경 (0~100) + 밝은 얼굴 사각형 (155~255)"""
+    noise = np.random.default_rng(seed).random((H, W)).astype(np.float32)
+    texture = cv2.GaussianBlur(noise, (0, 0), 2)
+    texture = (texture - texture.min()) / (texture.max() - texture.min()) * 100
+    gray = texture.copy()
+    if face is not None:
+        x1, y1, x2, y2 = face
+        gray[y1:y2, x1:x2] += 155
+    return cv2.cvtColor(gray.astype(np.uint8), cv2.COLOR_GRAY2BGR)
+
+
+def shift(frame, dx):
+    return np.roll(frame, dx, axis=1)
+
+
+def tracked_xy(landmarks):
+    return np.array([(landmarks[idx].x * W, landmarks[idx].y * H) for idx in TRACKED_INDICES])
+
+
+def test_sparse_redetects_every_n_frames():
+    face_mesh = FakeFaceMesh()
+    landmarker = SparseLandmarker(face_mesh, detect_every=3)
+    frame = make_frame()
+
+    detected = tracked_xy(landmarker.process(frame))
+    calls = []
+    for _ in range(6):
+        landmarks = landmarker.process(frame)
+        calls.append(len(face_mesh.shapes))
+        np.testing.assert_allclose(tracked_xy(landmarks), detected, atol=0.5)
+    # 0, 3, 6번째 프레임만 FaceMesh, 그 사이는 추적 ({인덱스: Landmark})
+    assert calls == [1, 1, 2, 2, 2, 3]
+    assert landmarker.detections == 3 and landmarker.tracked == 4
+
+
+def test_sparse_tracks_small_motion():
+    face_mesh = FakeFaceMesh()
+    landmarker = SparseLandmarker(face_mesh, detect_every=4)
+    frame = make_frame()
+    detected = tracked_xy(landmarker.process(frame))
+
+    for step in range(1, 4):
+        landmarks = landmarker.process(shift(frame, 4 * step))
+        assert sorted(landmarks) == TRACKED_INDICES
+        np.testing.assert_allclose(tracked_xy(landmarks) - detected, [[4 * step, 0]] * len(detected), atol=0.5)
+    assert len(face_mesh.shapes) == 1
+
+
+def test_sparse_redetects_on_large_motion():
+    face_mesh = FakeFaceMesh()
+    landmarker = SparseLandmarker(face_mesh, detect_every=10, max_motion=20.0)
+    frame = make_frame()
+    landmarker.process(frame)
+    landmarker.process(shift(frame, 5))
+    assert len(face_mesh.shapes) == 1
+
+    # 프레임 간 이동 > max_motion (또는 추적 실패) → 그 프레임에서 바로 FaceMesh
+    landmarks = landmarker.process(shift(frame, 45))
+    assert len(face_mesh.shapes) == 2
+    assert len(landmarks) == 468  # 추적 dict가 아니라 FaceMesh 결과
+    assert min(lm.x for lm in landmarks) * W == pytest.approx(FACE[0] + 45)
+
+
+def test_sparse_resets_when_face_lost():
+    face_mesh = FakeFaceMesh()
+    landmarker = SparseLandmarker(face_mesh, detect_every=3)
+    assert landmarker.process(make_frame(face=None)) is None
+    # 얼굴을 놓치면 추적할 점이 없음 → 다음 프레임도 FaceMesh
+    assert landmarker.process(make_frame()) is not None
+    assert len(face_mesh.shapes) == 2
+    landmarker.process(make_frame())
+    assert len(face_mesh.shapes) == 2 and landmarker.tracked == 1
+
+
+def face_box(landmarks):
+    xs, ys = [lm.x * W for lm in landmarks], [lm.y * H for lm in landmarks]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def test_landmark_width_downscales_but_keeps_full_frame_coords():
+    face_mesh = FakeFaceMesh()
+    landmarker = FaceMeshLandmarker(face_mesh, landmark_width=160)
+    landmarks = landmarker.process(make_frame())
+    # FaceMesh 입력만 160 너비로, 랜드마크는 원본 프레임 정규화 좌표
+    assert face_mesh.shapes == [(120, 160, 3)]
+    np.testing.assert_allclose(face_box(landmarks), FACE, atol=W / 160)
+
+    # 이미 landmark_width보다 작은 프레임은 그대로
+    FaceMeshLandmarker(face_mesh, landmark_width=1280).process(make_frame())
+    assert face_mesh.shapes[-1] == (H, W, 3)
+
+
+def test_face_crop_roi_stays_fixed_until_face_nears_border():
+    face_mesh = FakeFaceMesh()
+    landmarker = FaceMeshLandmarker(face_mesh, face_crop=True)
+    landmarks = landmarker.process(make_frame())
+    assert face_mesh.shapes == [(H, W, 3)]
+    roi = landmarker._roi
+    x1, y1, x2, y2 = roi
+    assert x1 < FACE[0] and y1 < FACE[1] and x2 > FACE[2] and y2 > FACE[3]
+
+    # 다음 프레임은 ROI만 FaceMesh에, 결과는 전체 프레임 좌표
+    landmarks = landmarker.process(make_frame())
+    assert face_mesh.shapes[-1] == (y2 - y1, x2 - x1, 3)
+    np.testing.assert_allclose(face_box(landmarks), FACE, atol=1e-6)
+
+    # ROI 안쪽에서 조금 움직이면 ROI 고정
+    moved = (FACE[0] + 10, FACE[1], FACE[2] + 10, FACE[3])
+    np.testing.assert_allclose(face_box(landmarker.process(make_frame(moved))), moved, atol=1e-6)
+    assert landmarker._roi == roi
+
+    # 가장자리(roi_border)에 닿으면 얼굴 중심으로 다시 잡음
+    moved = (FACE[0] + 60, FACE[1], FACE[2] + 60, FACE[3])
+    landmarker.process(make_frame(moved))
+    assert landmarker._roi != roi
+    assert landmarker._roi[0] < moved[0] and landmarker._roi[2] > moved[2]
+
+
+def test_face_crop_falls_back_to_full_frame_on_miss():
+    face_mesh = FakeFaceMesh()
+    landmarker = FaceMeshLandmarker(face_mesh, face_crop=True)
+    landmarker.process(make_frame())
+    x1, y1, x2, y2 = landmarker._roi
+
+    # 얼굴이 ROI 밖으로 → ROI에서 못 찾으면 같은 프레임에서 전체로 다시
+    far = (470, 10, 600, 70)
+    landmarks = landmarker.process(make_frame(far))
+    assert face_mesh.shapes[-2:] == [(y2 - y1, x2 - x1, 3), (H, W, 3)]
+    np.testing.assert_allclose(face_box(landmarks), far, atol=1e-6)
+    assert landmarker._roi[1] == 0 and landmarker._roi[2] == W  # 프레임 경계에서 잘림
+
+    # 얼굴이 없으면 ROI를 버림
+    assert landmarker.process(make_frame(face=None)) is None
+    assert landmarker._roi is None
+
+
+def test_sparse_landmarker_with_face_crop_and_width():
+    face_mesh = FakeFaceMesh()
+    landmarker = create_landmarker(face_mesh, detect_every=2, landmark_width=160, face_crop=True)
+    assert isinstance(landmarker, SparseLandmarker)
+    frame = make_frame()
+    detected = tracked_xy(landmarker.process(frame))
+    tracked = tracked_xy(landmarker.process(frame))
+    np.testing.assert_allclose(tracked, detected, atol=0.5)
+    # 두 번째 검출은 ROI를 160 너비로 줄여서
+    landmarks = landmarker.process(frame)
+    assert len(face_mesh.shapes) == 2 and face_mesh.shapes[-1][1] == 160
+    np.testing.assert_allclose(face_box(landmarks), FACE, atol=3.0)
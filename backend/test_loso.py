@@ -0,0 +1,31 @@
+# test_loso.py
+# loso.py 단위 테스트 (가짜 MPIIGaze 3명, 1 epoch) (python -m pytest -q test_loso.py)
+import numpy as np
+import pytest
+from loso import run_fold, run_loso
+
+SUBJECTS = {'p00': [8, 5], 'p01': [6], 'p02': [4]}  # 눈 2개 → 26, 12, 8 샘플
+
+
+def test_fold_holds_out_one_subject(mpiigaze_root, tmp_path):
+    root, cache_dir = mpiigaze_root(SUBJECTS), str(tmp_path / 'cache')
+    result = run_fold(root, cache_dir, 'p01', list(SUBJECTS), epochs=1, batch_size=8)
+    assert result['subject'] == 'p01'
+    assert result['n_test'] == 12 and result['n_train'] == 26 + 8
+    assert np.isfinite(result['angle']) and result['angle'] > 0
+
+    # 같은 seed → 같은 결과
+    again = run_fold(root, cache_dir, 'p01', list(SUBJECTS), epochs=1, batch_size=8)
+    assert again['angle'] == pytest.approx(result['angle'])
+
+
+def test_loso_runs_every_fold_in_parallel(mpiigaze_root, tmp_path):
+    root = mpiigaze_root(SUBJECTS)
+    report = run_loso(root, str(tmp_path / 'cache'), subject_ids=list(SUBJECTS) + ['p09'], jobs=2,
+                      epochs=1, batch_size=8)
+    # 데이터가 없는 피험자 (p09) 는 fold에서 빠짐
+    assert [fold['subject'] for fold in report['folds']] == ['p00', 'p01', 'p02']
+    assert [fold['n_test'] for fold in report['folds']] == [26, 12, 8]
+    angles = [fold['angle'] for fold in report['folds']]
+    assert report['mean_angle'] == pytest.approx(np.mean(angles))
+    assert report['std_angle'] == pytest.approx(np.std(angles))
@@ -0,0 +1,96 @@
+# test_pipeline.py
+# pipeline.py 단위 테스트 (가짜 카메라 / 랜드마커 / 엔진) (python -m pytest -q test_pipeline.py)
+import threading
+import time
+import numpy as np
+from pipeline import LatestQueue, GazePipeline
+
+
+def test_latest_queue_returns_newest_and_counts_drops():
+    q = LatestQueue(maxsize=2)
+    for i in range(3):
+        q.put(i)
+    assert q.dropped == 1 and q.depth() == 2
+    # get은 최신 하나만, 남은 항목은 버림
+    assert q.get() == 2
+    assert q.dropped == 2 and q.depth() == 0
+    assert q.get(timeout=0.01) is None
+
+
+def test_latest_queue_close_wakes_waiting_get():
+    q = LatestQueue()
+    got = []
+    thread = threading.Thread(target=lambda: got.append(q.get(timeout=5.0)))
+    thread.start()
+    time.sleep(0.05)
+    q.close()
+    thread.join(timeout=1.0)
+    assert not thread.is_alive() and got == [None]
+
+
+class FakeCapture:
+    """n 프레임 후 끝나는 카메라 (프레임 값 = 번호, 왼쪽 끝 열에 표시)"""
+
+    def __init__(self, n):
+        self.n, self.i = n, 0
+
+    def read(self):
+        if self.i >= self.n:
+            return False, None
+        frame = np.full((4, 6, 3), self.i, dtype=np.uint8)
+        frame[:, 0] = 255
+        self.i += 1
+        time.sleep(0.002)
+        return True, frame
+
+
+class SlowLandmarker:
+    """캡처보다 느린 랜드마커 → 캡처 큐에서 프레임이 버려짐, 5의 배수 프레임은 얼굴 없음"""
+
+    def __init__(self):
+        self.seen = []
+
+    def process(self, frame):
+        time.sleep(0.01)
+        index = int(frame[0, 1, 0])
+        self.seen.append((index, frame[0, -1, 0] == 255))
+        return None if index % 5 == 0 else ('face', index)
+
+
+class FakeEngine:
+    def estimate(self, frame, landmarks):
+        return landmarks[1]
+
+
+def test_pipeline_processes_latest_frames_in_order():
+    cap, landmarker = FakeCapture(60), SlowLandmarker()
+    pipeline = GazePipeline(cap, landmarker, FakeEngine()).start()
+
+    packets = []
+    while True:
+        packet = pipeline.get(timeout=1.0)
+        if packet is None:
+            break
+        pipeline.mark_rendered(packet, time.perf_counter())
+        packets.append(packet)
+    pipeline.stop()
+    assert not pipeline.running
+
+    # flip 적용 (표시한 열이 오른쪽 끝으로), 프레임은 순서대로만 처리
+    indices = [index for index, _ in landmarker.seen]
+    assert all(flipped for _, flipped in landmarker.seen)
+    assert indices == sorted(set(indices))
+    # 느린 랜드마커 → 캡처 큐에서 버린 프레임이 있음, 모든 프레임은 처리 / 버림 / 큐 잔여 중 하나
+    s = pipeline.stats()
+    assert s['dropped']['captured'] > 0
+    assert len(indices) + s['dropped']['captured'] + s['queue_depth']['captured'] == 60
+
+    assert packets
+    for packet in packets:
+        if packet.landmarks is None:
+            assert packet.result is None
+        else:
+            assert packet.result == packet.landmarks[1]
+        assert packet.t_capture <= packet.t_landmark <= packet.t_infer
+    assert s['latency_ms'] > 0 and s['stage_ms']['landmark'] >= 10.0
+    assert pipeline.stats_text().startswith('latency ')
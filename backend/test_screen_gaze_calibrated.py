@@ -0,0 +1,103 @@
+# test_screen_gaze_calibrated.py
+# RobustGazeTracker 캘리브레이션 / 암묵적 샘플 로직 단위 테스트 (카메라, 모델 없이)
+# python -m pytest -q test_screen_gaze_calibrated.py
+import numpy as np
+from startup import StartupTimer
+from screen_gaze_calibrated import RobustGazeTracker
+
+SCREEN = (1920, 1080)
+FPS = 30.0
+
+
+class FakeTimer(StartupTimer):
+    """모델 / FaceMesh / 카메라 초기화 대신 화면 크기만 돌려줌"""
+
+    def parallel(self, tasks):
+        return {'model': None, 'face_mesh': None, 'camera': None, 'screen': SCREEN}
+
+
+def make_tracker(tmp_path, **kwargs):
+    return RobustGazeTracker(timer=FakeTimer(), profiles_dir=str(tmp_path / 'profiles'), **kwargs)
+
+
+def gaze_for(point, head=(0.0, 0.0, 0.1)):
+    """화면 점 (+ 머리 위치) → 그 점을 볼 때의 gaze"""
+    gx = (point[0] - SCREEN[0] / 2) / 3000 + head[0] * 0.1
+    gy = -(point[1] - SCREEN[1] / 2) / 2000 + head[1] * 0.1
+    return np.array([gx, gy, -1.0])
+
+
+def run_calibration(tracker, t, quick=False, head=(0.0, 0.0, 0.1), cancel_after=None):
+    """세션 목표를 보는 gaze를 프레임마다 넣어 캘리브레이션 진행 → 끝난 시각"""
+    tracker.start_calibration(t, quick=quick)
+    frames = 0
+    while tracker.calibration is not None:
+        if cancel_after is not None and frames >= cancel_after:
+            tracker.cancel_calibration()
+            break
+        tracker.last_head = np.asarray(head)
+        tracker.step_calibration(gaze_for(tracker.calibration.current_point, head), t)
+        t += 1 / FPS
+        frames += 1
+    return t
+
+
+def test_quick_and_cancelled_calibration_keep_explicit_heads(tmp_path):
+    tracker = make_tracker(tmp_path, use_head=True)
+    t = run_calibration(tracker, 0.0)
+    assert tracker.is_calibrated
+    assert len(tracker.calib_heads) == len(tracker.calib_gazes) == 25
+
+    t = run_calibration(tracker, t, quick=True)
+    t = run_calibration(tracker, t, cancel_after=30)
+    # 빠른 보정 / 취소는 full 캘리브레이션 점을 건드리지 않음
+    assert len(tracker.calib_heads) == len(tracker.calib_gazes) == 25
+    assert len(tracker._explicit_samples()['heads']) == 25
+    assert tracker.validate_implicit()
+
+
+def test_failed_full_calibration_keeps_previous_points(tmp_path):
+    tracker = make_tracker(tmp_path, use_head=True)
+    t = run_calibration(tracker, 0.0)
+    gazes = [g.copy() for g in tracker.calib_gazes]
+
+    tracker.start_calibration(t)
+    while tracker.calibration is not None:
+        tracker.step_calibration(None, t)  # 얼굴 없음 → 모든 점 실패
+        t += 1 / FPS
+    assert len(tracker.calib_heads) == len(tracker.calib_gazes) == 25
+    np.testing.assert_allclose(tracker.calib_gazes, gazes)
+
+
+def test_fixation_near_implicit_target_updates_model(tmp_path):
+    tracker = make_tracker(tmp_path)
+    t = run_calibration(tracker, 0.0)
+    target = (1400, 300)
+    tracker.model.theta[3] += [40.0, 30.0]  # 사용 중 드리프트
+    before = np.linalg.norm(tracker.model.predict(gaze_for(target)) - target)
+
+    # 목표가 없으면 고정 시선은 무시
+    for _ in range(30):
+        gaze = gaze_for(target)
+        tracker.learn_implicit(gaze, tracker.gaze_to_screen(gaze), t)
+        t += 1 / FPS
+    assert tracker.implicit_samples == 0
+
+    tracker.set_implicit_targets([(200, 900), target])
+    for _ in range(30):
+        gaze = gaze_for(target)
+        tracker.learn_implicit(gaze, tracker.gaze_to_screen(gaze), t)
+        t += 1 / FPS
+    assert tracker.implicit_samples == 1  # 고정 한 번에 샘플 하나
+    assert np.linalg.norm(tracker.model.predict(gaze_for(target)) - target) < before
+
+
+def test_fixation_far_from_targets_is_ignored(tmp_path):
+    tracker = make_tracker(tmp_path)
+    t = run_calibration(tracker, 0.0)
+    tracker.set_implicit_targets([(200, 900)])
+    for _ in range(30):
+        gaze = gaze_for((1400, 300))
+        tracker.learn_implicit(gaze, tracker.gaze_to_screen(gaze), t)
+        t += 1 / FPS
+    assert tracker.implicit_samples == 0
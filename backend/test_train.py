@@ -0,0 +1,115 @@
+# test_train.py
+# train.py 중간 재개 단위 테스트 (가짜 MPIIGaze, CPU) (python -m pytest -q test_train.py)
+import pytest
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from torch.utils.data import DataLoader, Subset, random_split
+from checkpoint import capture_state, get_rng_states, set_rng_states, restore_state
+from dataset import MPIIGazeDataset, IndexBatchSampler, batch_loader
+from model import GazeNet
+from train import angular_error, make_loaders, run_epoch
+
+BATCH_SIZE = 4
+CHECKPOINT_STEP = 3
+
+
+def make_training(seed=0):
+    torch.manual_seed(seed)
+    model = GazeNet()
+    optimizer = optim.Adam(model.parameters(), lr=1e-3)
+    scheduler = optim.lr_scheduler.ReduceLROnPlateau(optimizer)
+    return model, optimizer, scheduler
+
+
+def train_one_epoch(dataset, fast, model, optimizer, start_step=0, step_callback=None):
+    """train.train과 같은 방식: 셔플은 (seed, epoch) 전용 generator, dropout은 전역 RNG"""
+    train_dataset, val_dataset = random_split(dataset, [len(dataset) - 8, 8],
+                                              generator=torch.Generator().manual_seed(0))
+    generator = torch.Generator()
+    train_loader, _ = make_loaders(train_dataset, val_dataset, BATCH_SIZE, fast=fast, generator=generator)
+    generator.manual_seed(0)
+    run_epoch(model, train_loader, nn.MSELoss(), torch.device('cpu'), optimizer=optimizer, fast=fast,
+              start_step=start_step, step_callback=step_callback)
+
+
+@pytest.mark.parametrize('fast', [True, False])
+def test_mid_epoch_resume_matches_uninterrupted_run(mpiigaze_root, tmp_path, fast):
+    dataset = MPIIGazeDataset(mpiigaze_root(), cache_dir=str(tmp_path / 'cache'))
+
+    # 끊기지 않은 학습 (CHECKPOINT_STEP에서 train.py처럼 그 시점 RNG와 함께 스냅샷)
+    model, optimizer, scheduler = make_training()
+    snapshots = {}
+
+    def on_step(step):
+        if step == CHECKPOINT_STEP:
+            snapshots['state'] = capture_state(model, optimizer, scheduler, step=step, rng=get_rng_states())
+
+    train_one_epoch(dataset, fast, model, optimizer, step_callback=on_step)
+    expected = model.state_dict()
+
+    # 스냅샷에서 재개 (다른 시드로 만든 모델에 복원)
+    state = snapshots['state']
+    resumed, optimizer, scheduler = make_training(seed=1)
+    restore_state(state, resumed, optimizer, scheduler)
+    set_rng_states(state['rng'])
+    train_one_epoch(dataset, fast, resumed, optimizer, start_step=state['step'])
+
+    for name, value in resumed.state_dict().items():
+        torch.testing.assert_close(value, expected[name], rtol=0, atol=0, msg=name)
+
+
+def test_epoch_start_rng_would_change_dropout(mpiigaze_root, tmp_path):
+    """예전 방식 (epoch 시작 RNG 복원) 은 dropout이 달라짐 → 위 테스트가 step 시점 RNG를 확인함"""
+    dataset = MPIIGazeDataset(mpiigaze_root(), cache_dir=str(tmp_path / 'cache'))
+    model, optimizer, scheduler = make_training()
+    epoch_rng = get_rng_states()
+    snapshots = {}
+
+    def on_step(step):
+        if step == CHECKPOINT_STEP:
+            snapshots['state'] = capture_state(model, optimizer, scheduler, step=step)
+
+    train_one_epoch(dataset, True, model, optimizer, step_callback=on_step)
+    resumed, optimizer, scheduler = make_training(seed=1)
+    restore_state(snapshots['state'], resumed, optimizer, scheduler)
+    set_rng_states(epoch_rng)
+    train_one_epoch(dataset, True, resumed, optimizer, start_step=CHECKPOINT_STEP)
+
+    assert not torch.equal(resumed.fc1.weight, model.fc1.weight)
+
+
+def test_angular_error_degrees():
+    a = torch.tensor([[0.0, 0.0, -1.0], [1.0, 0.0, 0.0]])
+    b = torch.tensor([[0.0, 0.0, -2.0], [0.0, 1.0, 0.0]])  # 크기는 무관
+    assert angular_error(a, b).item() == pytest.approx(45.0, abs=0.05)  # (0° + 90°) / 2
+    assert angular_error(a, a).item() == pytest.approx(0.0, abs=0.1)
+
+
+def test_fast_mode_metrics_match_default(mpiigaze_root, tmp_path):
+    dataset = MPIIGazeDataset(mpiigaze_root(), cache_dir=str(tmp_path / 'cache'))
+    subset = Subset(dataset, list(range(32)))
+    model, _, _ = make_training()
+    device = torch.device('cpu')
+
+    fast = run_epoch(model, batch_loader(subset, 8), nn.MSELoss(), device, fast=True)
+    default = run_epoch(model, DataLoader(subset, batch_size=8), nn.MSELoss(), device)
+    # 배치 크기가 같으면 배치 평균의 평균 = 샘플 가중 평균
+    assert fast[2] == default[2] == 32
+    assert fast[0] == pytest.approx(default[0], rel=1e-5)
+    assert fast[1] == pytest.approx(default[1], rel=1e-5)
+
+    channels_last = run_epoch(model.to(memory_format=torch.channels_last), batch_loader(subset, 8), nn.MSELoss(),
+                              device, fast=True, channels_last=True)
+    assert channels_last[0] == pytest.approx(fast[0], rel=1e-4)
+    bf16 = run_epoch(model, batch_loader(subset, 8), nn.MSELoss(), device, fast=True, bf16=True)
+    assert bf16[0] == pytest.approx(fast[0], rel=0.1)
+
+
+def test_make_loaders_fast_uses_batch_sampler(mpiigaze_root, tmp_path):
+    dataset = MPIIGazeDataset(mpiigaze_root(), cache_dir=str(tmp_path / 'cache'))
+    train_dataset, val_dataset = random_split(dataset, [30, 8], generator=torch.Generator().manual_seed(0))
+    train_loader, val_loader = make_loaders(train_dataset, val_dataset, 8, fast=True)
+    assert isinstance(train_loader.sampler, IndexBatchSampler) and train_loader.sampler.shuffle
+    assert not val_loader.sampler.shuffle
+    assert sum(len(g) for _, g in train_loader) == 30
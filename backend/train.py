@@ -1,11 +1,15 @@
+import argparse
+import time
 import torch
 import torch.nn as nn
 import torch.optim as optim
 from torch.utils.data import DataLoader, random_split
 import numpy as np
 import matplotlib.pyplot as plt
-from dataset import MPIIGazeDataset
+from dataset import MPIIGazeDataset, IndexBatchSampler, batch_loader
 from model import GazeNet
+from checkpoint import (AsyncCheckpointer, EarlyStopping, capture_state, cpu_copy,
+                        get_rng_states, set_rng_states, load_checkpoint, restore_state)
 
 def angular_error(pred, target):
     """
@@ -24,32 +28,165 @@ def angular_error(pred, target):
     
     return angle_deg.mean()
 
-def train():
+def make_loaders(train_dataset, val_dataset, batch_size, fast=False, num_workers=0,
+                 prefetch_factor=2, pin_memory=False, generator=None):
+    """
+    Train/Val DataLoader 생성
+    - fast: 배치 단위 로더(batch_loader) 사용
+    - num_workers > 0이면 persistent worker + prefetch
+    - generator: train 셔플 전용 RNG (전역 RNG와 분리 → 중간 재개 때 셔플과 dropout RNG를 따로 복원)
+    """
+    loader_kwargs = {'num_workers': num_workers, 'pin_memory': pin_memory}
+    if num_workers > 0:
+        loader_kwargs['prefetch_factor'] = prefetch_factor
+        loader_kwargs['persistent_workers'] = True
+
+    if fast:
+        train_loader = batch_loader(train_dataset, batch_size, shuffle=True, generator=generator, **loader_kwargs)
+        val_loader = batch_loader(val_dataset, batch_size, shuffle=False, **loader_kwargs)
+    else:
+        train_loader = DataLoader(train_dataset, batch_size=batch_size, shuffle=True, generator=generator,
+                                  **loader_kwargs)
+        val_loader = DataLoader(val_dataset, batch_size=batch_size, shuffle=False, **loader_kwargs)
+    return train_loader, val_loader
+
+def run_epoch(model, loader, criterion, device, optimizer=None, fast=False,
+              bf16=False, channels_last=False, start_step=0, step_callback=None):
+    """
+    1 epoch 학습(optimizer 지정 시) 또는 검증
+    - fast: loss/angle을 디바이스에서 누적하고 epoch 끝에 한 번만 동기화
+    - bf16: bfloat16 autocast (CPU)
+    - start_step: 체크포인트에서 재개할 때 이미 끝난 배치 수
+      (batch_loader면 sampler에서 건너뛰어 읽지도 않음, 일반 DataLoader는 읽고 버림)
+    - step_callback: 학습 배치마다 step_callback(끝난 배치 수) 호출
+
+    Returns:
+        (평균 loss, 평균 angle, 샘플 수, 소요 시간(초))
+    """
+    training = optimizer is not None
+    model.train(training)
+    memory_format = torch.channels_last if channels_last else torch.contiguous_format
+
+    losses = []
+    angles = []
+    loss_sum = torch.zeros((), device=device)
+    angle_sum = torch.zeros((), device=device)
+    n_samples = 0
+
+    first_step = 0
+    if start_step > 0 and isinstance(getattr(loader, 'sampler', None), IndexBatchSampler):
+        loader.sampler.start_batch = start_step
+        first_step = start_step
+
+    start = time.perf_counter()
+    with torch.set_grad_enabled(training):
+        for step, (images, gazes) in enumerate(loader, start=first_step):
+            if step < start_step:
+                continue
+            images = images.to(device, memory_format=memory_format, non_blocking=True)
+            gazes = gazes.to(device, non_blocking=True)
+
+            with torch.autocast('cpu', dtype=torch.bfloat16, enabled=bf16):
+                outputs = model(images)
+            outputs = outputs.float()
+            loss = criterion(outputs, gazes)
+
+            if training:
+                optimizer.zero_grad(set_to_none=True)
+                loss.backward()
+                optimizer.step()
+                if step_callback is not None:
+                    step_callback(step + 1)
+
+            if fast:
+                # .item() 없이 디바이스에서 누적 (샘플 수 가중)
+                batch = gazes.size(0)
+                loss_sum += loss.detach() * batch
+                angle_sum += angular_error(outputs.detach(), gazes) * batch
+            else:
+                losses.append(loss.item())
+                angles.append(angular_error(outputs, gazes).item())
+            n_samples += gazes.size(0)
+
+    if fast:
+        mean_loss = loss_sum.item() / max(n_samples, 1)
+        mean_angle = angle_sum.item() / max(n_samples, 1)
+    else:
+        mean_loss = np.mean(losses)
+        mean_angle = np.mean(angles)
+    return mean_loss, mean_angle, n_samples, time.perf_counter() - start
+
+DATA_ROOT = r"C:\Users\sean0\OneDrive\바탕 화면\정보통신탐구\data\MPIIGaze\Data\Normalized"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='GazeNet 학습')
+    parser.add_argument('--data-root', default=DATA_ROOT, help='MPIIGaze Data/Normalized 경로')
+    parser.add_argument('--cache-dir', default=None, help='.npy 캐시 폴더 (없으면 매번 .mat 로드)')
+    parser.add_argument('--ingest-workers', type=int, default=0, help='.mat 병렬 파싱 프로세스 수')
+    parser.add_argument('--epochs', type=int, default=20)
+    parser.add_argument('--fast', action='store_true',
+                        help='고속 모드: 배치 단위 로더 + 디바이스 누적 metric')
+    parser.add_argument('--num-workers', type=int, default=0, help='DataLoader worker 수')
+    parser.add_argument('--prefetch', type=int, default=2, help='worker당 prefetch 배치 수')
+    parser.add_argument('--pin-memory', action='store_true', help='pinned memory 사용')
+    parser.add_argument('--compile', action='store_true', help='torch.compile 사용')
+    parser.add_argument('--channels-last', action='store_true', help='channels_last 메모리 포맷')
+    parser.add_argument('--bf16', action='store_true', help='CPU bfloat16 autocast')
+    parser.add_argument('--seed', type=int, default=0, help='Train/Val 분할 + 초기화 시드')
+    parser.add_argument('--checkpoint', default='checkpoint.pth', help='전체 체크포인트 경로')
+    parser.add_argument('--checkpoint-every', type=int, default=500,
+                        help='N step마다 체크포인트 저장 (0이면 epoch 끝에만)')
+    parser.add_argument('--resume', action='store_true', help='--checkpoint에서 이어서 학습')
+    parser.add_argument('--early-stop', type=int, default=0,
+                        help='val angle이 N epoch 동안 안 좋아지면 중단 (0이면 사용 안 함)')
+    return parser.parse_args()
+
+def train(args):
     # ===== 설정 =====
-    DATA_ROOT = r"C:\Users\sean0\OneDrive\바탕 화면\정보통신탐구\data\MPIIGaze\Data\Normalized"
     BATCH_SIZE = 64
-    EPOCHS = 20
+    EPOCHS = args.epochs
     LEARNING_RATE = 0.001
     DEVICE = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
     
     print(f"Using device: {DEVICE}")
+    if args.bf16 and DEVICE.type != 'cpu':
+        print("--bf16은 CPU에서만 사용 (무시)")
+        args.bf16 = False
+
+    # 재개 시에는 같은 Train/Val 분할이 나오도록 체크포인트의 시드 사용
+    resume_state = None
+    if args.resume:
+        resume_state = load_checkpoint(args.checkpoint, DEVICE)
+        args.seed = resume_state['seed']
+        print(f"체크포인트에서 재개: epoch {resume_state['epoch']+1}, step {resume_state['step']}")
+    torch.manual_seed(args.seed)
     
     # ===== 데이터 로드 =====
     print("데이터 로딩 중...")
-    dataset = MPIIGazeDataset(DATA_ROOT, subject_ids=None, eye='both')
+    dataset = MPIIGazeDataset(args.data_root, subject_ids=None, eye='both',
+                              cache_dir=args.cache_dir, ingest_workers=args.ingest_workers)
     
     # Train/Val 분할 (80/20)
     train_size = int(0.8 * len(dataset))
     val_size = len(dataset) - train_size
-    train_dataset, val_dataset = random_split(dataset, [train_size, val_size])
+    train_dataset, val_dataset = random_split(
+        dataset, [train_size, val_size], generator=torch.Generator().manual_seed(args.seed))
     
-    train_loader = DataLoader(train_dataset, batch_size=BATCH_SIZE, shuffle=True, num_workers=0)
-    val_loader = DataLoader(val_dataset, batch_size=BATCH_SIZE, shuffle=False, num_workers=0)
+    shuffle_generator = torch.Generator()
+    train_loader, val_loader = make_loaders(
+        train_dataset, val_dataset, BATCH_SIZE, fast=args.fast, num_workers=args.num_workers,
+        prefetch_factor=args.prefetch, pin_memory=args.pin_memory, generator=shuffle_generator)
     
     print(f"Train: {len(train_dataset)}, Val: {len(val_dataset)}")
     
     # ===== 모델, Loss, Optimizer =====
     model = GazeNet().to(DEVICE)
+    if args.channels_last:
+        model = model.to(memory_format=torch.channels_last)
+    # 저장은 compile 전 모델로 (state_dict 키에 _orig_mod 접두어가 붙지 않게)
+    raw_model = model
+    if args.compile:
+        model = torch.compile(model)
     criterion = nn.MSELoss()  # 기본 Loss
     optimizer = optim.Adam(model.parameters(), lr=LEARNING_RATE)
     scheduler = optim.lr_scheduler.ReduceLROnPlateau(optimizer, patience=3, factor=0.5)
@@ -63,46 +200,52 @@ def train():
     }
     
     best_val_angle = float('inf')
+    epoch_kwargs = {'fast': args.fast, 'bf16': args.bf16, 'channels_last': args.channels_last}
+
+    # ===== 체크포인트 =====
+    early_stopping = EarlyStopping(patience=args.early_stop)
+    checkpointer = AsyncCheckpointer(args.checkpoint)
+    best_saver = AsyncCheckpointer('best_model.pth')
+    start_epoch = 0
+
+    if resume_state is not None:
+        restore_state(resume_state, raw_model, optimizer, scheduler)
+        history = resume_state['history']
+        best_val_angle = resume_state['best_val_angle']
+        early_stopping.load_state_dict(resume_state['early_stopping'])
+        start_epoch = resume_state['epoch']
+
+    def save_checkpoint(epoch, step):
+        # 텐서 복사까지만 여기서 하고 파일 쓰기는 백그라운드 스레드
+        # rng: 저장하는 step 시점의 전역 RNG (재개 후 dropout 등이 끊기지 않은 학습과 같게)
+        checkpointer.save(capture_state(
+            raw_model, optimizer, scheduler, epoch=epoch, step=step, rng=get_rng_states(),
+            history=history, best_val_angle=best_val_angle,
+            early_stopping=early_stopping.state_dict(), seed=args.seed))
     
     # ===== 학습 루프 =====
-    for epoch in range(EPOCHS):
+    for epoch in range(start_epoch, EPOCHS):
+        # 셔플 순서는 (seed, epoch)로만 정해짐 → 중간 재개 시 같은 순서, 전역 RNG는 저장된 step 시점으로
+        shuffle_generator.manual_seed(args.seed + epoch)
+        start_step = 0
+        if resume_state is not None and epoch == start_epoch:
+            set_rng_states(resume_state['rng'])
+            start_step = resume_state['step']
+
+        def on_step(step):
+            if args.checkpoint_every > 0 and step % args.checkpoint_every == 0:
+                save_checkpoint(epoch, step)
+
         # --- Train ---
-        model.train()
-        train_losses = []
-        train_angles = []
-        
-        for images, gazes in train_loader:
-            images, gazes = images.to(DEVICE), gazes.to(DEVICE)
-            
-            optimizer.zero_grad()
-            outputs = model(images)
-            loss = criterion(outputs, gazes)
-            loss.backward()
-            optimizer.step()
-            
-            train_losses.append(loss.item())
-            train_angles.append(angular_error(outputs, gazes).item())
+        train_loss, train_angle, n_train, train_time = run_epoch(
+            model, train_loader, criterion, DEVICE, optimizer=optimizer,
+            start_step=start_step, step_callback=on_step, **epoch_kwargs)
         
         # --- Validation ---
-        model.eval()
-        val_losses = []
-        val_angles = []
-        
-        with torch.no_grad():
-            for images, gazes in val_loader:
-                images, gazes = images.to(DEVICE), gazes.to(DEVICE)
-                outputs = model(images)
-                loss = criterion(outputs, gazes)
-                
-                val_losses.append(loss.item())
-                val_angles.append(angular_error(outputs, gazes).item())
+        val_loss, val_angle, _, _ = run_epoch(
+            model, val_loader, criterion, DEVICE, **epoch_kwargs)
         
         # --- 기록 ---
-        train_loss = np.mean(train_losses)
-        val_loss = np.mean(val_losses)
-        train_angle = np.mean(train_angles)
-        val_angle = np.mean(val_angles)
-        
         history['train_loss'].append(train_loss)
         history['val_loss'].append(val_loss)
         history['train_angle'].append(train_angle)
@@ -112,13 +255,24 @@ def train():
         
         print(f"Epoch {epoch+1}/{EPOCHS} | "
               f"Train Loss: {train_loss:.4f}, Angle: {train_angle:.2f}° | "
-              f"Val Loss: {val_loss:.4f}, Angle: {val_angle:.2f}°")
+              f"Val Loss: {val_loss:.4f}, Angle: {val_angle:.2f}° | "
+              f"{n_train / train_time:.0f} samples/s")
         
-        # Best 모델 저장
+        # Best 모델 저장 (가중치만, 백그라운드 저장)
         if val_angle < best_val_angle:
             best_val_angle = val_angle
-            torch.save(model.state_dict(), 'best_model.pth')
+            best_saver.save(cpu_copy(raw_model.state_dict()))
             print(f"  → Best model saved! ({val_angle:.2f}°)")
+
+        stop = early_stopping.step(val_angle)
+        # epoch 끝 체크포인트 (다음 epoch 처음부터 재개)
+        save_checkpoint(epoch + 1, 0)
+        if stop:
+            print(f"Early stopping: {args.early_stop} epoch 동안 개선 없음")
+            break
+
+    checkpointer.close()
+    best_saver.close()
     
     # ===== 학습 곡선 시각화 =====
     fig, axes = plt.subplots(1, 2, figsize=(12, 4))
@@ -140,4 +294,4 @@ def train():
     print(f"\n최종 Best Angular Error: {best_val_angle:.2f}°")
 
 if __name__ == "__main__":
-    train()
\ No newline at end of file
+    train(parse_args())
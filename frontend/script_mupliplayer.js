@@ -42,6 +42,10 @@ let lastGazeY = null;
 // 움직임 임계값 (픽셀)
 const MOVEMENT_THRESHOLD = 8;
 
+// 시선 위치 전송 간격 (ms)
+const GAZE_SEND_INTERVAL = 100;
+let lastGazeSent = 0;
+
 // 초기 설정
 function fillMask() {
   // 배경 캔버스: 파란색
@@ -126,11 +130,13 @@ function createOtherGazePointer(userId, color, nickname) {
   return pointer;
 }
 
+// x, y: 캔버스 좌표 → 화면 (viewport) 좌표로 바꿔서 표시
 function updateOtherGazePointer(userId, x, y) {
   let pointer = otherGazePointers.get(userId);
   if (pointer) {
-    pointer.style.left = `${x}px`;
-    pointer.style.top = `${y}px`;
+    const rect = canvas.getBoundingClientRect();
+    pointer.style.left = `${rect.left + x * rect.width / canvas.width}px`;
+    pointer.style.top = `${rect.top + y * rect.height / canvas.height}px`;
     pointer.style.display = 'block';
     
     // 3초 후 자동 숨김
@@ -344,18 +350,20 @@ function followGaze() {
     
     if (cx < 0 || cy < 0 || cx > canvas.width || cy > canvas.height) return;
     
-    const smoothed = smoothGaze(cx, cy);
-    cx = smoothed.x;
-    cy = smoothed.y;
-    
-    // 다른 사용자들에게 내 시선 위치 전송 (100ms마다)
-    if (socket.connected && Math.random() < 0.3) {
+    // 다른 사용자들에게 내 시선 위치 전송 (100ms마다, 캔버스 좌표 → 화면 크기가 달라도 같은 곳)
+    const now = performance.now();
+    if (socket.connected && now - lastGazeSent >= GAZE_SEND_INTERVAL) {
+      lastGazeSent = now;
       socket.emit('gaze-position', {
-        x: prediction.x,
-        y: prediction.y
+        x: cx,
+        y: cy
       });
     }
     
+    const smoothed = smoothGaze(cx, cy);
+    cx = smoothed.x;
+    cy = smoothed.y;
+    
     if (lastGazeX !== null && lastGazeY !== null) {
       const distance = Math.sqrt(
         (cx - lastGazeX) ** 2 + (cy - lastGazeY) ** 2